@@ -0,0 +1,356 @@
+import argparse
+import asyncio
+import json
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from telebot import types
+
+from bot_framework.entities.bot_message import BotMessage, BotMessageUser
+
+from benchmarks.fakes import (
+    AdminRoleRepo,
+    RecordingAsyncMessageService,
+    RecordingBot,
+    RecordingMessageService,
+    Scenario,
+    ScriptedSdkClient,
+)
+from src.agent.client import AgentClient
+from src.agent.tools.registry import SessionRegistry
+from src.chat.actions.async_send_to_agent_action import AsyncSendToAgentAction
+from src.chat.actions.send_to_agent_action import SendToAgentAction
+from src.chat.handlers.async_text_message_handler import AsyncTextMessageHandler
+from src.chat.handlers.text_message_handler import TextMessageHandler
+from src.chat.services.async_role_guard import AsyncRoleGuard
+from src.metrics.histogram import quantile
+from src.telegram.outbound_scheduler import OutboundScheduler, RateLimits
+from src.telegram.scheduled_message_service import ScheduledMessageService
+
+USERS = [10, 50, 100, 500]
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+# Время, когда обработчик получил сообщение, — для замера полной задержки
+_request_started = threading.local()
+
+
+@dataclass
+class LoadResult:
+    users: int
+    messages: int
+    wall_time: float
+    throughput: float
+    p50: float
+    p95: float
+    p99: float
+    peak_rss_mb: float
+    telegram_calls: int
+    peak_threads: int
+
+
+class _TimedAction(SendToAgentAction):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.latencies: list[float] = []
+        self.delivered: list[Future[None]] = []
+        self._lock = threading.Lock()
+
+    def execute(
+        self,
+        chat_id: int,
+        user_id: int,
+        text: str,
+        thinking_message_id: int,
+    ) -> Future[None]:
+        started: float = _request_started.value
+        delivered = super().execute(chat_id, user_id, text, thinking_message_id)
+        delivered.add_done_callback(
+            lambda _: self._record(time.perf_counter() - started)
+        )
+        with self._lock:
+            self.delivered.append(delivered)
+        return delivered
+
+    def _record(self, latency: float) -> None:
+        with self._lock:
+            self.latencies.append(latency)
+
+
+def run_load(
+    users: int,
+    rounds: int,
+    scenario: Scenario,
+    telegram_latency: float = 0.01,
+    handler_threads: int = 8,
+    max_clients: int | None = None,
+    mode: str = "sync",
+) -> LoadResult:
+    sampler = _ThreadSampler()
+    with (
+        sampler,
+        patch(
+            "claude_agent_sdk.ClaudeSDKClient",
+            new=lambda options: ScriptedSdkClient(scenario),
+        ),
+    ):
+        agent_client = AgentClient(
+            session_registry=SessionRegistry(),
+            bot=RecordingBot(),  # type: ignore[arg-type]
+            coalesce_window=0,
+            max_clients=max_clients or users,
+        )
+        if mode == "async":
+            latencies, wall_time, telegram_calls = _run_async(
+                agent_client, users, rounds, telegram_latency
+            )
+        else:
+            latencies, wall_time, telegram_calls = _run_sync(
+                agent_client, users, rounds, telegram_latency, handler_threads
+            )
+
+    messages = users * rounds
+    return LoadResult(
+        users=users,
+        messages=messages,
+        wall_time=wall_time,
+        throughput=messages / wall_time,
+        p50=quantile(latencies, 0.5),
+        p95=quantile(latencies, 0.95),
+        p99=quantile(latencies, 0.99),
+        peak_rss_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        telegram_calls=telegram_calls,
+        peak_threads=sampler.peak,
+    )
+
+
+def _run_sync(
+    agent_client: AgentClient,
+    users: int,
+    rounds: int,
+    telegram_latency: float,
+    handler_threads: int,
+) -> tuple[list[float], float, int]:
+    recorder = RecordingMessageService(latency=telegram_latency)
+    # Лимиты Telegram не ограничивают: меряем собственные накладные расходы бота
+    scheduler = OutboundScheduler(
+        RateLimits(global_rate=1e6, chat_rate=1e6, chat_burst=1e6)
+    )
+    message_service = ScheduledMessageService(recorder, scheduler)
+    action = _TimedAction(
+        agent_client=agent_client,
+        message_service=message_service,
+        edit_interval=0.2,
+    )
+    handler = TextMessageHandler(
+        send_to_agent_action=action,
+        message_service=message_service,
+        role_repo=AdminRoleRepo(),  # type: ignore[arg-type]
+    )
+
+    def handle(user_id: int, round_number: int) -> None:
+        _request_started.value = time.perf_counter()
+        handler.handle(
+            BotMessage(
+                chat_id=user_id,
+                message_id=round_number,
+                text=f"Message {round_number} from {user_id}",
+                from_user=BotMessageUser(id=user_id),
+            )
+        )
+
+    # Как у TeleBot: обновления разбирает небольшой пул потоков
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=handler_threads) as updates:
+        for round_number in range(rounds):
+            handled = [
+                updates.submit(handle, user_id, round_number)
+                for user_id in range(1, users + 1)
+            ]
+            for future in handled:
+                future.result()
+            wait(list(action.delivered))
+    return action.latencies, time.perf_counter() - started, recorder.total_calls
+
+
+def _run_async(
+    agent_client: AgentClient,
+    users: int,
+    rounds: int,
+    telegram_latency: float,
+) -> tuple[list[float], float, int]:
+    # Асинхронный путь: обработчик, ход и доставка — корутины на loop агента
+    recorder = RecordingAsyncMessageService(latency=telegram_latency)
+    action = AsyncSendToAgentAction(
+        agent_client=agent_client,
+        message_service=recorder,
+        edit_interval=0.2,
+    )
+    handler = AsyncTextMessageHandler(
+        send_to_agent_action=action,
+        message_service=recorder,
+        role_guard=AsyncRoleGuard(AdminRoleRepo()),  # type: ignore[arg-type]
+    )
+    latencies: list[float] = []
+
+    async def handle(user_id: int, round_number: int) -> None:
+        started = time.perf_counter()
+        await handler.handle(_telegram_message(user_id, round_number))
+        latencies.append(time.perf_counter() - started)
+
+    async def drive() -> None:
+        for round_number in range(rounds):
+            await asyncio.gather(
+                *(handle(user_id, round_number) for user_id in range(1, users + 1))
+            )
+
+    started = time.perf_counter()
+    asyncio.run_coroutine_threadsafe(drive(), agent_client.loop).result()
+    return latencies, time.perf_counter() - started, recorder.total_calls
+
+
+def _telegram_message(user_id: int, round_number: int) -> types.Message:
+    user = {"id": user_id, "is_bot": False, "first_name": f"User {user_id}"}
+    return types.Message.de_json(
+        {
+            "message_id": round_number,
+            "from": user,
+            "chat": {"id": user_id, "type": "private"},
+            "date": 0,
+            "text": f"Message {round_number} from {user_id}",
+        }
+    )
+
+
+class _ThreadSampler:
+    # Пик числа потоков сверх тех, что были до прогона (сам сэмплер не считается)
+    def __init__(self, interval: float = 0.005) -> None:
+        self.peak = 0
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._base = 0
+
+    def __enter__(self) -> "_ThreadSampler":
+        self._base = threading.active_count()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self._interval):
+            self.peak = max(self.peak, threading.active_count() - self._base - 1)
+
+
+def find_regressions(
+    results: list[LoadResult], baseline: dict[str, Any], tolerance: float
+) -> list[str]:
+    regressions: list[str] = []
+    for result in results:
+        expected = baseline.get(str(result.users))
+        if expected is None:
+            continue
+        if result.throughput < expected["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"users={result.users}: throughput {result.throughput:.1f}/s "
+                f"< baseline {expected['throughput']:.1f}/s"
+            )
+        if result.p95 > expected["p95"] * (1 + tolerance):
+            regressions.append(
+                f"users={result.users}: p95 {result.p95:.3f}s "
+                f"> baseline {expected['p95']:.3f}s"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline agent load benchmark")
+    parser.add_argument("--users", type=int, nargs="*", default=USERS)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--connect-time", type=float, default=0.2)
+    parser.add_argument("--think-time", type=float, default=0.05)
+    parser.add_argument("--text-blocks", type=int, default=3)
+    parser.add_argument("--block-size", type=int, default=300)
+    parser.add_argument("--tool-calls", type=int, default=1)
+    parser.add_argument("--tool-time", type=float, default=0.1)
+    parser.add_argument("--output-size", type=int, default=0)
+    parser.add_argument("--telegram-latency", type=float, default=0.01)
+    parser.add_argument("--handler-threads", type=int, default=8)
+    parser.add_argument("--max-clients", type=int, default=None)
+    parser.add_argument(
+        "--mode",
+        choices=["sync", "async"],
+        default="sync",
+        help="sync — потоки TeleBot, async — обработчики на loop агента",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--check", action="store_true", help="fail on regression")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    scenario = Scenario(
+        connect_time=args.connect_time,
+        think_time=args.think_time,
+        text_blocks=args.text_blocks,
+        block_size=args.block_size,
+        tool_calls=args.tool_calls,
+        tool_time=args.tool_time,
+        final_output_size=args.output_size,
+    )
+
+    print(
+        f"{'users':>6} {'msgs':>6} {'msg/s':>8} {'p50, s':>8} {'p95, s':>8} "
+        f"{'p99, s':>8} {'rss, MB':>8} {'tg calls':>9} {'threads':>8}"
+    )
+    results: list[LoadResult] = []
+    for users in args.users:
+        result = run_load(
+            users,
+            args.rounds,
+            scenario,
+            telegram_latency=args.telegram_latency,
+            handler_threads=args.handler_threads,
+            max_clients=args.max_clients,
+            mode=args.mode,
+        )
+        results.append(result)
+        print(
+            f"{result.users:>6} {result.messages:>6} {result.throughput:>8.1f} "
+            f"{result.p50:>8.3f} {result.p95:>8.3f} {result.p99:>8.3f} "
+            f"{result.peak_rss_mb:>8.1f} {result.telegram_calls:>9} "
+            f"{result.peak_threads:>8}"
+        )
+
+    if args.update_baseline:
+        baseline = {
+            str(result.users): {
+                "throughput": round(result.throughput, 1),
+                "p95": round(result.p95, 3),
+            }
+            for result in results
+        }
+        args.baseline.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+
+    if args.check:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+import statistics
+import time
+from pathlib import Path
+
+from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient
+
+# Нужен установленный CLI; к API запросов нет — меряется только connect()
+
+
+def base_options(cwd: Path) -> ClaudeAgentOptions:
+    return ClaudeAgentOptions(
+        cwd=str(cwd),
+        permission_mode="bypassPermissions",
+        system_prompt={"type": "preset", "preset": "claude_code"},
+        tools={"type": "preset", "preset": "claude_code"},
+        settings='{"enabledPlugins": {}}',
+        setting_sources=["user", "project", "local"],
+    )
+
+
+async def measure(options: ClaudeAgentOptions) -> float:
+    client = ClaudeSDKClient(options)
+    started = time.monotonic()
+    await client.connect()
+    elapsed = time.monotonic() - started
+    await client.disconnect()
+    return elapsed
+
+
+async def run(home: Path, runs: int) -> list[float]:
+    options = base_options(home)
+    return [await measure(options) for _ in range(runs)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SDK connect time")
+    parser.add_argument("--home", type=Path, default=Path.home())
+    parser.add_argument("--runs", type=int, default=8)
+    args = parser.parse_args()
+
+    values = asyncio.run(run(args.home, args.runs))
+    print(f"{'p50, ms':>10} {'min, ms':>10} {'max, ms':>10}")
+    print(
+        f"{statistics.median(values) * 1000:>10.0f}"
+        f" {min(values) * 1000:>10.0f} {max(values) * 1000:>10.0f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
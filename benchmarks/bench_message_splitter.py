@@ -0,0 +1,80 @@
+import argparse
+import random
+import time
+from collections.abc import Callable
+
+from src.chat.services.message_splitter import TELEGRAM_MESSAGE_LIMIT, split_message
+
+SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+
+def legacy_split_message(text: str) -> list[str]:
+    # Прежняя реализация: остаток строки копируется на каждой итерации
+    if len(text) <= TELEGRAM_MESSAGE_LIMIT:
+        return [text]
+
+    chunks: list[str] = []
+    while text:
+        if len(text) <= TELEGRAM_MESSAGE_LIMIT:
+            chunks.append(text)
+            break
+
+        split_pos = text.rfind("\n", 0, TELEGRAM_MESSAGE_LIMIT)
+        if split_pos == -1:
+            split_pos = TELEGRAM_MESSAGE_LIMIT
+
+        chunks.append(text[:split_pos])
+        text = text[split_pos:].lstrip("\n")
+
+    return chunks
+
+
+def make_reply(size: int, seed: int = 0) -> str:
+    # Похоже на вывод агента: текст вперемешку с блоками кода и длинными строками логов
+    rng = random.Random(seed)  # noqa: S311
+    parts: list[str] = []
+    total = 0
+    while total < size:
+        kind = rng.random()
+        if kind < 0.2:
+            body = "\n".join(
+                f"    value_{i} = compute({i})" for i in range(rng.randint(5, 200))
+            )
+            part = f"```python\n{body}\n```"
+        elif kind < 0.3:
+            part = "x" * rng.randint(100, 6000)
+        else:
+            part = " ".join("word" for _ in range(rng.randint(5, 80)))
+        parts.append(part)
+        total += len(part) + 1
+    return "\n".join(parts)[:size]
+
+
+def measure(split: Callable[[str], list[str]], text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        split(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Message splitter micro-benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sizes", type=int, nargs="*", default=SIZES)
+    args = parser.parse_args()
+
+    print(f"{'size':>12} {'legacy, ms':>12} {'current, ms':>12} {'speedup':>8}")
+    for size in args.sizes:
+        text = make_reply(size)
+        legacy = measure(legacy_split_message, text, args.repeat)
+        current = measure(split_message, text, args.repeat)
+        print(
+            f"{size:>12} {legacy * 1000:>12.2f} {current * 1000:>12.2f} "
+            f"{legacy / current:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any
+
+from bot_framework.entities.bot_message import BotMessage
+from bot_framework.entities.keyboard import Keyboard
+from bot_framework.entities.parse_mode import ParseMode
+from bot_framework.entities.role import Role
+from claude_agent_sdk import (
+    AssistantMessage,
+    ResultMessage,
+    SystemMessage,
+    TextBlock,
+    ToolResultBlock,
+    ToolUseBlock,
+    UserMessage,
+)
+
+FILLER = "Lorem ipsum dolor sit amet, consectetur adipiscing elit.\n"
+
+
+@dataclass
+class Scenario:
+    # Сценарий хода скриптового SDK-клиента; все времена в секундах
+    connect_time: float = 0.2
+    think_time: float = 0.05
+    text_blocks: int = 3
+    block_size: int = 300
+    tool_calls: int = 1
+    tool_time: float = 0.1
+    tool_output_size: int = 2048
+    final_output_size: int = 0
+    input_tokens: int = 2000
+    model: str = "fake-model"
+
+
+class ScriptedSdkClient:
+    # Заменяет ClaudeSDKClient: те же методы, ответ по сценарию, без CLI и сети
+    _ids = itertools.count()
+
+    def __init__(self, scenario: Scenario) -> None:
+        self._scenario = scenario
+        self._transport: object | None = None
+        self._session_id = f"fake-session-{next(self._ids)}"
+        self._prompt = ""
+
+    async def connect(self) -> None:
+        await asyncio.sleep(self._scenario.connect_time)
+        self._transport = object()
+
+    async def query(self, prompt: str) -> None:
+        self._prompt = prompt
+
+    async def interrupt(self) -> None:
+        return None
+
+    async def disconnect(self) -> None:
+        self._transport = None
+
+    async def receive_response(self) -> Any:
+        scenario = self._scenario
+        started = time.monotonic()
+        yield SystemMessage(
+            subtype="init",
+            data={"model": scenario.model, "session_id": self._session_id},
+        )
+        for i in range(scenario.tool_calls):
+            await asyncio.sleep(scenario.think_time)
+            tool_use_id = f"toolu_{self._session_id}_{i}"
+            yield AssistantMessage(
+                content=[
+                    ToolUseBlock(id=tool_use_id, name="Bash", input={"command": "ls"})
+                ],
+                model=scenario.model,
+            )
+            await asyncio.sleep(scenario.tool_time)
+            yield UserMessage(
+                content=[
+                    ToolResultBlock(
+                        tool_use_id=tool_use_id,
+                        content="x" * scenario.tool_output_size,
+                    )
+                ]
+            )
+        for _ in range(scenario.text_blocks):
+            await asyncio.sleep(scenario.think_time)
+            yield AssistantMessage(
+                content=[TextBlock(text=_filler(scenario.block_size))],
+                model=scenario.model,
+            )
+        if scenario.final_output_size:
+            yield AssistantMessage(
+                content=[TextBlock(text=_filler(scenario.final_output_size))],
+                model=scenario.model,
+            )
+        duration_ms = int((time.monotonic() - started) * 1000)
+        yield ResultMessage(
+            subtype="success",
+            duration_ms=duration_ms,
+            duration_api_ms=duration_ms,
+            is_error=False,
+            num_turns=1 + scenario.tool_calls,
+            session_id=self._session_id,
+            total_cost_usd=0.0,
+            usage={"input_tokens": scenario.input_tokens, "output_tokens": 100},
+        )
+
+
+class RecordingMessageService:
+    # IMessageService без Telegram: считает вызовы и имитирует задержку API
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls: Counter[str] = Counter()
+        self._message_ids = itertools.count(1_000_000)
+        self._lock = threading.Lock()
+
+    def _record(self, method: str, chat_id: int) -> BotMessage:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls[method] += 1
+            message_id = next(self._message_ids)
+        return BotMessage(chat_id=chat_id, message_id=message_id)
+
+    def send(
+        self,
+        chat_id: int,
+        text: str,
+        parse_mode: ParseMode = ParseMode.HTML,
+        keyboard: Keyboard | None = None,
+        flow_name: str | None = None,
+    ) -> BotMessage:
+        return self._record("send", chat_id)
+
+    def send_markdown_as_html(
+        self,
+        chat_id: int,
+        text: str,
+        keyboard: Keyboard | None = None,
+        flow_name: str | None = None,
+    ) -> BotMessage:
+        return self._record("send", chat_id)
+
+    def send_document(self, chat_id: int, document: bytes, filename: str) -> BotMessage:
+        return self._record("send_document", chat_id)
+
+    def replace(
+        self,
+        chat_id: int,
+        message_id: int,
+        text: str,
+        parse_mode: ParseMode = ParseMode.HTML,
+        keyboard: Keyboard | None = None,
+        flow_name: str | None = None,
+    ) -> BotMessage:
+        return self._record("replace", chat_id)
+
+    def notify_replace(
+        self,
+        chat_id: int,
+        message_id: int,
+        text: str,
+        parse_mode: ParseMode = ParseMode.HTML,
+        keyboard: Keyboard | None = None,
+        flow_name: str | None = None,
+    ) -> BotMessage:
+        return self._record("replace", chat_id)
+
+    def delete(self, chat_id: int, message_id: int) -> None:
+        self._record("delete", chat_id)
+
+    @property
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(self.calls.values())
+
+
+class RecordingAsyncMessageService:
+    # IAsyncMessageService без Telegram: задержка API — asyncio.sleep на loop
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls: Counter[str] = Counter()
+        self._message_ids = itertools.count(1_000_000)
+
+    async def _record(self, method: str, chat_id: int) -> BotMessage:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.calls[method] += 1
+        return BotMessage(chat_id=chat_id, message_id=next(self._message_ids))
+
+    async def send(self, chat_id: int, text: str) -> BotMessage:
+        return await self._record("send", chat_id)
+
+    async def send_document(
+        self, chat_id: int, document: bytes, filename: str
+    ) -> BotMessage:
+        return await self._record("send_document", chat_id)
+
+    async def replace(self, chat_id: int, message_id: int, text: str) -> BotMessage:
+        return await self._record("replace", chat_id)
+
+    async def replace_progress(self, chat_id: int, message_id: int, text: str) -> None:
+        await self._record("replace", chat_id)
+
+    async def delete(self, chat_id: int, message_id: int) -> None:
+        await self._record("delete", chat_id)
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+
+class RecordingBot:
+    # Вместо TeleBot для инструментов: файлы никуда не уходят, только считаются
+    def __init__(self) -> None:
+        self.calls: Counter[str] = Counter()
+
+    def send_document(self, chat_id: int, document: Any, **kwargs: Any) -> Any:
+        self.calls["send_document"] += 1
+
+    def send_media_group(self, chat_id: int, media: Any, **kwargs: Any) -> Any:
+        self.calls["send_media_group"] += 1
+        return []
+
+
+class AdminRoleRepo:
+    def get_user_roles(self, user_id: int) -> list[Role]:
+        return [Role(id=1, name="admin")]
+
+
+def _filler(size: int) -> str:
+    return (FILLER * (size // len(FILLER) + 1))[:size]
@@ -0,0 +1,97 @@
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class _Waiter:
+    user_id: int
+    future: asyncio.Future[None]
+    on_position: Callable[[int], None] | None
+
+    def notify(self, position: int) -> None:
+        if self.on_position is None:
+            return
+        try:
+            self.on_position(position)
+        except Exception:
+            logger.exception("Queue position callback failed for user=%s", self.user_id)
+
+
+class AdmissionController:
+    # Ограничивает число одновременных ходов всех пользователей. Не потокобезопасен:
+    # вызывается только из event loop AgentClient.
+    # Очередь честная без весов: воркер пользователя ждёт не больше одного слота за раз,
+    # а после хода встаёт в конец, так что пользователи чередуются по кругу
+    def __init__(self, max_concurrent: int = 0) -> None:
+        self.max_concurrent = max_concurrent
+        self.active = 0
+        self._waiters: deque[_Waiter] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        user_id: int,
+        on_position: Callable[[int], None] | None = None,
+    ) -> AsyncIterator[None]:
+        await self._acquire(user_id, on_position)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(
+        self, user_id: int, on_position: Callable[[int], None] | None
+    ) -> None:
+        if not self.max_concurrent or (
+            self.active < self.max_concurrent and not self._waiters
+        ):
+            self.active += 1
+            return
+
+        waiter = _Waiter(
+            user_id=user_id,
+            future=asyncio.get_running_loop().create_future(),
+            on_position=on_position,
+        )
+        self._waiters.append(waiter)
+        logger.info(
+            "User=%s queued for a turn slot at position %d (%d running)",
+            user_id,
+            len(self._waiters),
+            self.active,
+        )
+        waiter.notify(len(self._waiters))
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Слот уже передан, а задачу отменили до того, как она проснулась
+                self._release()
+            else:
+                self._waiters.remove(waiter)
+                self._notify_positions()
+            raise
+        waiter.notify(0)
+
+    def _release(self) -> None:
+        self.active -= 1
+        while self._waiters and self.active < self.max_concurrent:
+            waiter = self._waiters.popleft()
+            # Слот передаётся ожидающему сразу, чтобы новичок не проскочил вперёд
+            self.active += 1
+            waiter.future.set_result(None)
+        self._notify_positions()
+
+    def _notify_positions(self) -> None:
+        for position, waiter in enumerate(self._waiters, start=1):
+            waiter.notify(position)
@@ -1,59 +1,88 @@
 import asyncio
+import importlib
+import sys
 import threading
-from dataclasses import dataclass
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future
+from dataclasses import dataclass, field, replace
+from functools import partial
+from datetime import UTC, datetime
 from logging import getLogger
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
+from uuid import uuid4
 
 import telebot
-from claude_agent_sdk import (
-    AssistantMessage,
-    ClaudeAgentOptions,
-    ClaudeSDKClient,
-    ResultMessage,
-    SystemMessage,
-    TextBlock,
-    ThinkingBlock,
-    ToolResultBlock,
-    ToolUseBlock,
-)
 
+from src.agent.admission import AdmissionController
+from src.agent.client_pool import ClientPool
+from src.agent.compaction_policy import COMPACT_COMMAND, CompactionPolicy
+from src.agent.events import (
+    AgentEvent,
+    AgentMergedEvent,
+    AgentQueuedEvent,
+    AgentTextEvent,
+    AgentToolEvent,
+)
+from src.agent.protocols.i_session_store import ISessionStore
+from src.agent.session_stats import SessionStats
 from src.agent.tools.registry import SessionRegistry
+from src.agent.turn_trace import TurnTrace
+from src.agent.usage import TurnUsage
+from src.agent.usage_recorder import UsageRecorder
+from src.logs.context import bind_user, turn_scope
+from src.logs.session_buffer import SessionLogBuffer
+from src.metrics import names
+from src.metrics.registry import MetricsRegistry
+from src.metrics.summary import format_latency_summary
+
+if TYPE_CHECKING:
+    # Импорт SDK тянет mcp и pydantic-модели (~1 с): в рантайме он откладывается
+    # до первого хода, а здесь нужен только для аннотаций
+    from claude_agent_sdk import (
+        ClaudeAgentOptions,
+        ClaudeSDKClient,
+        ResultMessage,
+        ToolResultBlock,
+    )
 
 logger = getLogger(__name__)
+# Шумные категории — отдельными логгерами, чтобы их можно было семплировать
+STDERR_LOGGER = f"{__name__}.stderr"
+THINKING_LOGGER = f"{__name__}.thinking"
+stderr_logger = getLogger(STDERR_LOGGER)
+thinking_logger = getLogger(THINKING_LOGGER)
+
+LATENCY_ROWS = [
+    ("Turn", names.TURN),
+    ("First block", names.FIRST_BLOCK),
+    ("Queue wait", names.QUEUE_WAIT),
+    ("Connect", names.CONNECT),
+    ("Compaction", names.COMPACTION),
+]
+
+SDK_MODULE = "claude_agent_sdk"
+
+# ResultMessage.subtype, когда CLI упёрся в max_turns
+MAX_TURNS_SUBTYPE = "error_max_turns"
+
+
+@dataclass
+class _PendingMessage:
+    chat_id: int
+    text: str
+    on_event: Callable[[AgentEvent], None] | None
+    future: asyncio.Future[str]
+    enqueued_at: float = field(default_factory=time.monotonic)
 
 
 @dataclass
-class SessionStats:
-    model: str = ""
-    session_id: str = ""
-    total_cost_usd: float = 0.0
-    total_turns: int = 0
-    total_messages: int = 0
-    input_tokens: int = 0
-    output_tokens: int = 0
-
-    def update_from_result(self, result: ResultMessage) -> None:
-        self.total_cost_usd += result.total_cost_usd or 0.0
-        self.total_turns += result.num_turns
-        self.total_messages += 1
-        if result.usage:
-            self.input_tokens += result.usage.get("input_tokens", 0)
-            self.output_tokens += result.usage.get("output_tokens", 0)
-
-    def update_from_init(self, data: dict[str, Any]) -> None:
-        self.model = data.get("model", "")
-        self.session_id = data.get("session_id", "")
-
-    def format(self) -> str:
-        lines = [
-            f"Model: {self.model}",
-            f"Messages: {self.total_messages}",
-            f"Turns: {self.total_turns}",
-            f"Tokens: {self.input_tokens} in / {self.output_tokens} out",
-            f"Cost: ${self.total_cost_usd:.4f}",
-        ]
-        return "\n".join(lines)
+class _RunningTurn:
+    client: "ClaudeSDKClient"
+    stop_reason: str | None = None
+    scope: asyncio.Timeout | None = None
 
 
 class AgentClient:
@@ -61,91 +90,602 @@ class AgentClient:
         self,
         session_registry: SessionRegistry,
         bot: telebot.TeleBot,
-        mcp_server: Any | None = None,
+        mcp_server_factory: Callable[[], Any] | None = None,
+        coalesce_window: float = 0.5,
+        max_batch_size: int = 10,
+        max_clients: int = 8,
+        idle_ttl: float = 1800.0,
+        warm_spare: bool = False,
+        session_store: ISessionStore | None = None,
+        metrics: MetricsRegistry | None = None,
+        slow_tool_threshold: float = 30.0,
+        trace_history: int = 20,
+        compaction: CompactionPolicy | None = None,
+        usage_recorder: UsageRecorder | None = None,
+        turn_timeout: float = 0.0,
+        max_turn_steps: int = 0,
+        interrupt_grace: float = 10.0,
+        max_concurrent_turns: int = 0,
+        log_buffer: SessionLogBuffer | None = None,
     ) -> None:
-        self._clients: dict[int, ClaudeSDKClient] = {}
+        self._pool = ClientPool(
+            factory=self._create_client,
+            max_clients=max_clients,
+            idle_ttl=idle_ttl,
+        )
         self._stats: dict[int, SessionStats] = {}
+        self._inboxes: dict[int, deque[_PendingMessage]] = {}
+        self._inbox_workers: dict[int, asyncio.Task[None]] = {}
         self._session_registry = session_registry
         self._bot = bot
-        self._mcp_server = mcp_server
+        self._mcp_server_factory = mcp_server_factory
+        self._coalesce_window = coalesce_window
+        self._max_batch_size = max_batch_size
+        self._warm_spare = warm_spare
+        self._session_store = session_store
+        self._metrics = metrics or MetricsRegistry()
+        self._slow_tool_threshold = slow_tool_threshold
+        self._traces: dict[int, deque[TurnTrace]] = {}
+        self._trace_history = trace_history
+        self._compaction = compaction or CompactionPolicy()
+        self._compaction_timers: dict[int, asyncio.TimerHandle] = {}
+        # После неудачного сжатия фоновое не повторяется до следующего хода:
+        # иначе контекст не уменьшается и таймер перезапускается бесконечно
+        self._compaction_failed: set[int] = set()
+        self._turn_timeout = turn_timeout
+        self._max_turn_steps = max_turn_steps
+        self._interrupt_grace = interrupt_grace
+        self._running: dict[int, _RunningTurn] = {}
+        self._admission = AdmissionController(max_concurrent_turns)
+        self._log_buffer = log_buffer
+        self._options_template: ClaudeAgentOptions | None = None
+        self._usage_recorder = usage_recorder
+        # Пользователи, чья сохранённая сессия удаляется прямо сейчас: не восстанавливать
+        self._forgetting: set[int] = set()
+        self._background_tasks: set[asyncio.Task[Any]] = set()
         self._loop = asyncio.new_event_loop()
         self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
         self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._reap_idle_clients(), self._loop)
+        if usage_recorder is not None:
+            asyncio.run_coroutine_threadsafe(usage_recorder.run(), self._loop)
+
+    def _build_options_template(self) -> "ClaudeAgentOptions":
+        from claude_agent_sdk import ClaudeAgentOptions
+
+        options = ClaudeAgentOptions(
+            cwd=str(Path.home()),
+            permission_mode="bypassPermissions",
+            system_prompt={"type": "preset", "preset": "claude_code"},
+            tools={"type": "preset", "preset": "claude_code"},
+            settings='{"enabledPlugins": {}}',
+            # user/project/local нужны чтобы SDK подхватывал skills из ~/.claude/
+            setting_sources=["user", "project", "local"],
+            stderr=lambda line: stderr_logger.debug("CLI stderr: %s", line),
+        )
+        if self._max_turn_steps:
+            # Бюджет шагов на один query считает сам CLI
+            options.max_turns = self._max_turn_steps
+        if self._mcp_server_factory is not None:
+            options.mcp_servers = {"bot-tools": self._mcp_server_factory()}
+            options.allowed_tools = ["mcp__bot-tools__*"]
+        return options
+
+    def _create_client(self, user_id: int) -> "ClaudeSDKClient":
+        from claude_agent_sdk import ClaudeSDKClient
 
-    def _get_or_create_client(self, user_id: int) -> ClaudeSDKClient:
-        if user_id not in self._clients:
-            options = ClaudeAgentOptions(
-                cwd=str(Path.home()),
-                permission_mode="bypassPermissions",
-                system_prompt={"type": "preset", "preset": "claude_code"},
-                tools={"type": "preset", "preset": "claude_code"},
-                settings='{"enabledPlugins": {}}',
-                # user/project/local нужны чтобы SDK подхватывал skills из ~/.claude/
-                setting_sources=["user", "project", "local"],
-                stderr=lambda line: logger.debug("CLI stderr: %s", line),
+        if self._options_template is None:
+            # Общие для всех пользователей опции собираются один раз, при первом клиенте
+            self._options_template = self._build_options_template()
+        options = self._options_template
+        # Статистика переживает вытеснение клиента из пула — продолжаем ту же сессию
+        stats = self._stats.get(user_id)
+        if stats and stats.session_id:
+            logger.info("Resuming session %s for user=%s", stats.session_id, user_id)
+            options = replace(options, resume=stats.session_id)
+        return ClaudeSDKClient(options)
+
+    async def _acquire_client(self, user_id: int) -> "ClaudeSDKClient":
+        if SDK_MODULE not in sys.modules:
+            # Первый импорт SDK идёт в потоке, чтобы не держать loop остальных ходов
+            started = time.monotonic()
+            await asyncio.to_thread(importlib.import_module, SDK_MODULE)
+            logger.info(
+                "Loaded Claude SDK in %.0fms", (time.monotonic() - started) * 1000
+            )
+        return await self._pool.acquire(user_id)
+
+    async def _reap_idle_clients(self) -> None:
+        interval = min(60.0, self._pool.idle_ttl)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._pool.evict_idle()
+            except Exception:
+                logger.exception("Idle SDK client reaper failed")
+
+    def prewarm(self, user_ids: Iterable[int]) -> None:
+        # Прогреваем не больше, чем вмещает пул, иначе прогрев вытеснит сам себя
+        user_ids = list(user_ids)[: self._pool.max_clients]
+        if user_ids:
+            asyncio.run_coroutine_threadsafe(self._prewarm(user_ids), self._loop)
+
+    async def _prewarm(self, user_ids: list[int]) -> None:
+        started = time.monotonic()
+        await asyncio.gather(*(self._warm_client(user_id) for user_id in user_ids))
+        logger.info(
+            "Warm-up finished: %d SDK clients in %.0fms",
+            len(user_ids),
+            (time.monotonic() - started) * 1000,
+        )
+
+    async def _warm_client(self, user_id: int) -> None:
+        bind_user(user_id)
+        await self._restore_stats(user_id)
+        client = await self._acquire_client(user_id)
+        try:
+            await self._connect(user_id, client)
+        except Exception:
+            logger.exception("SDK warm-up failed for user=%s", user_id)
+            await self._pool.discard(user_id)
+        finally:
+            self._pool.release(user_id)
+
+    async def _connect(self, user_id: int, client: "ClaudeSDKClient") -> None:
+        async with self._pool.connect_lock(user_id):
+            if client._transport is not None:
+                return
+            logger.info("Connecting SDK client for user=%s...", user_id)
+            started = time.monotonic()
+            # Reader-задача клиента создаётся внутри connect() и наследует этот контекст.
+            # Она переживает ход, поэтому метка хода ей не достаётся
+            self._session_registry.bind(user_id)
+            with turn_scope(None):
+                await client.connect()
+            elapsed = time.monotonic() - started
+            self._observe(names.CONNECT, elapsed, user_id)
+            logger.info(
+                "SDK client connected for user=%s in %.0fms", user_id, elapsed * 1000
             )
-            if self._mcp_server is not None:
-                options.mcp_servers = {"bot-tools": self._mcp_server}
-                options.allowed_tools = ["mcp__bot-tools__*"]
-            self._clients[user_id] = ClaudeSDKClient(options)
-        return self._clients[user_id]
+
+    async def _restore_stats(self, user_id: int) -> None:
+        if (
+            self._session_store is None
+            or user_id in self._stats
+            or user_id in self._forgetting
+        ):
+            return
+        try:
+            stats = await self._session_store.load(user_id)
+        except Exception:
+            logger.exception("Failed to load stored session for user=%s", user_id)
+            return
+        if stats is not None and user_id not in self._stats:
+            self._stats[user_id] = stats
+
+    async def _persist_stats(self, user_id: int, stats: SessionStats) -> None:
+        if self._session_store is None:
+            return
+        try:
+            await self._session_store.save(user_id, stats)
+        except Exception:
+            logger.exception("Failed to store session for user=%s", user_id)
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        # Корутины *_async выполняются только на этом loop
+        return self._loop
 
     def get_context(self, user_id: int) -> str:
+        return asyncio.run_coroutine_threadsafe(
+            self.get_context_async(user_id), self._loop
+        ).result()
+
+    async def get_context_async(self, user_id: int) -> str:
+        await self._restore_stats(user_id)
         stats = self._stats.get(user_id)
         if not stats:
             return "Нет активной сессии"
-        return stats.format()
+        latency = format_latency_summary(self._metrics, LATENCY_ROWS, user=str(user_id))
+        if not latency:
+            return stats.format()
+        return f"{stats.format()}\n\nLatency p50 / p95:\n{latency}"
+
+    def get_trace(self, user_id: int, turns: int = 5) -> str:
+        return asyncio.run_coroutine_threadsafe(
+            self.get_trace_async(user_id, turns), self._loop
+        ).result()
+
+    async def get_trace_async(self, user_id: int, turns: int = 5) -> str:
+        traces = list(self._traces.get(user_id, ()))[-turns:]
+        if not traces:
+            return "Нет записанных ходов"
+        return "\n\n".join(trace.format() for trace in traces)
+
+    def get_stats(self, user_id: int) -> str:
+        return asyncio.run_coroutine_threadsafe(
+            self.get_stats_async(user_id), self._loop
+        ).result()
+
+    async def get_stats_async(self, user_id: int) -> str:
+        recorder = self._usage_recorder
+        if recorder is None:
+            return "Статистика не ведётся"
+        # Сначала сбрасываем буфер, чтобы только что завершённый ход попал в сводку
+        await recorder.flush()
+        rollups = await recorder.store.load_rollups(user_id, datetime.now(UTC).date())
+        return rollups.format()
+
+    def interrupt(self, user_id: int) -> bool:
+        return asyncio.run_coroutine_threadsafe(
+            self.interrupt_async(user_id), self._loop
+        ).result()
+
+    async def interrupt_async(self, user_id: int) -> bool:
+        return await self._stop_turn(user_id, "команда /stop")
+
+    def _request_stop(self, user_id: int, reason: str) -> None:
+        task = self._loop.create_task(self._stop_turn(user_id, reason))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _stop_turn(self, user_id: int, reason: str) -> bool:
+        running = self._running.get(user_id)
+        if running is None:
+            return False
+        if running.stop_reason is not None:
+            return True
+        running.stop_reason = reason
+        logger.info("Interrupting turn for user=%s: %s", user_id, reason)
+        # Если CLI не закончит ход сам, чтение ответа оборвётся по этому сроку
+        if running.scope is not None:
+            running.scope.reschedule(self._loop.time() + self._interrupt_grace)
+        try:
+            await running.client.interrupt()
+        except Exception:
+            logger.exception("SDK interrupt failed for user=%s", user_id)
+        return True
 
     def reset_client(self, user_id: int) -> None:
-        future = asyncio.run_coroutine_threadsafe(
-            self._reset_client(user_id), self._loop
-        )
-        future.result()
+        # Не ждём disconnect: клиент убирается из словарей сразу при старте корутины,
+        # а задачи на loop выполняются в порядке постановки
+        asyncio.run_coroutine_threadsafe(self.reset_client_async(user_id), self._loop)
+
+    async def reset_client_async(self, user_id: int) -> None:
+        await self._reset_client(user_id)
 
-    def send_message(self, user_id: int, chat_id: int, text: str) -> str:
-        future = asyncio.run_coroutine_threadsafe(
-            self._send_message_async(user_id, chat_id, text), self._loop
+    def send_message(
+        self,
+        user_id: int,
+        chat_id: int,
+        text: str,
+        on_event: Callable[[AgentEvent], None] | None = None,
+    ) -> str:
+        return self.submit_message(user_id, chat_id, text, on_event).result()
+
+    def submit_message(
+        self,
+        user_id: int,
+        chat_id: int,
+        text: str,
+        on_event: Callable[[AgentEvent], None] | None = None,
+    ) -> Future[str]:
+        return asyncio.run_coroutine_threadsafe(
+            self.send_message_async(user_id, chat_id, text, on_event), self._loop
         )
-        return future.result()
 
-    async def _send_message_async(
-        self, user_id: int, chat_id: int, text: str
+    async def send_message_async(
+        self,
+        user_id: int,
+        chat_id: int,
+        text: str,
+        on_event: Callable[[AgentEvent], None] | None = None,
     ) -> str:
-        client = self._get_or_create_client(user_id)
+        self._cancel_idle_compaction(user_id)
+        pending = _PendingMessage(
+            chat_id=chat_id,
+            text=text,
+            on_event=on_event,
+            future=self._loop.create_future(),
+        )
+        self._inboxes.setdefault(user_id, deque()).append(pending)
+        if user_id not in self._inbox_workers:
+            self._inbox_workers[user_id] = self._loop.create_task(
+                self._drain_inbox(user_id)
+            )
+        return await pending.future
 
-        self._session_registry.set_context(user_id, chat_id, self._bot)
+    async def _drain_inbox(self, user_id: int, compact_first: bool = False) -> None:
+        # Один воркер на пользователя: ходы идут строго по очереди, а сообщения,
+        # пришедшие во время хода, склеиваются в один следующий query.
+        # Сжатие контекста тоже идёт через воркер, чтобы не пересекаться с ходом
+        inbox = self._inboxes.setdefault(user_id, deque())
+        bind_user(user_id)
+        try:
+            if compact_first:
+                async with self._admission.slot(user_id):
+                    await self._compact(user_id)
+            while inbox:
+                await self._debounce(inbox)
+                # Слот берётся до разбора пачки: пришедшее за время ожидания склеится
+                async with self._admission.slot(
+                    user_id, partial(_notify_queued, inbox)
+                ):
+                    await self._run_batch(user_id, inbox)
+            self._schedule_idle_compaction(user_id)
+        finally:
+            del self._inbox_workers[user_id]
+            if not inbox:
+                self._inboxes.pop(user_id, None)
 
-        if client._transport is None:
-            logger.info("Connecting SDK client for user=%s...", user_id)
+    async def _run_batch(self, user_id: int, inbox: deque[_PendingMessage]) -> None:
+        batch = self._take_batch(inbox)
+        leader = batch[-1]
+        now = time.monotonic()
+        for pending in batch:
+            self._observe(names.QUEUE_WAIT, now - pending.enqueued_at, user_id)
+        if len(batch) > 1:
+            logger.info("Coalesced %d messages for user=%s", len(batch), user_id)
+        for pending in batch[:-1]:
+            if pending.on_event:
+                pending.on_event(AgentMergedEvent())
+            _resolve(pending.future, "")
+        text = "\n\n".join(pending.text for pending in batch)
+        self._compaction_failed.discard(user_id)
+        await self._restore_stats(user_id)
+        stats = self._stats.get(user_id)
+        if stats and self._compaction.requires_compaction(stats):
+            await self._compact(user_id)
+        try:
+            result = await self._run_turn(
+                user_id, leader.chat_id, text, leader.on_event
+            )
+        except Exception as e:
+            self._dump_session_log(user_id, e)
+            if not leader.future.done():
+                leader.future.set_exception(e)
+        else:
+            _resolve(leader.future, result)
+
+    def _dump_session_log(self, user_id: int, error: Exception) -> None:
+        if self._log_buffer is None:
+            return
+        records = self._log_buffer.dump(user_id)
+        logger.error(
+            "Turn failed for user=%s: %s. Last %d log records:\n%s",
+            user_id,
+            error,
+            len(records),
+            "\n".join(records),
+            extra={"session_dump": True},
+        )
+
+    async def _debounce(self, inbox: deque[_PendingMessage]) -> None:
+        seen = -1
+        while len(inbox) != seen and len(inbox) < self._max_batch_size:
+            seen = len(inbox)
+            await asyncio.sleep(self._coalesce_window)
+
+    def _take_batch(self, inbox: deque[_PendingMessage]) -> list[_PendingMessage]:
+        batch = [inbox.popleft()]
+        while (
+            inbox
+            and len(batch) < self._max_batch_size
+            and inbox[0].chat_id == batch[0].chat_id
+        ):
+            batch.append(inbox.popleft())
+        return batch
+
+    def _schedule_idle_compaction(self, user_id: int) -> None:
+        stats = self._stats.get(user_id)
+        if stats is None or not self._compaction.wants_idle_compaction(stats):
+            return
+        if user_id in self._compaction_failed:
+            return
+        self._cancel_idle_compaction(user_id)
+        self._compaction_timers[user_id] = self._loop.call_later(
+            self._compaction.idle_delay, self._start_idle_compaction, user_id
+        )
+
+    def _cancel_idle_compaction(self, user_id: int) -> None:
+        timer = self._compaction_timers.pop(user_id, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _start_idle_compaction(self, user_id: int) -> None:
+        self._compaction_timers.pop(user_id, None)
+        # Пока шёл таймер, пользователь мог написать: тогда ход сам решит, сжимать ли
+        if user_id in self._inbox_workers or user_id not in self._stats:
+            return
+        self._inbox_workers[user_id] = self._loop.create_task(
+            self._drain_inbox(user_id, compact_first=True)
+        )
+
+    async def _compact(self, user_id: int) -> None:
+        stats = self._stats.get(user_id)
+        if stats is None or not stats.session_id:
+            return
+        tokens_before = stats.last_turn_input_tokens
+        logger.info(
+            "Compacting context for user=%s (%d input tokens last turn)...",
+            user_id,
+            tokens_before,
+        )
+        from claude_agent_sdk import ResultMessage, SystemMessage
+
+        started = time.monotonic()
+        client = await self._acquire_client(user_id)
+        try:
+            await self._connect(user_id, client)
+            # /compact — встроенная команда CLI: история заменяется сводкой,
+            # а session_id остаётся прежним, так что resume продолжает тот же разговор
+            await client.query(COMPACT_COMMAND)
+            async for message in client.receive_response():
+                if isinstance(message, SystemMessage) and message.subtype == "init":
+                    stats.update_from_init(message.data)
+                elif isinstance(message, ResultMessage):
+                    self._record_usage(user_id, stats, message, compaction=True)
+                    if message.is_error:
+                        raise RuntimeError(f"Claude SDK error: {message.result}")
+                    stats.update_from_compaction(message)
+        except Exception:
+            # Ход пользователя всё равно выполнится, просто на большом контексте
+            logger.exception("Context compaction failed for user=%s", user_id)
+            self._compaction_failed.add(user_id)
+            return
+        finally:
+            self._pool.release(user_id)
+        elapsed = time.monotonic() - started
+        self._observe(names.COMPACTION, elapsed, user_id)
+        await self._persist_stats(user_id, stats)
+        logger.info(
+            "Context compacted for user=%s in %.1fs (%d input tokens before)",
+            user_id,
+            elapsed,
+            tokens_before,
+        )
+
+    async def _run_turn(
+        self,
+        user_id: int,
+        chat_id: int,
+        text: str,
+        on_event: Callable[[AgentEvent], None] | None,
+    ) -> str:
+        self._session_registry.set_context(user_id, chat_id, self._bot)
+        # Записи хода (вызовы инструментов, thinking, ошибки) помечаются его id
+        with turn_scope(uuid4().hex[:12]):
+            trace = TurnTrace()
+            self._traces.setdefault(user_id, deque(maxlen=self._trace_history)).append(
+                trace
+            )
+            await self._restore_stats(user_id)
+            client = await self._acquire_client(user_id)
             try:
-                await client.connect()
-            except Exception:
-                logger.exception("SDK connect failed for user=%s", user_id)
-                await self._reset_client(user_id)
-                raise
-            logger.info("SDK client connected for user=%s", user_id)
+                return await self._query_client(client, user_id, text, on_event, trace)
+            finally:
+                self._pool.release(user_id)
+                trace.finish()
+                if trace.duration is not None:
+                    self._observe(names.TURN, trace.duration, user_id)
+
+    async def _query_client(
+        self,
+        client: "ClaudeSDKClient",
+        user_id: int,
+        text: str,
+        on_event: Callable[[AgentEvent], None] | None,
+        trace: TurnTrace,
+    ) -> str:
+        try:
+            await self._connect(user_id, client)
+        except Exception:
+            logger.exception("SDK connect failed for user=%s", user_id)
+            await self._reset_client(user_id)
+            raise
 
         await client.query(text)
+        query_sent = time.monotonic()
 
-        stats = self._stats.setdefault(user_id, SessionStats())
+        running = _RunningTurn(client=client)
+        self._running[user_id] = running
+        watchdog = None
+        if self._turn_timeout:
+            watchdog = self._loop.call_later(
+                self._turn_timeout,
+                self._request_stop,
+                user_id,
+                f"лимит времени {self._turn_timeout:.0f} с",
+            )
         response_parts: list[str] = []
         result_text: str | None = None
+        try:
+            async with asyncio.timeout(None) as running.scope:
+                result_text = await self._receive_response(
+                    client,
+                    user_id,
+                    on_event,
+                    trace,
+                    running,
+                    response_parts,
+                    query_sent,
+                )
+        except TimeoutError:
+            # Таймаут включается только остановкой: CLI не ответил на interrupt вовремя
+            if running.stop_reason is None:
+                raise
+            logger.warning(
+                "Turn for user=%s ignored interrupt for %.0fs, dropping SDK client",
+                user_id,
+                self._interrupt_grace,
+            )
+            await self._pool.discard(user_id)
+        finally:
+            self._running.pop(user_id, None)
+            if watchdog is not None:
+                watchdog.cancel()
+
+        response = "\n".join(response_parts) if response_parts else result_text or ""
+        if running.stop_reason is None:
+            return response
+        stopped = f"⏹ Остановлено: {running.stop_reason}"
+        return f"{response}\n\n{stopped}" if response else stopped
+
+    async def _receive_response(
+        self,
+        client: "ClaudeSDKClient",
+        user_id: int,
+        on_event: Callable[[AgentEvent], None] | None,
+        trace: TurnTrace,
+        running: "_RunningTurn",
+        response_parts: list[str],
+        query_sent: float,
+    ) -> str | None:
+        from claude_agent_sdk import (
+            AssistantMessage,
+            ResultMessage,
+            SystemMessage,
+            TextBlock,
+            ThinkingBlock,
+            ToolResultBlock,
+            ToolUseBlock,
+            UserMessage,
+        )
+
+        stats = self._stats.setdefault(user_id, SessionStats())
+        result_text: str | None = None
         async for message in client.receive_response():
             if isinstance(message, AssistantMessage):
+                if trace.first_block is None:
+                    trace.mark_first_block()
+                    self._observe(
+                        names.FIRST_BLOCK, time.monotonic() - query_sent, user_id
+                    )
                 for block in message.content:
                     if isinstance(block, TextBlock):
                         response_parts.append(block.text)
+                        if on_event:
+                            on_event(AgentTextEvent(text=block.text))
                     elif isinstance(block, ThinkingBlock):
                         preview = block.thinking[:200]
-                        logger.info("Thinking: %s", preview)
+                        thinking_logger.info("Thinking: %s", preview)
                     elif isinstance(block, ToolUseBlock):
-                        logger.info("Tool call: %s", block.name)
+                        logger.info("Tool call: %s (%s)", block.name, block.id)
+                        trace.start_tool(block.id, block.name, block.input)
+                        if on_event:
+                            on_event(AgentToolEvent(name=block.name))
                     elif isinstance(block, ToolResultBlock):
-                        status = "error" if block.is_error else "ok"
-                        logger.info("Tool result: %s", status)
+                        self._finish_tool_call(user_id, trace, block)
+            elif isinstance(message, UserMessage):
+                # Результаты инструментов SDK присылает в UserMessage
+                if isinstance(message.content, list):
+                    for block in message.content:
+                        if isinstance(block, ToolResultBlock):
+                            self._finish_tool_call(user_id, trace, block)
             elif isinstance(message, SystemMessage):
                 if message.subtype == "init":
                     stats.update_from_init(message.data)
+                    await self._persist_stats(user_id, stats)
             elif isinstance(message, ResultMessage):
                 logger.info(
                     "Result: turns=%s, cost=$%.4f, duration=%dms",
@@ -154,20 +694,96 @@ class AgentClient:
                     message.duration_ms,
                 )
                 stats.update_from_result(message)
-                if message.is_error:
+                self._record_usage(user_id, stats, message)
+                await self._persist_stats(user_id, stats)
+                if message.subtype == MAX_TURNS_SUBTYPE and running.stop_reason is None:
+                    running.stop_reason = f"лимит шагов {self._max_turn_steps}"
+                if running.stop_reason is not None:
+                    # Прерванный ход — не ошибка сессии: отдаём то, что успели, и
+                    # продолжаем ту же сессию
+                    logger.info(
+                        "Turn for user=%s stopped: %s", user_id, running.stop_reason
+                    )
+                elif message.is_error:
                     await self._reset_client(user_id)
                     raise RuntimeError(f"Claude SDK error: {message.result}")
-                result_text = message.result
+                else:
+                    result_text = message.result
 
-        if response_parts:
-            return "\n".join(response_parts)
-        return result_text or ""
+        return result_text
+
+    def _finish_tool_call(
+        self,
+        user_id: int,
+        trace: TurnTrace,
+        block: "ToolResultBlock",
+    ) -> None:
+        status = "error" if block.is_error else "ok"
+        span = trace.finish_tool(block.tool_use_id, block.content, block.is_error)
+        if span is None or span.duration is None:
+            logger.info("Tool result: %s (%s)", status, block.tool_use_id)
+            return
+        logger.info(
+            "Tool result: %s %s in %.0fms, out=%dB",
+            span.name,
+            status,
+            span.duration * 1000,
+            span.output_size,
+        )
+        if span.duration >= self._slow_tool_threshold:
+            logger.warning(
+                "Slow tool %s for user=%s: %.1fs (threshold %.0fs), in=%dB",
+                span.name,
+                user_id,
+                span.duration,
+                self._slow_tool_threshold,
+                span.input_size,
+            )
+        self._observe(names.TOOL, span.duration, user_id, tool=span.name)
+
+    def _record_usage(
+        self,
+        user_id: int,
+        stats: SessionStats,
+        result: "ResultMessage",
+        compaction: bool = False,
+    ) -> None:
+        if self._usage_recorder is not None:
+            self._usage_recorder.record(
+                TurnUsage.from_result(user_id, stats.model, result, compaction)
+            )
+
+    def _observe(self, name: str, value: float, user_id: int, **labels: str) -> None:
+        stats = self._stats.get(user_id)
+        model = stats.model if stats and stats.model else "unknown"
+        self._metrics.observe(name, value, user=str(user_id), model=model, **labels)
 
     async def _reset_client(self, user_id: int) -> None:
-        if user_id in self._clients:
+        self._cancel_idle_compaction(user_id)
+        self._compaction_failed.discard(user_id)
+        self._stats.pop(user_id, None)
+        if self._session_store is not None:
+            self._forgetting.add(user_id)
+        await self._pool.discard(user_id)
+        if self._session_store is not None:
             try:
-                await self._clients[user_id].disconnect()
+                await self._session_store.delete(user_id)
             except Exception:
-                logger.debug("Disconnect error (cross-task cancel scope)", exc_info=True)
-            del self._clients[user_id]
-        self._stats.pop(user_id, None)
+                logger.exception("Failed to forget stored session for user=%s", user_id)
+            finally:
+                self._forgetting.discard(user_id)
+        if self._warm_spare:
+            task = self._loop.create_task(self._warm_client(user_id))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+
+def _notify_queued(inbox: deque[_PendingMessage], position: int) -> None:
+    for pending in inbox:
+        if pending.on_event:
+            pending.on_event(AgentQueuedEvent(position=position))
+
+
+def _resolve(future: asyncio.Future[str], result: str) -> None:
+    if not future.done():
+        future.set_result(result)
@@ -0,0 +1,102 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from claude_agent_sdk import ClaudeSDKClient
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class _PooledClient:
+    client: "ClaudeSDKClient"
+    last_used: float = field(default_factory=time.monotonic)
+    # Клиент могут одновременно держать ход и фоновый прогрев
+    leases: int = 0
+    connect_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class ClientPool:
+    # Не потокобезопасен: все методы вызываются только из event loop AgentClient
+    def __init__(
+        self,
+        factory: Callable[[int], "ClaudeSDKClient"],
+        max_clients: int,
+        idle_ttl: float,
+    ) -> None:
+        self._factory = factory
+        self.max_clients = max_clients
+        self.idle_ttl = idle_ttl
+        self._entries: OrderedDict[int, _PooledClient] = OrderedDict()
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def acquire(self, user_id: int) -> "ClaudeSDKClient":
+        entry = self._entries.get(user_id)
+        if entry is None:
+            await self._make_room()
+            entry = _PooledClient(client=self._factory(user_id))
+            self._entries[user_id] = entry
+        self._entries.move_to_end(user_id)
+        entry.leases += 1
+        return entry.client
+
+    def release(self, user_id: int) -> None:
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            entry.leases = max(0, entry.leases - 1)
+            entry.last_used = time.monotonic()
+
+    def connect_lock(self, user_id: int) -> asyncio.Lock:
+        return self._entries[user_id].connect_lock
+
+    async def discard(self, user_id: int) -> None:
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            await disconnect_quietly(entry.client)
+
+    async def evict_idle(self) -> None:
+        deadline = time.monotonic() - self.idle_ttl
+        expired = [
+            user_id
+            for user_id, entry in self._entries.items()
+            if not entry.leases and entry.last_used < deadline
+        ]
+        for user_id in expired:
+            logger.info("Evicting idle SDK client for user=%s", user_id)
+            await self.discard(user_id)
+
+    async def _make_room(self) -> None:
+        while len(self._entries) >= self.max_clients:
+            victim = next(
+                (
+                    user_id
+                    for user_id, entry in self._entries.items()
+                    if not entry.leases
+                ),
+                None,
+            )
+            if victim is None:
+                logger.warning(
+                    "All %d SDK clients are busy, exceeding the pool limit",
+                    len(self._entries),
+                )
+                return
+            logger.info("Evicting least recently used SDK client for user=%s", victim)
+            await self.discard(victim)
+
+
+async def disconnect_quietly(client: "ClaudeSDKClient") -> None:
+    try:
+        await client.disconnect()
+    except Exception:
+        logger.debug("Disconnect error (cross-task cancel scope)", exc_info=True)
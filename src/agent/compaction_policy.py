@@ -0,0 +1,21 @@
+from dataclasses import dataclass
+
+from src.agent.session_stats import SessionStats
+
+COMPACT_COMMAND = "/compact"
+
+
+@dataclass(frozen=True)
+class CompactionPolicy:
+    # Пороги в токенах входа последнего хода; 0 выключает порог
+    idle_threshold: int = 0
+    hard_threshold: int = 0
+    idle_delay: float = 300.0
+
+    def wants_idle_compaction(self, stats: SessionStats) -> bool:
+        # Сжать в фоне, когда пользователь замолчит на idle_delay секунд
+        return 0 < self.idle_threshold <= stats.last_turn_input_tokens
+
+    def requires_compaction(self, stats: SessionStats) -> bool:
+        # Контекст настолько большой, что сжимаем перед следующим ходом, не дожидаясь паузы
+        return 0 < self.hard_threshold <= stats.last_turn_input_tokens
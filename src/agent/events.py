@@ -0,0 +1,25 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class AgentTextEvent:
+    text: str
+
+
+@dataclass
+class AgentToolEvent:
+    name: str
+
+
+@dataclass
+class AgentMergedEvent:
+    pass
+
+
+@dataclass
+class AgentQueuedEvent:
+    # Позиция в очереди на ход; 0 — ход начался
+    position: int
+
+
+AgentEvent = AgentTextEvent | AgentToolEvent | AgentMergedEvent | AgentQueuedEvent
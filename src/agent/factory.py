@@ -0,0 +1,101 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import telebot
+
+from src.agent.client import AgentClient
+from src.agent.compaction_policy import CompactionPolicy
+from src.agent.repos.redis_file_id_cache import RedisFileIdCache
+from src.agent.repos.redis_session_store import RedisSessionStore
+from src.agent.repos.redis_usage_store import RedisUsageStore
+from src.agent.tools.registry import SessionRegistry
+from src.agent.usage_recorder import UsageRecorder
+from src.logs.session_buffer import SessionLogBuffer
+from src.metrics.registry import MetricsRegistry
+from src.telegram.protocols.i_rate_limiter import IRateLimiter
+
+
+@dataclass
+class AgentConfig:
+    redis_url: str
+    coalesce_window: float = 0.5
+    max_batch_size: int = 10
+    max_clients: int = 8
+    idle_ttl: float = 1800.0
+    warm_spare: bool = False
+    max_concurrent_uploads: int = 4
+    metrics_port: int = 0
+    slow_tool_threshold: float = 30.0
+    compact_idle_tokens: int = 100_000
+    compact_hard_tokens: int = 150_000
+    compact_idle_delay: float = 300.0
+    usage_flush_interval: float = 1.0
+    turn_timeout: float = 1800.0
+    max_turn_steps: int = 100
+    interrupt_grace: float = 10.0
+    max_concurrent_turns: int = 4
+
+
+def create_agent_client(
+    config: AgentConfig,
+    bot: telebot.TeleBot,
+    rate_limiter: IRateLimiter | None = None,
+    metrics: MetricsRegistry | None = None,
+    log_buffer: SessionLogBuffer | None = None,
+) -> AgentClient:
+    session_registry = SessionRegistry()
+    return AgentClient(
+        session_registry=session_registry,
+        bot=bot,
+        mcp_server_factory=_mcp_server_factory(
+            config, session_registry, rate_limiter=rate_limiter
+        ),
+        coalesce_window=config.coalesce_window,
+        max_batch_size=config.max_batch_size,
+        max_clients=config.max_clients,
+        idle_ttl=config.idle_ttl,
+        warm_spare=config.warm_spare,
+        session_store=RedisSessionStore(redis_url=config.redis_url),
+        metrics=metrics,
+        slow_tool_threshold=config.slow_tool_threshold,
+        compaction=CompactionPolicy(
+            idle_threshold=config.compact_idle_tokens,
+            hard_threshold=config.compact_hard_tokens,
+            idle_delay=config.compact_idle_delay,
+        ),
+        turn_timeout=config.turn_timeout,
+        max_turn_steps=config.max_turn_steps,
+        interrupt_grace=config.interrupt_grace,
+        max_concurrent_turns=config.max_concurrent_turns,
+        log_buffer=log_buffer,
+        usage_recorder=UsageRecorder(
+            RedisUsageStore(redis_url=config.redis_url),
+            flush_interval=config.usage_flush_interval,
+        ),
+    )
+
+
+def _mcp_server_factory(
+    config: AgentConfig,
+    session_registry: SessionRegistry,
+    rate_limiter: IRateLimiter | None,
+) -> Callable[[], Any]:
+    def create() -> Any:
+        # Инструменты объявлены декоратором SDK, поэтому модуль с ними
+        # импортируется вместе с SDK — при первом клиенте, а не на старте бота
+        from claude_agent_sdk import create_sdk_mcp_server
+
+        from src.agent.tools.send_file import init_send_file, send_file, send_files
+
+        init_send_file(
+            session_registry,
+            file_id_cache=RedisFileIdCache(redis_url=config.redis_url),
+            max_concurrent_uploads=config.max_concurrent_uploads,
+            rate_limiter=rate_limiter,
+        )
+        return create_sdk_mcp_server(
+            name="bot-tools", version="1.0.0", tools=[send_file, send_files]
+        )
+
+    return create
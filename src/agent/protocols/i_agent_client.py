@@ -1,9 +1,35 @@
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future
 from typing import Protocol
 
+from src.agent.events import AgentEvent
+
 
 class IAgentClient(Protocol):
-    def send_message(self, user_id: int, chat_id: int, text: str) -> str: ...
+    def send_message(
+        self,
+        user_id: int,
+        chat_id: int,
+        text: str,
+        on_event: Callable[[AgentEvent], None] | None = None,
+    ) -> str: ...
+
+    def submit_message(
+        self,
+        user_id: int,
+        chat_id: int,
+        text: str,
+        on_event: Callable[[AgentEvent], None] | None = None,
+    ) -> Future[str]: ...
 
     def get_context(self, user_id: int) -> str: ...
 
+    def get_trace(self, user_id: int, turns: int = 5) -> str: ...
+
+    def get_stats(self, user_id: int) -> str: ...
+
+    def interrupt(self, user_id: int) -> bool: ...
+
     def reset_client(self, user_id: int) -> None: ...
+
+    def prewarm(self, user_ids: Iterable[int]) -> None: ...
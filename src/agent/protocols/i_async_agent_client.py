@@ -0,0 +1,30 @@
+import asyncio
+from collections.abc import Callable
+from typing import Protocol
+
+from src.agent.events import AgentEvent
+
+
+class IAsyncAgentClient(Protocol):
+    # Корутины вызываются только на loop клиента: обработчики и Telegram-клиент
+    # асинхронного режима работают на нём же, без переходов между потоками
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop: ...
+
+    async def send_message_async(
+        self,
+        user_id: int,
+        chat_id: int,
+        text: str,
+        on_event: Callable[[AgentEvent], None] | None = None,
+    ) -> str: ...
+
+    async def get_context_async(self, user_id: int) -> str: ...
+
+    async def get_trace_async(self, user_id: int, turns: int = 5) -> str: ...
+
+    async def get_stats_async(self, user_id: int) -> str: ...
+
+    async def interrupt_async(self, user_id: int) -> bool: ...
+
+    async def reset_client_async(self, user_id: int) -> None: ...
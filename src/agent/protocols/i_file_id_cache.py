@@ -0,0 +1,7 @@
+from typing import Protocol
+
+
+class IFileIdCache(Protocol):
+    async def get(self, key: str) -> str | None: ...
+
+    async def set(self, key: str, file_id: str) -> None: ...
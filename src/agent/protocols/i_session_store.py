@@ -0,0 +1,11 @@
+from typing import Protocol
+
+from src.agent.session_stats import SessionStats
+
+
+class ISessionStore(Protocol):
+    async def load(self, user_id: int) -> SessionStats | None: ...
+
+    async def save(self, user_id: int, stats: SessionStats) -> None: ...
+
+    async def delete(self, user_id: int) -> None: ...
@@ -0,0 +1,10 @@
+from datetime import date
+from typing import Protocol
+
+from src.agent.usage import TurnUsage, UsageRollups
+
+
+class IUsageStore(Protocol):
+    async def record(self, usages: list[TurnUsage]) -> None: ...
+
+    async def load_rollups(self, user_id: int, today: date) -> UsageRollups: ...
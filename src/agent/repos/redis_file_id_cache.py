@@ -0,0 +1,18 @@
+import redis.asyncio as redis
+
+
+class RedisFileIdCache:
+    def __init__(self, redis_url: str) -> None:
+        self.redis_client = redis.from_url(redis_url)  # pyright: ignore[reportUnknownMemberType]
+
+    def _get_key(self, key: str) -> str:
+        return f"telegram_file_ids:{key}"
+
+    async def get(self, key: str) -> str | None:
+        raw = await self.redis_client.get(self._get_key(key))
+        if raw is None:
+            return None
+        return raw.decode() if isinstance(raw, bytes) else str(raw)
+
+    async def set(self, key: str, file_id: str) -> None:
+        await self.redis_client.set(self._get_key(key), file_id)
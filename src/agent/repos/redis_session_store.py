@@ -0,0 +1,25 @@
+import json
+
+import redis.asyncio as redis
+
+from src.agent.session_stats import SessionStats
+
+
+class RedisSessionStore:
+    def __init__(self, redis_url: str) -> None:
+        self.redis_client = redis.from_url(redis_url)  # pyright: ignore[reportUnknownMemberType]
+
+    def _get_key(self, user_id: int) -> str:
+        return f"agent_sessions:{user_id}"
+
+    async def load(self, user_id: int) -> SessionStats | None:
+        raw = await self.redis_client.get(self._get_key(user_id))
+        if raw is None:
+            return None
+        return SessionStats.from_dict(json.loads(raw))
+
+    async def save(self, user_id: int, stats: SessionStats) -> None:
+        await self.redis_client.set(self._get_key(user_id), json.dumps(stats.to_dict()))
+
+    async def delete(self, user_id: int) -> None:
+        await self.redis_client.delete(self._get_key(user_id))
@@ -0,0 +1,86 @@
+from datetime import date, timedelta
+
+import redis.asyncio as redis
+
+from src.agent.usage import TurnUsage, UsageRollups, UsageTotals
+
+# Сколько дней хранить дневные агрегаты и сколько сырых строк — в потоке пользователя
+DAY_TTL = timedelta(days=400)
+RAW_MAXLEN = 10_000
+LAST_DAYS = 7
+
+
+class RedisUsageStore:
+    # Каждый ход пишется сырой строкой в stream и сразу прибавляется к агрегатам
+    # (всего, за день, по модели), поэтому /stats читает готовые хеши, а не строки
+    def __init__(self, redis_url: str) -> None:
+        self.redis_client = redis.from_url(redis_url)  # pyright: ignore[reportUnknownMemberType]
+
+    def _get_key(self, user_id: int, *parts: str) -> str:
+        return ":".join(["agent_usage", str(user_id), *parts])
+
+    async def record(self, usages: list[TurnUsage]) -> None:
+        pipe = self.redis_client.pipeline(transaction=False)
+        for usage in usages:
+            day_key = self._get_key(usage.user_id, "day", usage.day.isoformat())
+            for key in (
+                self._get_key(usage.user_id, "total"),
+                day_key,
+                self._get_key(usage.user_id, "model", usage.model),
+            ):
+                pipe.hincrbyfloat(key, "cost_usd", usage.cost_usd)
+                pipe.hincrby(key, "messages", usage.messages)
+                pipe.hincrby(key, "turns", usage.turns)
+                pipe.hincrby(key, "input_tokens", usage.input_tokens)
+                pipe.hincrby(key, "output_tokens", usage.output_tokens)
+                pipe.hincrby(key, "compactions", usage.compactions)
+            pipe.expire(day_key, DAY_TTL)
+            pipe.sadd(self._get_key(usage.user_id, "models"), usage.model)
+            pipe.xadd(
+                self._get_key(usage.user_id, "turns"),
+                {
+                    "at": usage.recorded_at.isoformat(),
+                    "model": usage.model,
+                    "cost_usd": usage.cost_usd,
+                    "input_tokens": usage.input_tokens,
+                    "output_tokens": usage.output_tokens,
+                    "turns": usage.turns,
+                    "compaction": usage.compactions,
+                },
+                maxlen=RAW_MAXLEN,
+                approximate=True,
+            )
+        await pipe.execute()
+
+    async def load_rollups(self, user_id: int, today: date) -> UsageRollups:
+        days = [today - timedelta(days=offset) for offset in range(LAST_DAYS)]
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.hgetall(self._get_key(user_id, "total"))
+        for day in days:
+            pipe.hgetall(self._get_key(user_id, "day", day.isoformat()))
+        pipe.smembers(self._get_key(user_id, "models"))
+        total_raw, *day_raws, model_raws = await pipe.execute()
+
+        models = sorted(
+            model.decode() if isinstance(model, bytes) else str(model)
+            for model in model_raws
+        )
+        pipe = self.redis_client.pipeline(transaction=False)
+        for model in models:
+            pipe.hgetall(self._get_key(user_id, "model", model))
+        model_totals = await pipe.execute() if models else []
+
+        day_totals = [UsageTotals.from_hash(raw) for raw in day_raws]
+        last_days = UsageTotals()
+        for totals in day_totals:
+            last_days += totals
+        return UsageRollups(
+            total=UsageTotals.from_hash(total_raw),
+            today=day_totals[0],
+            last_days=last_days,
+            days=LAST_DAYS,
+            models={
+                model: UsageTotals.from_hash(raw)
+                for model, raw in zip(models, model_totals, strict=True)
+            },
+        )
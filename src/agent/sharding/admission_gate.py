@@ -0,0 +1,100 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class _Queued:
+    dispatch: Callable[[], None]
+    on_position: Callable[[int], None] | None
+
+
+class AdmissionGate:
+    # Общий лимит одновременных ходов для всех воркеров: сообщение уходит в шард,
+    # только когда у пользователя есть слот. Слот держится, пока воркер не ответит
+    # на все отправленные сообщения пользователя, — его ходы и склейка остаются
+    # в воркере. Очередь честная: ждущий пользователь занимает одно место, и все
+    # его сообщения отправляются вместе, когда до него доходит очередь
+    def __init__(self, max_concurrent: int = 0) -> None:
+        self.max_concurrent = max_concurrent
+        # user_id → число отправленных в шард сообщений без ответа
+        self._active: dict[int, int] = {}
+        self._waiting: OrderedDict[int, list[_Queued]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> int:
+        with self._lock:
+            return len(self._active)
+
+    @property
+    def queued(self) -> int:
+        with self._lock:
+            return len(self._waiting)
+
+    def submit(
+        self,
+        user_id: int,
+        dispatch: Callable[[], None],
+        on_position: Callable[[int], None] | None = None,
+    ) -> None:
+        with self._lock:
+            if (
+                not self.max_concurrent
+                or user_id in self._active
+                or (len(self._active) < self.max_concurrent and not self._waiting)
+            ):
+                self._active[user_id] = self._active.get(user_id, 0) + 1
+                # Отправка под замком: следующее сообщение пользователя не обгонит его
+                dispatch()
+                return
+            self._waiting.setdefault(user_id, []).append(
+                _Queued(dispatch=dispatch, on_position=on_position)
+            )
+            position = list(self._waiting).index(user_id) + 1
+            logger.info(
+                "User=%s queued for a turn slot at position %d (%d running)",
+                user_id,
+                position,
+                len(self._active),
+            )
+        _notify(on_position, position)
+
+    def release(self, user_id: int) -> None:
+        admitted: list[_Queued] = []
+        with self._lock:
+            left = self._active.get(user_id, 0) - 1
+            if left > 0:
+                self._active[user_id] = left
+                return
+            self._active.pop(user_id, None)
+            while self._waiting and len(self._active) < self.max_concurrent:
+                next_user, queued = self._waiting.popitem(last=False)
+                self._active[next_user] = len(queued)
+                for item in queued:
+                    item.dispatch()
+                admitted.extend(queued)
+            waiting = [
+                (position, item)
+                for position, queued in enumerate(self._waiting.values(), start=1)
+                for item in queued
+            ]
+        if not admitted:
+            return
+        for item in admitted:
+            _notify(item.on_position, 0)
+        for position, item in waiting:
+            _notify(item.on_position, position)
+
+
+def _notify(on_position: Callable[[int], None] | None, position: int) -> None:
+    if on_position is None:
+        return
+    try:
+        on_position(position)
+    except Exception:
+        logger.exception("Queue position callback failed")
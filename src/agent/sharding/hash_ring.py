@@ -0,0 +1,26 @@
+import bisect
+import hashlib
+
+
+class HashRing:
+    # Виртуальные узлы сглаживают распределение; при смене числа шардов
+    # переезжает только ~1/N пользователей
+    def __init__(self, shards: int, replicas: int = 128) -> None:
+        if shards < 1:
+            raise ValueError("HashRing needs at least one shard")
+        points = sorted(
+            (_hash(f"{shard}:{replica}"), shard)
+            for shard in range(shards)
+            for replica in range(replicas)
+        )
+        self._keys = [key for key, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_for(self, user_id: int) -> int:
+        index = bisect.bisect(self._keys, _hash(str(user_id))) % len(self._keys)
+        return self._shards[index]
+
+
+def _hash(value: str) -> int:
+    digest = hashlib.blake2b(value.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+
+from src.agent.events import AgentEvent
+
+# Ответ на StopRequest — строка, как у остальных запросов; пустая — хода не было
+STOPPED = "stopped"
+
+
+@dataclass
+class SubmitRequest:
+    request_id: int
+    user_id: int
+    chat_id: int
+    text: str
+
+
+@dataclass
+class ContextRequest:
+    request_id: int
+    user_id: int
+
+
+@dataclass
+class TraceRequest:
+    request_id: int
+    user_id: int
+    turns: int
+
+
+@dataclass
+class StatsRequest:
+    request_id: int
+    user_id: int
+
+
+@dataclass
+class StopRequest:
+    request_id: int
+    user_id: int
+
+
+@dataclass
+class ResetRequest:
+    user_id: int
+
+
+@dataclass
+class PrewarmRequest:
+    user_ids: list[int]
+
+
+@dataclass
+class TokenGrant:
+    token_id: int
+
+
+@dataclass
+class EventResponse:
+    request_id: int
+    event: AgentEvent
+
+
+@dataclass
+class ResultResponse:
+    request_id: int
+    result: str = ""
+    error: str | None = None
+
+
+@dataclass
+class TokenRequest:
+    shard: int
+    token_id: int
+    chat_id: int
+
+
+@dataclass
+class BlockNotice:
+    chat_id: int
+    retry_after: float
+
+
+WorkerRequest = (
+    SubmitRequest
+    | ContextRequest
+    | TraceRequest
+    | StatsRequest
+    | StopRequest
+    | ResetRequest
+    | PrewarmRequest
+    | TokenGrant
+)
+WorkerResponse = EventResponse | ResultResponse | TokenRequest | BlockNotice
@@ -0,0 +1,36 @@
+import itertools
+import threading
+from concurrent.futures import Future
+from multiprocessing.queues import Queue
+
+from src.agent.sharding.messages import BlockNotice, TokenRequest, WorkerResponse
+
+
+class RemoteRateLimiter:
+    # Разрешения на вызовы Telegram выдаёт планировщик родительского процесса,
+    # поэтому воркеры и бот расходуют один общий лимит
+    def __init__(self, shard: int, responses: "Queue[WorkerResponse]") -> None:
+        self._shard = shard
+        self._responses = responses
+        self._pending: dict[int, Future[None]] = {}
+        self._lock = threading.Lock()
+        self._token_ids = itertools.count()
+
+    def acquire(self, chat_id: int) -> Future[None]:
+        future: Future[None] = Future()
+        with self._lock:
+            token_id = next(self._token_ids)
+            self._pending[token_id] = future
+        self._responses.put(
+            TokenRequest(shard=self._shard, token_id=token_id, chat_id=chat_id)
+        )
+        return future
+
+    def block(self, chat_id: int, retry_after: float) -> None:
+        self._responses.put(BlockNotice(chat_id=chat_id, retry_after=retry_after))
+
+    def grant(self, token_id: int) -> None:
+        with self._lock:
+            future = self._pending.pop(token_id, None)
+        if future is not None:
+            future.set_result(None)
@@ -0,0 +1,295 @@
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future
+from dataclasses import dataclass
+from functools import partial
+from logging import getLogger
+from multiprocessing.process import BaseProcess
+from multiprocessing.queues import Queue
+
+from src.agent.events import AgentEvent, AgentQueuedEvent
+from src.agent.sharding.admission_gate import AdmissionGate
+from src.agent.sharding.hash_ring import HashRing
+from src.agent.sharding.messages import (
+    BlockNotice,
+    ContextRequest,
+    EventResponse,
+    PrewarmRequest,
+    ResetRequest,
+    SubmitRequest,
+    STOPPED,
+    StatsRequest,
+    StopRequest,
+    TokenGrant,
+    TokenRequest,
+    TraceRequest,
+    WorkerRequest,
+    WorkerResponse,
+)
+from src.agent.sharding.worker import AgentWorkerConfig, run_agent_worker
+from src.telegram.protocols.i_rate_limiter import IRateLimiter
+
+logger = getLogger(__name__)
+
+HEALTH_CHECK_INTERVAL = 1.0
+
+
+@dataclass
+class _PendingRequest:
+    # None — сообщение ещё ждёт слота и в шард не отправлено
+    shard: int | None
+    future: Future[str]
+    on_event: Callable[[AgentEvent], None] | None = None
+    # Для сообщений: ответ воркера освобождает слот пользователя
+    user_id: int | None = None
+
+
+@dataclass
+class _Shard:
+    process: BaseProcess
+    requests: "Queue[WorkerRequest | None]"
+
+
+class ShardedAgentClient:
+    # Каждый user_id всегда попадает в один и тот же процесс-воркер со своим AgentClient,
+    # поэтому порядок ходов, пул клиентов и кэш статистики остаются локальными для шарда
+    def __init__(
+        self,
+        config: AgentWorkerConfig,
+        workers: int,
+        context_timeout: float = 10.0,
+        worker_target: Callable[..., None] = run_agent_worker,
+        rate_limiter: IRateLimiter | None = None,
+        max_concurrent_turns: int = 0,
+    ) -> None:
+        self._config = config
+        self._rate_limiter = rate_limiter
+        # Лимит ходов общий для всех воркеров, поэтому его держит родительский процесс
+        self._admission = AdmissionGate(max_concurrent_turns)
+        self._context_timeout = context_timeout
+        self._worker_target = worker_target
+        self._mp = multiprocessing.get_context("spawn")
+        self._ring = HashRing(workers)
+        self._responses: Queue[WorkerResponse] = self._mp.Queue()
+        self._pending: dict[int, _PendingRequest] = {}
+        self._lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._closed = False
+        self._shards = [self._start_shard(shard) for shard in range(workers)]
+        self._listener = threading.Thread(
+            target=self._listen, name="agent-shard-listener", daemon=True
+        )
+        self._listener.start()
+
+    def _start_shard(self, shard: int) -> _Shard:
+        requests: Queue[WorkerRequest | None] = self._mp.Queue()
+        process = self._mp.Process(
+            target=self._worker_target,
+            args=(shard, self._config, requests, self._responses),
+            name=f"agent-shard-{shard}",
+            daemon=True,
+        )
+        process.start()
+        logger.info("Started agent worker shard=%d pid=%s", shard, process.pid)
+        return _Shard(process=process, requests=requests)
+
+    def shard_for(self, user_id: int) -> int:
+        return self._ring.shard_for(user_id)
+
+    def send_message(
+        self,
+        user_id: int,
+        chat_id: int,
+        text: str,
+        on_event: Callable[[AgentEvent], None] | None = None,
+    ) -> str:
+        return self.submit_message(user_id, chat_id, text, on_event).result()
+
+    def submit_message(
+        self,
+        user_id: int,
+        chat_id: int,
+        text: str,
+        on_event: Callable[[AgentEvent], None] | None = None,
+    ) -> Future[str]:
+        shard = self.shard_for(user_id)
+        request_id, future = self._register(None, on_event, user_id)
+        request = SubmitRequest(
+            request_id=request_id, user_id=user_id, chat_id=chat_id, text=text
+        )
+
+        def on_position(position: int) -> None:
+            if on_event is not None:
+                on_event(AgentQueuedEvent(position=position))
+
+        self._admission.submit(
+            user_id, partial(self._dispatch_submit, shard, request), on_position
+        )
+        return future
+
+    def get_context(self, user_id: int) -> str:
+        shard = self.shard_for(user_id)
+        request_id, future = self._register(shard)
+        self._send(shard, ContextRequest(request_id=request_id, user_id=user_id))
+        return future.result(timeout=self._context_timeout)
+
+    def get_trace(self, user_id: int, turns: int = 5) -> str:
+        shard = self.shard_for(user_id)
+        request_id, future = self._register(shard)
+        self._send(
+            shard, TraceRequest(request_id=request_id, user_id=user_id, turns=turns)
+        )
+        return future.result(timeout=self._context_timeout)
+
+    def get_stats(self, user_id: int) -> str:
+        shard = self.shard_for(user_id)
+        request_id, future = self._register(shard)
+        self._send(shard, StatsRequest(request_id=request_id, user_id=user_id))
+        return future.result(timeout=self._context_timeout)
+
+    def interrupt(self, user_id: int) -> bool:
+        shard = self.shard_for(user_id)
+        request_id, future = self._register(shard)
+        self._send(shard, StopRequest(request_id=request_id, user_id=user_id))
+        return future.result(timeout=self._context_timeout) == STOPPED
+
+    def reset_client(self, user_id: int) -> None:
+        self._send(self.shard_for(user_id), ResetRequest(user_id=user_id))
+
+    def prewarm(self, user_ids: Iterable[int]) -> None:
+        by_shard: dict[int, list[int]] = {}
+        for user_id in user_ids:
+            by_shard.setdefault(self.shard_for(user_id), []).append(user_id)
+        for shard, shard_user_ids in by_shard.items():
+            self._send(shard, PrewarmRequest(user_ids=shard_user_ids))
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._closed = True
+        for shard in self._shards:
+            shard.requests.put(None)
+        for shard in self._shards:
+            shard.process.join(timeout)
+            if shard.process.is_alive():
+                shard.process.terminate()
+        self._listener.join(timeout)
+
+    def _register(
+        self,
+        shard: int | None,
+        on_event: Callable[[AgentEvent], None] | None = None,
+        user_id: int | None = None,
+    ) -> tuple[int, Future[str]]:
+        future: Future[str] = Future()
+        with self._lock:
+            request_id = next(self._request_ids)
+            self._pending[request_id] = _PendingRequest(
+                shard=shard, future=future, on_event=on_event, user_id=user_id
+            )
+        return request_id, future
+
+    def _dispatch_submit(self, shard: int, request: SubmitRequest) -> None:
+        with self._lock:
+            pending = self._pending.get(request.request_id)
+            if pending is not None:
+                pending.shard = shard
+        self._send(shard, request)
+
+    def _send(self, shard: int, request: WorkerRequest) -> None:
+        with self._lock:
+            requests = self._shards[shard].requests
+        requests.put(request)
+
+    def _listen(self) -> None:
+        last_check = time.monotonic()
+        while not self._closed:
+            try:
+                response = self._responses.get(timeout=HEALTH_CHECK_INTERVAL)
+            except queue.Empty:
+                pass
+            else:
+                self._dispatch(response)
+            if time.monotonic() - last_check >= HEALTH_CHECK_INTERVAL:
+                last_check = time.monotonic()
+                self._restart_dead_shards()
+
+    def _dispatch(self, response: WorkerResponse) -> None:
+        if isinstance(response, TokenRequest):
+            self._grant_token(response)
+            return
+        if isinstance(response, BlockNotice):
+            if self._rate_limiter is not None:
+                self._rate_limiter.block(response.chat_id, response.retry_after)
+            return
+        if isinstance(response, EventResponse):
+            with self._lock:
+                pending = self._pending.get(response.request_id)
+            if pending is not None and pending.on_event is not None:
+                try:
+                    pending.on_event(response.event)
+                except Exception:
+                    logger.exception("Agent event callback failed")
+            return
+
+        with self._lock:
+            pending = self._pending.pop(response.request_id, None)
+        if pending is None:
+            return
+        self._release_slot(pending)
+        if response.error is not None:
+            _settle(pending.future, error=RuntimeError(response.error))
+        else:
+            _settle(pending.future, result=response.result)
+
+    def _release_slot(self, pending: _PendingRequest) -> None:
+        if pending.user_id is not None:
+            self._admission.release(pending.user_id)
+
+    def _grant_token(self, request: TokenRequest) -> None:
+        # Разрешение уходит в очередь шарда, когда его выдаст общий планировщик;
+        # слушатель при этом не ждёт и продолжает разбирать ответы
+        grant = TokenGrant(token_id=request.token_id)
+        if self._rate_limiter is None:
+            self._send(request.shard, grant)
+            return
+        self._rate_limiter.acquire(request.chat_id).add_done_callback(
+            lambda _: self._send(request.shard, grant)
+        )
+
+    def _restart_dead_shards(self) -> None:
+        for shard, state in enumerate(self._shards):
+            if self._closed or state.process.is_alive():
+                continue
+            logger.error(
+                "Agent worker shard=%d exited with code %s, restarting",
+                shard,
+                state.process.exitcode,
+            )
+            with self._lock:
+                lost = [
+                    request_id
+                    for request_id, pending in self._pending.items()
+                    if pending.shard == shard
+                ]
+                failed = [self._pending.pop(request_id) for request_id in lost]
+                self._shards[shard] = self._start_shard(shard)
+            for pending in failed:
+                self._release_slot(pending)
+                _settle(
+                    pending.future,
+                    error=RuntimeError(f"Agent worker {shard} crashed"),
+                )
+
+
+def _settle(
+    future: Future[str], result: str = "", error: BaseException | None = None
+) -> None:
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
@@ -0,0 +1,140 @@
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from logging import getLogger
+from multiprocessing.queues import Queue
+from typing import Any
+
+import telebot
+
+from src.agent.client import AgentClient
+from src.agent.events import AgentEvent
+from src.agent.factory import AgentConfig, create_agent_client
+from src.agent.sharding.messages import (
+    ContextRequest,
+    EventResponse,
+    PrewarmRequest,
+    ResetRequest,
+    ResultResponse,
+    SubmitRequest,
+    STOPPED,
+    StatsRequest,
+    StopRequest,
+    TokenGrant,
+    TraceRequest,
+    WorkerRequest,
+    WorkerResponse,
+)
+from src.agent.sharding.remote_rate_limiter import RemoteRateLimiter
+from src.logs.pipeline import LoggingConfig, setup_logging
+from src.metrics.registry import MetricsRegistry
+from src.metrics.server import start_metrics_server
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class AgentWorkerConfig:
+    bot_token: str
+    agent: AgentConfig
+    logging: LoggingConfig = field(default_factory=LoggingConfig)
+
+
+def run_agent_worker(
+    shard: int,
+    config: AgentWorkerConfig,
+    requests: "Queue[WorkerRequest | None]",
+    responses: "Queue[WorkerResponse]",
+) -> None:
+    logging_pipeline = setup_logging(config.logging)
+    # Свой TeleBot на процесс: инструменты агента шлют файлы напрямую из воркера,
+    # но разрешения на вызовы берут у планировщика бота
+    bot = telebot.TeleBot(config.bot_token)
+    rate_limiter = RemoteRateLimiter(shard, responses)
+    metrics = MetricsRegistry()
+    if config.agent.metrics_port:
+        # Порт процесса бота + 1 + номер шарда
+        start_metrics_server(metrics, config.agent.metrics_port + 1 + shard)
+    agent_client = create_agent_client(
+        config.agent,
+        bot,
+        rate_limiter=rate_limiter,
+        metrics=metrics,
+        log_buffer=logging_pipeline.session_buffer,
+    )
+    logger.info("Agent worker shard=%d started", shard)
+
+    while (request := requests.get()) is not None:
+        if isinstance(request, TokenGrant):
+            rate_limiter.grant(request.token_id)
+            continue
+        try:
+            _handle_request(agent_client, request, responses)
+        except Exception:
+            logger.exception("Agent worker shard=%d failed to handle request", shard)
+    logger.info("Agent worker shard=%d stopped", shard)
+    logging_pipeline.stop()
+
+
+def _handle_request(
+    agent_client: AgentClient,
+    request: WorkerRequest,
+    responses: "Queue[WorkerResponse]",
+) -> None:
+    if isinstance(request, SubmitRequest):
+        request_id = request.request_id
+
+        def on_event(event: AgentEvent) -> None:
+            responses.put(EventResponse(request_id=request_id, event=event))
+
+        future = agent_client.submit_message(
+            request.user_id, request.chat_id, request.text, on_event=on_event
+        )
+        future.add_done_callback(
+            lambda done: responses.put(_to_result(request_id, done))
+        )
+    elif isinstance(request, ContextRequest):
+        _reply(responses, request.request_id, agent_client.get_context, request.user_id)
+    elif isinstance(request, TraceRequest):
+        _reply(
+            responses,
+            request.request_id,
+            agent_client.get_trace,
+            request.user_id,
+            request.turns,
+        )
+    elif isinstance(request, StatsRequest):
+        _reply(responses, request.request_id, agent_client.get_stats, request.user_id)
+    elif isinstance(request, StopRequest):
+        _reply(
+            responses,
+            request.request_id,
+            lambda user_id: STOPPED if agent_client.interrupt(user_id) else "",
+            request.user_id,
+        )
+    elif isinstance(request, ResetRequest):
+        agent_client.reset_client(request.user_id)
+    elif isinstance(request, PrewarmRequest):
+        agent_client.prewarm(request.user_ids)
+
+
+def _reply(
+    responses: "Queue[WorkerResponse]",
+    request_id: int,
+    func: Callable[..., str],
+    *args: Any,
+) -> None:
+    try:
+        result = func(*args)
+    except Exception as e:
+        responses.put(ResultResponse(request_id=request_id, error=str(e)))
+    else:
+        responses.put(ResultResponse(request_id=request_id, result=result))
+
+
+def _to_result(request_id: int, future: Future[str]) -> ResultResponse:
+    # Исключения SDK не всегда сериализуются pickle — передаём текст ошибки
+    try:
+        return ResultResponse(request_id=request_id, result=future.result())
+    except Exception as e:
+        return ResultResponse(request_id=request_id, error=str(e))
@@ -0,0 +1,20 @@
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(file_path: Path) -> str:
+    # Хеш пересчитывается только если у файла изменились размер или mtime
+    stat = file_path.stat()
+    return _digest(str(file_path.resolve()), stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=1024)
+def _digest(path: str, size: int, mtime_ns: int) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_CHUNK_SIZE):
+            sha256.update(chunk)
+    return f"{sha256.hexdigest()}:{size}"
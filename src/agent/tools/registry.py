@@ -1,3 +1,4 @@
+from contextvars import ContextVar
 from dataclasses import dataclass
 
 import telebot
@@ -12,16 +13,24 @@ class SessionContext:
 class SessionRegistry:
     def __init__(self) -> None:
         self._sessions: dict[int, SessionContext] = {}
-        self._current_user_id: int | None = None
+        # SDK обрабатывает вызовы tools в reader-задаче, созданной при connect(),
+        # поэтому она наследует user_id, привязанный в момент подключения клиента
+        self._current_user_id: ContextVar[int | None] = ContextVar(
+            "current_user_id", default=None
+        )
 
     def set_context(self, user_id: int, chat_id: int, bot: telebot.TeleBot) -> None:
         self._sessions[user_id] = SessionContext(chat_id=chat_id, bot=bot)
-        self._current_user_id = user_id
+        self.bind(user_id)
+
+    def bind(self, user_id: int) -> None:
+        self._current_user_id.set(user_id)
 
     def get_context(self, user_id: int) -> SessionContext:
         return self._sessions[user_id]
 
     def get_current_context(self) -> SessionContext:
-        if self._current_user_id is None:
+        user_id = self._current_user_id.get()
+        if user_id is None:
             raise ValueError("No active session context")
-        return self._sessions[self._current_user_id]
+        return self._sessions[user_id]
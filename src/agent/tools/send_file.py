@@ -1,16 +1,67 @@
+import asyncio
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from logging import getLogger
 from pathlib import Path
 from typing import Any
 
 from claude_agent_sdk import tool
+from telebot import TeleBot
+from telebot.apihelper import ApiTelegramException
+from telebot.types import (
+    InputFile,
+    InputMediaAudio,
+    InputMediaDocument,
+    InputMediaLivePhoto,
+    InputMediaPhoto,
+    InputMediaVideo,
+    Message,
+)
 
-from src.agent.tools.registry import SessionRegistry
+from src.agent.protocols.i_file_id_cache import IFileIdCache
+from src.agent.tools.file_digest import file_digest
+from src.agent.tools.registry import SessionContext, SessionRegistry
+from src.telegram.outbound_scheduler import TOO_MANY_REQUESTS, retry_after
+from src.telegram.protocols.i_rate_limiter import IRateLimiter
+
+logger = getLogger(__name__)
+
+MEDIA_GROUP_LIMIT = 10
+MAX_FLOOD_RETRIES = 5
+
+type MediaGroup = list[
+    InputMediaAudio
+    | InputMediaDocument
+    | InputMediaPhoto
+    | InputMediaVideo
+    | InputMediaLivePhoto
+]
 
 _registry: SessionRegistry | None = None
+_file_id_cache: IFileIdCache | None = None
+# Размер пула ограничивает число одновременных загрузок; event loop агента не блокируется
+_io_executor: ThreadPoolExecutor | None = None
+_rate_limiter: IRateLimiter | None = None
 
 
-def init_send_file(registry: SessionRegistry) -> None:
-    global _registry  # noqa: PLW0603
+def init_send_file(
+    registry: SessionRegistry,
+    file_id_cache: IFileIdCache | None = None,
+    max_concurrent_uploads: int = 4,
+    rate_limiter: IRateLimiter | None = None,
+) -> None:
+    global _registry, _file_id_cache, _io_executor, _rate_limiter  # noqa: PLW0603
     _registry = registry
+    _file_id_cache = file_id_cache
+    _rate_limiter = rate_limiter
+    if _io_executor is not None:
+        _io_executor.shutdown(wait=False)
+    _io_executor = ThreadPoolExecutor(
+        max_workers=max_concurrent_uploads, thread_name_prefix="telegram-upload"
+    )
 
 
 @tool("send_file", "Send a file to the user in Telegram", {"file_path": str})
@@ -26,11 +77,180 @@ async def send_file(args: dict[str, Any]) -> dict[str, Any]:
         }
 
     context = _registry.get_current_context()
-    with open(file_path, "rb") as f:
-        context.bot.send_document(context.chat_id, f)
+    await _send_document(context, file_path)
 
     return {
         "content": [
             {"type": "text", "text": f"File sent successfully: {file_path.name}"}
         ]
     }
+
+
+@tool(
+    "send_files",
+    "Send several files to the user in Telegram as albums of up to 10 documents",
+    {
+        "type": "object",
+        "properties": {
+            "file_paths": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["file_paths"],
+    },
+)
+async def send_files(args: dict[str, Any]) -> dict[str, Any]:
+    if _registry is None:
+        raise ValueError("send_file tool is not initialized, call init_send_file first")
+
+    file_paths = [Path(path) for path in args["file_paths"]]
+    missing = [str(path) for path in file_paths if not path.exists()]
+    if missing:
+        return {
+            "content": [
+                {"type": "text", "text": f"Files not found: {', '.join(missing)}"}
+            ],
+            "isError": True,
+        }
+
+    context = _registry.get_current_context()
+    for start in range(0, len(file_paths), MEDIA_GROUP_LIMIT):
+        batch = file_paths[start : start + MEDIA_GROUP_LIMIT]
+        if len(batch) == 1:
+            await _send_document(context, batch[0])
+        else:
+            await _send_media_group(context, batch)
+
+    names = ", ".join(path.name for path in file_paths)
+    return {"content": [{"type": "text", "text": f"Files sent successfully: {names}"}]}
+
+
+async def _send_document(context: SessionContext, file_path: Path) -> None:
+    key = await _run_blocking(_cache_key, file_path)
+    file_id = await _get_cached_file_id(key)
+    if file_id is not None:
+        try:
+            await _run_telegram(
+                context.chat_id, context.bot.send_document, context.chat_id, file_id
+            )
+            return
+        except Exception:
+            logger.warning("Cached file_id rejected, re-uploading %s", file_path)
+
+    msg = await _run_telegram(
+        context.chat_id, _upload_document, context.bot, context.chat_id, file_path
+    )
+    if msg.document is not None:
+        await _cache_file_id(key, msg.document.file_id)
+
+
+async def _send_media_group(context: SessionContext, file_paths: list[Path]) -> None:
+    keys = [await _run_blocking(_cache_key, path) for path in file_paths]
+    file_ids = [await _get_cached_file_id(key) for key in keys]
+    cached = [file_id for file_id in file_ids if file_id is not None]
+    if len(cached) == len(file_ids):
+        media: MediaGroup = [InputMediaDocument(file_id) for file_id in cached]
+        try:
+            await _run_telegram(
+                context.chat_id,
+                context.bot.send_media_group,
+                context.chat_id,
+                media,
+            )
+            return
+        except Exception:
+            logger.warning("Cached file_ids rejected, re-uploading media group")
+        file_ids = [None] * len(file_paths)
+
+    messages = await _run_telegram(
+        context.chat_id,
+        _upload_media_group,
+        context.bot,
+        context.chat_id,
+        file_paths,
+        file_ids,
+    )
+    for key, msg in zip(keys, messages, strict=False):
+        if msg.document is not None:
+            await _cache_file_id(key, msg.document.file_id)
+
+
+def _cache_key(file_path: Path) -> str:
+    # Telegram отдаёт документ по file_id под именем первой загрузки,
+    # поэтому тот же файл под другим именем загружается заново
+    return f"{file_digest(file_path)}:{file_path.name}"
+
+
+def _upload_document(bot: TeleBot, chat_id: int, file_path: Path) -> Message:
+    with open(file_path, "rb") as f:
+        return bot.send_document(chat_id, f)
+
+
+def _upload_media_group(
+    bot: TeleBot,
+    chat_id: int,
+    file_paths: list[Path],
+    file_ids: list[str | None],
+) -> list[Message]:
+    with ExitStack() as stack:
+        media: MediaGroup = [
+            InputMediaDocument(
+                file_id
+                or InputFile(stack.enter_context(open(path, "rb")), file_name=path.name)
+            )
+            for path, file_id in zip(file_paths, file_ids, strict=True)
+        ]
+        return bot.send_media_group(chat_id, media)
+
+
+async def _run_blocking[T](func: Callable[..., T], *args: Any) -> T:
+    return await asyncio.get_running_loop().run_in_executor(
+        _io_executor, partial(func, *args)
+    )
+
+
+async def _run_telegram[T](chat_id: int, func: Callable[..., T], *args: Any) -> T:
+    return await _run_blocking(_call_telegram, chat_id, partial(func, *args))
+
+
+def _call_telegram[T](chat_id: int, call: Callable[[], T]) -> T:
+    # Выполняется в пуле загрузок: его размер ограничивает число одновременных
+    # загрузок, а у лимитера (общего с ответами бота) берётся только разрешение
+    attempts = 0
+    while True:
+        if _rate_limiter is not None:
+            _rate_limiter.acquire(chat_id).result()
+        try:
+            return call()
+        except ApiTelegramException as e:
+            if e.error_code != TOO_MANY_REQUESTS or attempts >= MAX_FLOOD_RETRIES:
+                raise
+            attempts += 1
+            delay = retry_after(e)
+            logger.warning(
+                "Telegram flood limit for upload to chat=%s, retrying in %.1fs",
+                chat_id,
+                delay,
+            )
+            if _rate_limiter is not None:
+                # Следующее разрешение придёт не раньше, чем истечёт блокировка
+                _rate_limiter.block(chat_id, delay)
+            else:
+                time.sleep(delay)
+
+
+async def _get_cached_file_id(key: str) -> str | None:
+    if _file_id_cache is None:
+        return None
+    try:
+        return await _file_id_cache.get(key)
+    except Exception:
+        logger.exception("Failed to read file_id cache")
+        return None
+
+
+async def _cache_file_id(key: str, file_id: str) -> None:
+    if _file_id_cache is None:
+        return
+    try:
+        await _file_id_cache.set(key, file_id)
+    except Exception:
+        logger.exception("Failed to write file_id cache")
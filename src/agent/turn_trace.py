@@ -0,0 +1,101 @@
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+
+@dataclass
+class ToolSpan:
+    tool_use_id: str
+    name: str
+    # Смещения от начала хода, секунды
+    started: float
+    input_size: int
+    finished: float | None = None
+    output_size: int = 0
+    is_error: bool = False
+
+    @property
+    def duration(self) -> float | None:
+        if self.finished is None:
+            return None
+        return self.finished - self.started
+
+    def format(self) -> str:
+        line = f"  +{self.started:.2f}s {self.name}"
+        if self.duration is None:
+            return f"{line} — running, in={_format_size(self.input_size)}"
+        line = (
+            f"{line} {self.duration:.2f}s in={_format_size(self.input_size)} "
+            f"out={_format_size(self.output_size)}"
+        )
+        return f"{line} ERROR" if self.is_error else line
+
+
+@dataclass
+class TurnTrace:
+    started_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    spans: list[ToolSpan] = field(default_factory=list)
+    first_block: float | None = None
+    duration: float | None = None
+    _clock_start: float = field(default_factory=time.monotonic)
+    _open: dict[str, ToolSpan] = field(default_factory=dict)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._clock_start
+
+    def mark_first_block(self) -> float:
+        if self.first_block is None:
+            self.first_block = self.elapsed()
+        return self.first_block
+
+    def start_tool(self, tool_use_id: str, name: str, tool_input: Any) -> None:
+        span = ToolSpan(
+            tool_use_id=tool_use_id,
+            name=name,
+            started=self.elapsed(),
+            input_size=payload_size(tool_input),
+        )
+        self.spans.append(span)
+        self._open[tool_use_id] = span
+
+    def finish_tool(
+        self, tool_use_id: str, output: Any, is_error: bool | None
+    ) -> ToolSpan | None:
+        span = self._open.pop(tool_use_id, None)
+        if span is not None:
+            span.finished = self.elapsed()
+            span.output_size = payload_size(output)
+            span.is_error = bool(is_error)
+        return span
+
+    def finish(self) -> None:
+        self.duration = self.elapsed()
+
+    def format(self) -> str:
+        header = f"Turn {self.started_at:%H:%M:%S} UTC"
+        if self.duration is None:
+            header += f" — running {self.elapsed():.1f}s"
+        else:
+            header += f" — {self.duration:.1f}s"
+        header += f", {len(self.spans)} tools"
+        if self.first_block is not None:
+            header += f", first block +{self.first_block:.2f}s"
+        return "\n".join([header, *(span.format() for span in self.spans)])
+
+
+def payload_size(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value.encode())
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode())
+
+
+def _format_size(size: int) -> str:
+    if size < 1024:
+        return f"{size}B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f}KB"
+    return f"{size / 1024 / 1024:.1f}MB"
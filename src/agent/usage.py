@@ -0,0 +1,105 @@
+from dataclasses import dataclass, field, fields
+from datetime import UTC, date, datetime
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from claude_agent_sdk import ResultMessage
+
+
+@dataclass
+class TurnUsage:
+    user_id: int
+    model: str
+    cost_usd: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    turns: int = 0
+    messages: int = 0
+    compactions: int = 0
+    recorded_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+
+    @classmethod
+    def from_result(
+        cls,
+        user_id: int,
+        model: str,
+        result: "ResultMessage",
+        compaction: bool = False,
+    ) -> "TurnUsage":
+        usage = result.usage or {}
+        return cls(
+            user_id=user_id,
+            model=model or "unknown",
+            cost_usd=result.total_cost_usd or 0.0,
+            input_tokens=usage.get("input_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0),
+            turns=result.num_turns,
+            messages=0 if compaction else 1,
+            compactions=1 if compaction else 0,
+        )
+
+    @property
+    def day(self) -> date:
+        return self.recorded_at.date()
+
+
+@dataclass
+class UsageTotals:
+    cost_usd: float = 0.0
+    messages: int = 0
+    turns: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    compactions: int = 0
+
+    @classmethod
+    def from_hash(cls, raw: dict[bytes, bytes]) -> "UsageTotals":
+        totals = cls()
+        for f in fields(cls):
+            value = raw.get(f.name.encode())
+            if value is not None:
+                setattr(totals, f.name, float(value) if f.type is float else int(value))
+        return totals
+
+    def __add__(self, other: "UsageTotals") -> "UsageTotals":
+        return UsageTotals(
+            **{
+                f.name: getattr(self, f.name) + getattr(other, f.name)
+                for f in fields(self)
+            }
+        )
+
+    def format(self) -> str:
+        line = (
+            f"${self.cost_usd:.4f}, {self.messages} messages, {self.turns} turns, "
+            f"{self.input_tokens} in / {self.output_tokens} out"
+        )
+        if self.compactions:
+            line += f", {self.compactions} compactions"
+        return line
+
+
+@dataclass
+class UsageRollups:
+    total: UsageTotals
+    today: UsageTotals
+    last_days: UsageTotals
+    days: int
+    models: dict[str, UsageTotals]
+
+    def format(self) -> str:
+        if not self.total.messages and not self.total.compactions:
+            return "Нет статистики"
+        lines = [
+            f"Total: {self.total.format()}",
+            f"Today: {self.today.format()}",
+            f"Last {self.days} days: {self.last_days.format()}",
+        ]
+        if self.models:
+            lines.append("")
+            lines.append("By model:")
+            for model, totals in sorted(
+                self.models.items(), key=lambda item: -item[1].cost_usd
+            ):
+                lines.append(f"{model}: {totals.format()}")
+        return "\n".join(lines)
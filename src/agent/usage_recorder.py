@@ -0,0 +1,59 @@
+import asyncio
+from logging import getLogger
+
+from src.agent.protocols.i_usage_store import IUsageStore
+from src.agent.usage import TurnUsage
+
+logger = getLogger(__name__)
+
+
+class UsageRecorder:
+    # Write-behind буфер: ход только дописывает строку в список, а запись в хранилище
+    # идёт пачками из фоновой задачи на том же loop
+    def __init__(
+        self,
+        store: IUsageStore,
+        flush_interval: float = 1.0,
+        batch_size: int = 100,
+        max_buffer: int = 10_000,
+    ) -> None:
+        self.store = store
+        self.flush_interval = flush_interval
+        self._batch_size = batch_size
+        self._max_buffer = max_buffer
+        self._buffer: list[TurnUsage] = []
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+
+    def record(self, usage: TurnUsage) -> None:
+        if len(self._buffer) >= self._max_buffer:
+            # Хранилище долго недоступно: теряем самые старые строки, а не память
+            dropped = self._buffer.pop(0)
+            logger.warning(
+                "Usage buffer full, dropping record for user=%s", dropped.user_id
+            )
+        self._buffer.append(usage)
+        if len(self._buffer) >= self._batch_size:
+            self._wakeup.set()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            while self._buffer:
+                batch = self._buffer[: self._batch_size]
+                del self._buffer[: len(batch)]
+                try:
+                    await self.store.record(batch)
+                except Exception:
+                    logger.exception("Failed to store %d usage records", len(batch))
+                    # Вернём пачку в начало и попробуем на следующем тике
+                    self._buffer[:0] = batch
+                    return
@@ -0,0 +1,80 @@
+import time
+from logging import getLogger
+
+from src.agent.protocols.i_async_agent_client import IAsyncAgentClient
+from src.chat.actions.send_to_agent_action import REPLY_DOCUMENT_NAME
+from src.chat.services.async_throttled_message_editor import (
+    AsyncThrottledMessageEditor,
+)
+from src.metrics import names
+from src.metrics.registry import MetricsRegistry
+from src.telegram.protocols.i_async_message_service import IAsyncMessageService
+
+logger = getLogger(__name__)
+
+
+class AsyncSendToAgentAction:
+    # Тот же путь, что у SendToAgentAction, но ход и доставка ответа — корутины
+    # на loop агента: без пула доставки и без ожидания Future в потоке обработчика
+    def __init__(
+        self,
+        agent_client: IAsyncAgentClient,
+        message_service: IAsyncMessageService,
+        edit_interval: float = 1.0,
+        document_threshold: int = 16384,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        self.agent_client = agent_client
+        self.message_service = message_service
+        self.edit_interval = edit_interval
+        self.document_threshold = document_threshold
+        self.metrics = metrics
+
+    async def execute(
+        self,
+        chat_id: int,
+        user_id: int,
+        text: str,
+        thinking_message_id: int,
+    ) -> None:
+        editor = AsyncThrottledMessageEditor(
+            message_service=self.message_service,
+            chat_id=chat_id,
+            message_id=thinking_message_id,
+            interval=self.edit_interval,
+            document_threshold=self.document_threshold,
+        )
+        try:
+            response = await self.agent_client.send_message_async(
+                user_id, chat_id, text, on_event=editor.feed
+            )
+        except Exception as e:
+            editor.cancel()
+            logger.exception("Agent error")
+            await self.message_service.replace(
+                chat_id=chat_id,
+                message_id=thinking_message_id,
+                text=f"Ошибка: {e}",
+            )
+            return
+
+        started = time.monotonic()
+        if editor.merged:
+            await editor.finish("Объединено со следующим сообщением")
+        elif not response.strip():
+            await editor.finish("Пустой ответ от агента")
+        elif self.document_threshold and len(response) > self.document_threshold:
+            await editor.finish(
+                f"Ответ длинный ({len(response)} символов), отправлен файлом"
+            )
+            await self.message_service.send_document(
+                chat_id=chat_id,
+                document=response.encode(),
+                filename=REPLY_DOCUMENT_NAME,
+            )
+        else:
+            await editor.finish(response)
+        if self.metrics is not None:
+            self.metrics.observe(
+                names.DELIVERY, time.monotonic() - started, user=str(user_id)
+            )
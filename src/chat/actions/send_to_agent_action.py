@@ -1,17 +1,40 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from logging import getLogger
+
 from src.agent.protocols.i_agent_client import IAgentClient
-from bot_framework.protocols.i_message_service import IMessageService
+from src.chat.services.throttled_message_editor import ThrottledMessageEditor
+from src.metrics import names
+from src.metrics.registry import MetricsRegistry
+from src.telegram.protocols.i_outbound_message_service import (
+    IOutboundMessageService,
+)
+
+logger = getLogger(__name__)
 
-TELEGRAM_MESSAGE_LIMIT = 4096
+REPLY_DOCUMENT_NAME = "reply.md"
 
 
 class SendToAgentAction:
     def __init__(
         self,
         agent_client: IAgentClient,
-        message_service: IMessageService,
+        message_service: IOutboundMessageService,
+        edit_interval: float = 1.0,
+        delivery_workers: int = 4,
+        document_threshold: int = 16384,
+        metrics: MetricsRegistry | None = None,
     ) -> None:
         self.agent_client = agent_client
         self.message_service = message_service
+        self.edit_interval = edit_interval
+        # Ответ длиннее порога (символов) уходит одним файлом; 0 — всегда сообщениями
+        self.document_threshold = document_threshold
+        self.metrics = metrics
+        # Доставка ответа (вызовы Telegram API) не должна выполняться в event loop агента
+        self._delivery_executor = ThreadPoolExecutor(
+            max_workers=delivery_workers, thread_name_prefix="agent-delivery"
+        )
 
     def execute(
         self,
@@ -19,37 +42,77 @@ class SendToAgentAction:
         user_id: int,
         text: str,
         thinking_message_id: int,
-    ) -> None:
-        response = self.agent_client.send_message(user_id, chat_id, text)
-        if not response.strip():
-            response = "Пустой ответ от агента"
-        chunks = _split_message(response)
-
-        self.message_service.replace(
+    ) -> Future[None]:
+        editor = ThrottledMessageEditor(
+            message_service=self.message_service,
             chat_id=chat_id,
             message_id=thinking_message_id,
-            text=chunks[0],
+            interval=self.edit_interval,
+            document_threshold=self.document_threshold,
         )
+        delivered: Future[None] = Future()
+        response = self.agent_client.submit_message(
+            user_id, chat_id, text, on_event=editor.feed
+        )
+        response.add_done_callback(
+            lambda future: self._delivery_executor.submit(
+                self._deliver,
+                future,
+                editor,
+                chat_id,
+                user_id,
+                thinking_message_id,
+                delivered,
+            )
+        )
+        return delivered
 
-        for chunk in chunks[1:]:
-            self.message_service.send(chat_id=chat_id, text=chunk)
-
-
-def _split_message(text: str) -> list[str]:
-    if len(text) <= TELEGRAM_MESSAGE_LIMIT:
-        return [text]
-
-    chunks: list[str] = []
-    while text:
-        if len(text) <= TELEGRAM_MESSAGE_LIMIT:
-            chunks.append(text)
-            break
-
-        split_pos = text.rfind("\n", 0, TELEGRAM_MESSAGE_LIMIT)
-        if split_pos == -1:
-            split_pos = TELEGRAM_MESSAGE_LIMIT
-
-        chunks.append(text[:split_pos])
-        text = text[split_pos:].lstrip("\n")
+    def _deliver(
+        self,
+        response: Future[str],
+        editor: ThrottledMessageEditor,
+        chat_id: int,
+        user_id: int,
+        thinking_message_id: int,
+        delivered: Future[None],
+    ) -> None:
+        started = time.monotonic()
+        try:
+            try:
+                text = response.result()
+            except Exception as e:
+                editor.cancel()
+                logger.exception("Agent error")
+                self.message_service.replace(
+                    chat_id=chat_id,
+                    message_id=thinking_message_id,
+                    text=f"Ошибка: {e}",
+                )
+            else:
+                if editor.merged:
+                    editor.finish("Объединено со следующим сообщением")
+                elif not text.strip():
+                    editor.finish("Пустой ответ от агента")
+                elif self.document_threshold and len(text) > self.document_threshold:
+                    self._deliver_document(editor, chat_id, text)
+                else:
+                    editor.finish(text)
+        except Exception as e:
+            logger.exception("Failed to deliver agent response")
+            delivered.set_exception(e)
+        else:
+            if self.metrics is not None:
+                self.metrics.observe(
+                    names.DELIVERY, time.monotonic() - started, user=str(user_id)
+                )
+            delivered.set_result(None)
 
-    return chunks
+    def _deliver_document(
+        self, editor: ThrottledMessageEditor, chat_id: int, text: str
+    ) -> None:
+        editor.finish(f"Ответ длинный ({len(text)} символов), отправлен файлом")
+        self.message_service.send_document(
+            chat_id=chat_id,
+            document=text.encode(),
+            filename=REPLY_DOCUMENT_NAME,
+        )
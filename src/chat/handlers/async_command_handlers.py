@@ -0,0 +1,89 @@
+from logging import getLogger
+
+from telebot import types
+
+from src.agent.protocols.i_async_agent_client import IAsyncAgentClient
+from src.chat.handlers.trace_command_handler import parse_turns
+from src.chat.services.async_role_guard import AsyncRoleGuard
+from src.chat.services.message_splitter import iter_chunks
+from src.metrics import names
+from src.metrics.registry import MetricsRegistry
+from src.metrics.summary import format_latency_summary
+from src.telegram.protocols.i_async_message_service import IAsyncMessageService
+
+logger = getLogger(__name__)
+
+
+class AsyncCommandHandler:
+    # Общая часть асинхронных команд: проверка роли, ответ одним или
+    # несколькими сообщениями. Тексты ответов — как у синхронных обработчиков
+    allowed_roles: set[str] | None = {"admin"}
+
+    def __init__(
+        self,
+        agent_client: IAsyncAgentClient,
+        message_service: IAsyncMessageService,
+        role_guard: AsyncRoleGuard,
+    ) -> None:
+        self.agent_client = agent_client
+        self.message_service = message_service
+        self.role_guard = role_guard
+
+    async def handle(self, message: types.Message) -> None:
+        if not message.from_user:
+            raise ValueError("message.from_user is required but was None")
+        if not await self.role_guard.allows(message.from_user.id, self.allowed_roles):
+            logger.warning(
+                "User %s is not allowed to run %s", message.from_user.id, message.text
+            )
+            return
+
+        reply = await self.reply(message.from_user.id, message.text or "")
+        for chunk in iter_chunks(reply):
+            await self.message_service.send(chat_id=message.chat.id, text=chunk)
+
+    async def reply(self, user_id: int, text: str) -> str:
+        raise NotImplementedError
+
+
+class AsyncClearCommandHandler(AsyncCommandHandler):
+    async def reply(self, user_id: int, text: str) -> str:
+        await self.agent_client.reset_client_async(user_id)
+        return "Контекст очищен"
+
+
+class AsyncContextCommandHandler(AsyncCommandHandler):
+    def __init__(
+        self,
+        agent_client: IAsyncAgentClient,
+        message_service: IAsyncMessageService,
+        role_guard: AsyncRoleGuard,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        super().__init__(agent_client, message_service, role_guard)
+        self.metrics = metrics
+
+    async def reply(self, user_id: int, text: str) -> str:
+        context = await self.agent_client.get_context_async(user_id)
+        if self.metrics is None:
+            return context
+        delivery = format_latency_summary(
+            self.metrics, [("Delivery", names.DELIVERY)], user=str(user_id)
+        )
+        return f"{context}\n{delivery}" if delivery else context
+
+
+class AsyncTraceCommandHandler(AsyncCommandHandler):
+    async def reply(self, user_id: int, text: str) -> str:
+        return await self.agent_client.get_trace_async(user_id, parse_turns(text))
+
+
+class AsyncStopCommandHandler(AsyncCommandHandler):
+    async def reply(self, user_id: int, text: str) -> str:
+        stopped = await self.agent_client.interrupt_async(user_id)
+        return "Останавливаю..." if stopped else "Нет активного запроса"
+
+
+class AsyncStatsCommandHandler(AsyncCommandHandler):
+    async def reply(self, user_id: int, text: str) -> str:
+        return await self.agent_client.get_stats_async(user_id)
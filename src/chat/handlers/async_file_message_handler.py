@@ -0,0 +1,79 @@
+import asyncio
+from logging import getLogger
+
+from telebot import types
+
+from src.chat.actions.async_send_to_agent_action import AsyncSendToAgentAction
+from src.chat.handlers.file_message_handler import build_prompt, extract_attachments
+from src.chat.services.async_role_guard import AsyncRoleGuard
+from src.telegram.file_downloader import TelegramFileDownloader
+from src.telegram.protocols.i_async_message_service import IAsyncMessageService
+
+logger = getLogger(__name__)
+
+
+class AsyncFileMessageHandler:
+    allowed_roles: set[str] | None = {"admin"}
+
+    def __init__(
+        self,
+        send_to_agent_action: AsyncSendToAgentAction,
+        message_service: IAsyncMessageService,
+        role_guard: AsyncRoleGuard,
+        downloader: TelegramFileDownloader,
+        download_workers: int = 2,
+    ) -> None:
+        self.send_to_agent_action = send_to_agent_action
+        self.message_service = message_service
+        self.role_guard = role_guard
+        self.downloader = downloader
+        # Потоковая запись на диск остаётся блокирующей и уходит в поток,
+        # число одновременных скачиваний ограничено как в FileMessageHandler
+        self._downloads = asyncio.Semaphore(download_workers)
+
+    async def handle(self, message: types.Message) -> None:
+        if not message.from_user:
+            raise ValueError("message.from_user is required but was None")
+        if not await self.role_guard.allows(message.from_user.id, self.allowed_roles):
+            logger.warning("User %s is not allowed to send files", message.from_user.id)
+            return
+
+        attachments = extract_attachments(message)
+        if not attachments:
+            return
+
+        chat_id = message.chat.id
+        progress_msg = await self.message_service.send(
+            chat_id=chat_id,
+            text="Загружаю файл...",
+        )
+        try:
+            async with self._downloads:
+                paths = [
+                    await asyncio.to_thread(
+                        self.downloader.download,
+                        attachment.file_id,
+                        attachment.unique_id,
+                        attachment.suffix,
+                    )
+                    for attachment in attachments
+                ]
+            await self.message_service.replace(
+                chat_id=chat_id,
+                message_id=progress_msg.message_id,
+                text="Думаю...",
+            )
+        except Exception as e:
+            logger.exception("Upload ingestion failed")
+            await self.message_service.replace(
+                chat_id=chat_id,
+                message_id=progress_msg.message_id,
+                text=f"Ошибка: {e}",
+            )
+            return
+        await self.send_to_agent_action.execute(
+            chat_id=chat_id,
+            user_id=message.from_user.id,
+            text=build_prompt(message.caption or "", attachments, paths),
+            thinking_message_id=progress_msg.message_id,
+        )
@@ -0,0 +1,46 @@
+from logging import getLogger
+
+from telebot import types
+
+from src.chat.actions.async_send_to_agent_action import AsyncSendToAgentAction
+from src.chat.services.async_role_guard import AsyncRoleGuard
+from src.telegram.protocols.i_async_message_service import IAsyncMessageService
+
+logger = getLogger(__name__)
+
+
+class AsyncTextMessageHandler:
+    allowed_roles: set[str] | None = {"admin"}
+
+    def __init__(
+        self,
+        send_to_agent_action: AsyncSendToAgentAction,
+        message_service: IAsyncMessageService,
+        role_guard: AsyncRoleGuard,
+    ) -> None:
+        self.send_to_agent_action = send_to_agent_action
+        self.message_service = message_service
+        self.role_guard = role_guard
+
+    async def handle(self, message: types.Message) -> None:
+        if not message.from_user:
+            raise ValueError("message.from_user is required but was None")
+        if not await self.role_guard.allows(message.from_user.id, self.allowed_roles):
+            logger.warning(
+                "User %s is not allowed to talk to agent", message.from_user.id
+            )
+            return
+
+        if not message.text:
+            return
+
+        thinking_msg = await self.message_service.send(
+            chat_id=message.chat.id,
+            text="Думаю...",
+        )
+        await self.send_to_agent_action.execute(
+            chat_id=message.chat.id,
+            user_id=message.from_user.id,
+            text=message.text,
+            thinking_message_id=thinking_msg.message_id,
+        )
@@ -3,6 +3,9 @@ from bot_framework.entities.bot_message import BotMessage
 from bot_framework.protocols.i_message_service import IMessageService
 from bot_framework.role_management.repos import RoleRepo
 from src.agent.protocols.i_agent_client import IAgentClient
+from src.metrics import names
+from src.metrics.registry import MetricsRegistry
+from src.metrics.summary import format_latency_summary
 
 
 class ContextCommandHandler:
@@ -13,10 +16,12 @@ class ContextCommandHandler:
         agent_client: IAgentClient,
         message_service: IMessageService,
         role_repo: RoleRepo,
+        metrics: MetricsRegistry | None = None,
     ) -> None:
         self.agent_client = agent_client
         self.message_service = message_service
         self.role_repo = role_repo
+        self.metrics = metrics
 
     @check_message_roles
     def handle(self, message: BotMessage) -> None:
@@ -24,6 +29,15 @@ class ContextCommandHandler:
             raise ValueError("message.from_user is required but was None")
 
         context = self.agent_client.get_context(message.from_user.id)
+        if self.metrics is not None:
+            # Доставка измеряется в процессе бота, а не в AgentClient
+            delivery = format_latency_summary(
+                self.metrics,
+                [("Delivery", names.DELIVERY)],
+                user=str(message.from_user.id),
+            )
+            if delivery:
+                context = f"{context}\n{delivery}"
         self.message_service.send(
             chat_id=message.chat_id,
             text=context,
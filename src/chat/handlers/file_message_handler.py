@@ -0,0 +1,166 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from logging import getLogger
+from pathlib import Path
+from typing import Any
+
+from bot_framework.decorators import check_message_roles
+from bot_framework.entities.bot_message import BotMessage
+from bot_framework.protocols.i_message_service import IMessageService
+from bot_framework.role_management.repos import RoleRepo
+from src.chat.actions.send_to_agent_action import SendToAgentAction
+from src.telegram.file_downloader import TelegramFileDownloader
+
+logger = getLogger(__name__)
+
+VOICE_SUFFIX = ".oga"
+PHOTO_SUFFIX = ".jpg"
+
+
+@dataclass
+class Attachment:
+    kind: str
+    file_id: str
+    unique_id: str
+    suffix: str = ""
+    name: str | None = None
+    mime_type: str | None = None
+
+
+class FileMessageHandler:
+    allowed_roles: set[str] | None = {"admin"}
+
+    def __init__(
+        self,
+        send_to_agent_action: SendToAgentAction,
+        message_service: IMessageService,
+        role_repo: RoleRepo,
+        downloader: TelegramFileDownloader,
+        download_workers: int = 2,
+    ) -> None:
+        self.send_to_agent_action = send_to_agent_action
+        self.message_service = message_service
+        self.role_repo = role_repo
+        self.downloader = downloader
+        # Скачивание большого файла не должно занимать поток polling
+        self._download_executor = ThreadPoolExecutor(
+            max_workers=download_workers, thread_name_prefix="upload-download"
+        )
+
+    @check_message_roles
+    def handle(self, message: BotMessage) -> None:
+        if not message.from_user:
+            raise ValueError("message.from_user is required but was None")
+
+        original = message.get_original()
+        attachments = extract_attachments(original)
+        if not attachments:
+            return
+
+        progress_msg = self.message_service.send(
+            chat_id=message.chat_id,
+            text="Загружаю файл...",
+        )
+        self._download_executor.submit(
+            self._ingest,
+            message.chat_id,
+            message.from_user.id,
+            getattr(original, "caption", None) or "",
+            attachments,
+            progress_msg.message_id,
+        )
+
+    def _ingest(
+        self,
+        chat_id: int,
+        user_id: int,
+        caption: str,
+        attachments: list[Attachment],
+        progress_message_id: int,
+    ) -> None:
+        try:
+            paths = [
+                self.downloader.download(
+                    attachment.file_id, attachment.unique_id, attachment.suffix
+                )
+                for attachment in attachments
+            ]
+            self.message_service.replace(
+                chat_id=chat_id,
+                message_id=progress_message_id,
+                text="Думаю...",
+            )
+            self.send_to_agent_action.execute(
+                chat_id=chat_id,
+                user_id=user_id,
+                text=build_prompt(caption, attachments, paths),
+                thinking_message_id=progress_message_id,
+            )
+        except Exception as e:
+            logger.exception("Upload ingestion failed")
+            self.message_service.replace(
+                chat_id=chat_id,
+                message_id=progress_message_id,
+                text=f"Ошибка: {e}",
+            )
+
+
+def extract_attachments(message: Any) -> list[Attachment]:
+    attachments: list[Attachment] = []
+    if document := getattr(message, "document", None):
+        name = document.file_name
+        attachments.append(
+            Attachment(
+                kind="document",
+                file_id=document.file_id,
+                unique_id=document.file_unique_id,
+                suffix=Path(name).suffix.lower() if name else "",
+                name=name,
+                mime_type=document.mime_type,
+            )
+        )
+    if photos := getattr(message, "photo", None):
+        # Telegram присылает несколько размеров одного фото, последний — самый большой
+        photo = photos[-1]
+        attachments.append(
+            Attachment(
+                kind="photo",
+                file_id=photo.file_id,
+                unique_id=photo.file_unique_id,
+                suffix=PHOTO_SUFFIX,
+                mime_type="image/jpeg",
+            )
+        )
+    if voice := getattr(message, "voice", None):
+        attachments.append(
+            Attachment(
+                kind="voice",
+                file_id=voice.file_id,
+                unique_id=voice.file_unique_id,
+                suffix=VOICE_SUFFIX,
+                mime_type=voice.mime_type,
+            )
+        )
+    return attachments
+
+
+def build_prompt(caption: str, attachments: list[Attachment], paths: list[Path]) -> str:
+    lines = ["Пользователь прислал файлы, они сохранены на диске:"]
+    for attachment, path in zip(attachments, paths, strict=True):
+        details = [attachment.kind]
+        if attachment.name:
+            details.append(attachment.name)
+        if attachment.mime_type:
+            details.append(attachment.mime_type)
+        details.append(_format_size(path.stat().st_size))
+        lines.append(f"- {path} ({', '.join(details)})")
+    files = "\n".join(lines)
+    return f"{caption}\n\n{files}" if caption else files
+
+
+def _format_size(size: int) -> str:
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / 1024 / 1024:.1f} MB"
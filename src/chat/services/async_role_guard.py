@@ -0,0 +1,28 @@
+import asyncio
+import time
+
+from bot_framework.role_management.repos import RoleRepo
+
+
+class AsyncRoleGuard:
+    # Проверка ролей для асинхронных обработчиков. RoleRepo синхронный (БД),
+    # поэтому в поток уходит только промах кэша, а не каждое сообщение
+    def __init__(self, role_repo: RoleRepo, ttl: float = 60.0) -> None:
+        self._role_repo = role_repo
+        self._ttl = ttl
+        self._cache: dict[int, tuple[float, frozenset[str]]] = {}
+
+    async def allows(self, user_id: int, allowed_roles: set[str] | None) -> bool:
+        if not allowed_roles:
+            return True
+        return bool(await self._roles(user_id) & allowed_roles)
+
+    async def _roles(self, user_id: int) -> frozenset[str]:
+        now = time.monotonic()
+        cached = self._cache.get(user_id)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        roles = await asyncio.to_thread(self._role_repo.get_user_roles, user_id=user_id)
+        names = frozenset(role.name for role in roles)
+        self._cache[user_id] = (now + self._ttl, names)
+        return names
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from logging import getLogger
+
+from src.agent.events import (
+    AgentEvent,
+    AgentMergedEvent,
+    AgentQueuedEvent,
+    AgentTextEvent,
+    AgentToolEvent,
+)
+from src.chat.services.message_splitter import split_message
+from src.telegram.protocols.i_async_message_service import IAsyncMessageService
+
+logger = getLogger(__name__)
+
+
+class AsyncThrottledMessageEditor:
+    # Асинхронный ThrottledMessageEditor: feed вызывается на loop агента,
+    # промежуточные правки идут задачами того же loop вместо threading.Timer
+    def __init__(
+        self,
+        message_service: IAsyncMessageService,
+        chat_id: int,
+        message_id: int,
+        interval: float,
+        document_threshold: int = 0,
+    ) -> None:
+        self.message_service = message_service
+        self.chat_id = chat_id
+        self.interval = interval
+        self.document_threshold = document_threshold
+        self._message_ids = [message_id]
+        self._rendered: list[str] = []
+        self._text = ""
+        self._status = ""
+        self._last_flush = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushing: asyncio.Task[None] | None = None
+        # Были события после снимка текста, ушедшего в последнюю правку
+        self._dirty = False
+        self._finished = False
+        self.merged = False
+
+    def feed(self, event: AgentEvent) -> None:
+        if self._finished:
+            return
+        if isinstance(event, AgentMergedEvent):
+            self.merged = True
+            return
+        if isinstance(event, AgentTextEvent):
+            self._text = f"{self._text}\n{event.text}" if self._text else event.text
+            self._status = ""
+        elif isinstance(event, AgentToolEvent):
+            self._status = f"🔧 {event.name}..."
+        elif isinstance(event, AgentQueuedEvent):
+            self._status = (
+                f"⏳ В очереди: {event.position}" if event.position else "Думаю..."
+            )
+        self._dirty = True
+        if self._timer is None and self._flushing is None:
+            loop = asyncio.get_running_loop()
+            delay = max(0.0, self._last_flush + self.interval - time.monotonic())
+            self._timer = loop.call_later(delay, self._start_flush)
+
+    async def finish(self, text: str) -> None:
+        self.cancel()
+        # Идущую промежуточную правку дожидаемся, чтобы она не перетёрла финальную
+        if self._flushing is not None:
+            await asyncio.gather(self._flushing, return_exceptions=True)
+        await self._render(text)
+
+    def cancel(self) -> None:
+        self._finished = True
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _start_flush(self) -> None:
+        self._timer = None
+        if self._finished:
+            return
+        self._dirty = False
+        body = self._text
+        if self.document_threshold and len(body) > self.document_threshold:
+            # Ответ всё равно уйдёт файлом — не плодим десятки сообщений
+            body = f"📄 Ответ длинный ({len(body)} символов), пришлю файлом..."
+        text = "\n\n".join(part for part in (body, self._status) if part)
+        self._last_flush = time.monotonic()
+        self._flushing = asyncio.get_running_loop().create_task(self._flush(text))
+
+    async def _flush(self, text: str) -> None:
+        try:
+            await self._render(text, progress=True)
+        except Exception:
+            logger.warning("Failed to update streaming reply", exc_info=True)
+        finally:
+            self._flushing = None
+        # События, пришедшие во время правки, уходят следующей правкой
+        if self._dirty and not self._finished:
+            delay = max(0.0, self._last_flush + self.interval - time.monotonic())
+            self._timer = asyncio.get_running_loop().call_later(
+                delay, self._start_flush
+            )
+
+    async def _render(self, text: str, progress: bool = False) -> None:
+        chunks = split_message(text)
+        for i, chunk in enumerate(chunks):
+            if i < len(self._rendered) and self._rendered[i] == chunk:
+                continue
+            if progress and i < len(self._message_ids):
+                await self.message_service.replace_progress(
+                    chat_id=self.chat_id,
+                    message_id=self._message_ids[i],
+                    text=chunk,
+                )
+            elif i < len(self._message_ids):
+                await self.message_service.replace(
+                    chat_id=self.chat_id,
+                    message_id=self._message_ids[i],
+                    text=chunk,
+                )
+            else:
+                msg = await self.message_service.send(chat_id=self.chat_id, text=chunk)
+                self._message_ids.append(msg.message_id)
+        for message_id in self._message_ids[len(chunks) :]:
+            await self.message_service.delete(
+                chat_id=self.chat_id, message_id=message_id
+            )
+        del self._message_ids[len(chunks) :]
+        self._rendered = chunks
@@ -0,0 +1,84 @@
+from collections.abc import Iterator
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+FENCE = "```"
+_FENCE_CLOSE = f"\n{FENCE}"
+# Длинную info-строку при переоткрытии блока не повторяем, чтобы не съедать лимит
+_MAX_FENCE_HEADER = 64
+
+
+def split_message(text: str, limit: int = TELEGRAM_MESSAGE_LIMIT) -> list[str]:
+    return list(iter_chunks(text, limit))
+
+
+def iter_chunks(text: str, limit: int = TELEGRAM_MESSAGE_LIMIT) -> Iterator[str]:
+    # Один проход по тексту: позиция двигается вперёд, остаток не копируется.
+    # Блок ``` , разрезанный границей сообщения, закрывается в конце части
+    # и открывается заново в начале следующей
+    if len(text) <= limit:
+        yield text
+        return
+
+    fences = _find_fences(text)
+    fence_index = 0
+    open_fence: str | None = None
+    start = 0
+    end = len(text)
+    while start < end:
+        prefix = f"{open_fence}\n" if open_fence else ""
+        budget = limit - len(prefix)
+        if end - start <= budget:
+            yield prefix + text[start:]
+            return
+
+        split = _find_split(text, start, start + budget)
+        state, next_index = _fence_state(fences, fence_index, open_fence, split)
+        if state is not None:
+            split = _find_split(text, start, start + budget - len(_FENCE_CLOSE))
+            state, next_index = _fence_state(fences, fence_index, open_fence, split)
+
+        chunk = prefix + text[start:split]
+        yield chunk + _FENCE_CLOSE if state is not None else chunk
+
+        open_fence = state
+        fence_index = next_index
+        start = split
+        while start < end and text[start] == "\n":
+            start += 1
+
+
+def _find_fences(text: str) -> list[tuple[int, str]]:
+    # str.find в C быстрее регулярного выражения с MULTILINE на мегабайтах текста
+    fences: list[tuple[int, str]] = []
+    pos = text.find(FENCE)
+    while pos != -1:
+        line_start = text.rfind("\n", 0, pos) + 1
+        line_end = text.find("\n", pos)
+        if line_end == -1:
+            line_end = len(text)
+        if not text[line_start:pos].strip(" \t"):
+            fences.append((line_start, text[line_start:line_end].strip()))
+        pos = text.find(FENCE, line_end)
+    return fences
+
+
+def _find_split(text: str, start: int, stop: int) -> int:
+    split = text.rfind("\n", start, stop)
+    return split if split > start else stop
+
+
+def _fence_state(
+    fences: list[tuple[int, str]],
+    index: int,
+    open_fence: str | None,
+    stop: int,
+) -> tuple[str | None, int]:
+    while index < len(fences) and fences[index][0] < stop:
+        header = fences[index][1]
+        if open_fence is not None:
+            open_fence = None
+        else:
+            open_fence = header if len(header) <= _MAX_FENCE_HEADER else FENCE
+        index += 1
+    return open_fence, index
@@ -0,0 +1,128 @@
+import threading
+import time
+from concurrent.futures import Future
+from logging import getLogger
+
+from bot_framework.entities.bot_message import BotMessage
+from src.agent.events import (
+    AgentEvent,
+    AgentMergedEvent,
+    AgentQueuedEvent,
+    AgentTextEvent,
+    AgentToolEvent,
+)
+from src.chat.services.message_splitter import split_message
+from src.telegram.protocols.i_outbound_message_service import (
+    IOutboundMessageService,
+)
+
+logger = getLogger(__name__)
+
+
+class ThrottledMessageEditor:
+    def __init__(
+        self,
+        message_service: IOutboundMessageService,
+        chat_id: int,
+        message_id: int,
+        interval: float,
+        document_threshold: int = 0,
+    ) -> None:
+        self.message_service = message_service
+        self.chat_id = chat_id
+        self.interval = interval
+        self.document_threshold = document_threshold
+        self._message_ids = [message_id]
+        self._rendered: list[str] = []
+        self._text = ""
+        self._status = ""
+        self._last_flush = 0.0
+        self._timer: threading.Timer | None = None
+        self._finished = False
+        self.merged = False
+        self._lock = threading.Lock()
+        # Сериализует вызовы Telegram между сбросами по таймеру и finish()
+        self._io_lock = threading.Lock()
+
+    def feed(self, event: AgentEvent) -> None:
+        with self._lock:
+            if self._finished:
+                return
+            if isinstance(event, AgentMergedEvent):
+                self.merged = True
+                return
+            if isinstance(event, AgentTextEvent):
+                self._text = f"{self._text}\n{event.text}" if self._text else event.text
+                self._status = ""
+            elif isinstance(event, AgentToolEvent):
+                self._status = f"🔧 {event.name}..."
+            elif isinstance(event, AgentQueuedEvent):
+                self._status = (
+                    f"⏳ В очереди: {event.position}" if event.position else "Думаю..."
+                )
+            if self._timer is None:
+                delay = max(0.0, self._last_flush + self.interval - time.monotonic())
+                self._timer = threading.Timer(delay, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def finish(self, text: str) -> None:
+        self.cancel()
+        with self._io_lock:
+            self._render(text)
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._finished = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _flush(self) -> None:
+        with self._io_lock:
+            with self._lock:
+                self._timer = None
+                if self._finished:
+                    return
+                body = self._text
+                if self.document_threshold and len(body) > self.document_threshold:
+                    # Ответ всё равно уйдёт файлом — не плодим десятки сообщений
+                    body = f"📄 Ответ длинный ({len(body)} символов), пришлю файлом..."
+                text = "\n\n".join(part for part in (body, self._status) if part)
+                self._last_flush = time.monotonic()
+            try:
+                self._render(text, progress=True)
+            except Exception:
+                logger.warning("Failed to update streaming reply", exc_info=True)
+
+    def _render(self, text: str, progress: bool = False) -> None:
+        chunks = split_message(text)
+        for i, chunk in enumerate(chunks):
+            if i < len(self._rendered) and self._rendered[i] == chunk:
+                continue
+            if progress and i < len(self._message_ids):
+                # Промежуточные правки не ждём: в очереди планировщика они
+                # уступают финальным ответам и схлопываются до последней
+                self.message_service.replace_progress(
+                    chat_id=self.chat_id,
+                    message_id=self._message_ids[i],
+                    text=chunk,
+                ).add_done_callback(_log_progress_failure)
+            elif i < len(self._message_ids):
+                self.message_service.replace(
+                    chat_id=self.chat_id,
+                    message_id=self._message_ids[i],
+                    text=chunk,
+                )
+            else:
+                msg = self.message_service.send(chat_id=self.chat_id, text=chunk)
+                self._message_ids.append(msg.message_id)
+        for message_id in self._message_ids[len(chunks) :]:
+            self.message_service.delete(chat_id=self.chat_id, message_id=message_id)
+        del self._message_ids[len(chunks) :]
+        self._rendered = chunks
+
+
+def _log_progress_failure(future: Future[BotMessage]) -> None:
+    if future.exception() is not None:
+        logger.warning("Failed to update streaming reply", exc_info=future.exception())
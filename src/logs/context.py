@@ -0,0 +1,32 @@
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Задача inbox-воркера и reader-задача SDK-клиента наследуют контекст,
+# поэтому записи хода помечаются без передачи user_id в каждый вызов логгера
+_user_id: ContextVar[int | None] = ContextVar("log_user_id", default=None)
+_turn_id: ContextVar[str | None] = ContextVar("log_turn_id", default=None)
+
+
+def bind_user(user_id: int | None) -> None:
+    _user_id.set(user_id)
+
+
+@contextmanager
+def turn_scope(turn_id: str | None) -> Iterator[None]:
+    token = _turn_id.set(turn_id)
+    try:
+        yield
+    finally:
+        _turn_id.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    # Метки читаются в потоке, который пишет запись, — до очереди
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "user_id"):
+            record.user_id = _user_id.get()
+        if not hasattr(record, "turn_id"):
+            record.turn_id = _turn_id.get()
+        return True
@@ -0,0 +1,27 @@
+import json
+import logging
+from datetime import UTC, datetime
+
+# Поля записи, которые выводятся, если заданы
+EXTRA_FIELDS = ("user_id", "turn_id", "suppressed", "dropped")
+
+
+class JsonFormatter(logging.Formatter):
+    # Одна запись — одна строка JSON
+    def format(self, record: logging.LogRecord) -> str:
+        payload: dict[str, object] = {
+            "ts": datetime.fromtimestamp(record.created, UTC).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for name in EXTRA_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                payload[name] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
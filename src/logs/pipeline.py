@@ -0,0 +1,116 @@
+import logging
+import queue
+import sys
+from dataclasses import dataclass, field
+from logging.handlers import QueueHandler, QueueListener
+from typing import TextIO
+
+from src.logs.context import ContextFilter
+from src.logs.json_formatter import JsonFormatter
+from src.logs.sampling import SamplingFilter
+from src.logs.session_buffer import SessionLogBuffer
+
+TEXT_FORMAT = "%(levelname)s:%(name)s:%(message)s"
+BUFFER_FORMAT = "%(asctime)s %(levelname)s %(name)s [turn=%(turn_id)s] %(message)s"
+
+
+@dataclass
+class LoggingConfig:
+    level: str = "INFO"
+    # json — по строке JSON на запись, text — формат basicConfig
+    format: str = "json"
+    queue_size: int = 10_000
+    # Записей на пользователя для выгрузки при ошибке хода, 0 — без буфера
+    session_buffer: int = 200
+    # Имя логгера -> записей в секунду на пользователя
+    sampling: dict[str, float] = field(default_factory=dict)
+    sampling_burst: float = 10.0
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    # Поток, который пишет лог (loop агента), только кладёт запись в очередь:
+    # форматирование и запись в stderr — в потоке QueueListener
+    def __init__(
+        self, log_queue: "queue.SimpleQueue[logging.LogRecord]", max_size: int
+    ) -> None:
+        super().__init__(log_queue)
+        self._max_size = max_size
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Очередь внутри процесса: запись не нужно готовить к pickle,
+        # а сообщение соберёт форматтер в фоне
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # SimpleQueue без блокировок на Condition заметно дешевле queue.Queue,
+        # но не ограничена — размер проверяем сами (граница приблизительная)
+        if self.queue.qsize() >= self._max_size:
+            # Писатель не успевает: теряем запись, но не ждём его
+            self.dropped += 1
+            return
+        if self.dropped:
+            record.dropped = self.dropped
+            self.dropped = 0
+        self.queue.put_nowait(record)
+
+
+class LoggingPipeline:
+    def __init__(self, config: LoggingConfig, stream: TextIO | None = None) -> None:
+        self.config = config
+        context = ContextFilter()
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(
+            JsonFormatter()
+            if config.format == "json"
+            else logging.Formatter(TEXT_FORMAT)
+        )
+        log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        self._queue_handler = _NonBlockingQueueHandler(log_queue, config.queue_size)
+        self._queue_handler.addFilter(context)
+        if config.sampling:
+            self._queue_handler.addFilter(
+                SamplingFilter(config.sampling, burst=config.sampling_burst)
+            )
+        self._listener = QueueListener(log_queue, output)
+        self._replaced: list[logging.Handler] = []
+
+        self.session_buffer: SessionLogBuffer | None = None
+        if config.session_buffer:
+            self.session_buffer = SessionLogBuffer(config.session_buffer)
+            self.session_buffer.addFilter(context)
+            self.session_buffer.setFormatter(logging.Formatter(BUFFER_FORMAT))
+
+    @property
+    def dropped(self) -> int:
+        return self._queue_handler.dropped
+
+    def start(self) -> None:
+        root = logging.getLogger()
+        # Как basicConfig(force=True), но прежние обработчики вернёт stop()
+        self._replaced = list(root.handlers)
+        for handler in self._replaced:
+            root.removeHandler(handler)
+        root.setLevel(self.config.level)
+        if self.session_buffer is not None:
+            root.addHandler(self.session_buffer)
+        root.addHandler(self._queue_handler)
+        self._listener.start()
+
+    def stop(self) -> None:
+        # Дописывает записи, уже стоящие в очереди
+        root = logging.getLogger()
+        root.removeHandler(self._queue_handler)
+        if self.session_buffer is not None:
+            root.removeHandler(self.session_buffer)
+        self._listener.stop()
+        for handler in self._replaced:
+            root.addHandler(handler)
+        self._replaced = []
+
+
+def setup_logging(config: LoggingConfig) -> LoggingPipeline:
+    pipeline = LoggingPipeline(config)
+    pipeline.start()
+    return pipeline
@@ -0,0 +1,38 @@
+import logging
+import threading
+import time
+
+from src.telegram.token_bucket import TokenBucket
+
+
+class SamplingFilter(logging.Filter):
+    # Ограничивает частоту записей шумных логгеров (stderr CLI, thinking)
+    # отдельно для каждого пользователя. Число отброшенных записей уходит
+    # полем suppressed в следующую пропущенную
+    def __init__(self, rates: dict[str, float], burst: float = 10.0) -> None:
+        super().__init__()
+        self._rates = rates
+        self._burst = burst
+        self._buckets: dict[tuple[str, int | None], TokenBucket] = {}
+        self._suppressed: dict[tuple[str, int | None], int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self._rates.get(record.name)
+        if not rate or record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, getattr(record, "user_id", None))
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(rate, self._burst, now)
+                self._buckets[key] = bucket
+            if bucket.delay(now) > 0:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            bucket.take(now)
+            suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
@@ -0,0 +1,32 @@
+import logging
+from collections import deque
+
+
+class SessionLogBuffer(logging.Handler):
+    # Последние записи каждого пользователя, включая отброшенные семплированием:
+    # при ошибке хода их выгружают целиком. Хранит сами записи, форматирование —
+    # только при выгрузке
+    def __init__(self, capacity: int = 200) -> None:
+        super().__init__(level=logging.DEBUG)
+        self._capacity = capacity
+        self._records: dict[int, deque[logging.LogRecord]] = {}
+
+    def emit(self, record: logging.LogRecord) -> None:
+        user_id = getattr(record, "user_id", None)
+        # Сама выгрузка в буфер не попадает, иначе следующая вложит её целиком
+        if user_id is None or getattr(record, "session_dump", False):
+            return
+        records = self._records.get(user_id)
+        if records is None:
+            records = deque(maxlen=self._capacity)
+            self._records[user_id] = records
+        records.append(record)
+
+    def dump(self, user_id: int) -> list[str]:
+        with self.lock:  # type: ignore[union-attr]
+            records = list(self._records.get(user_id, ()))
+        return [self.format(record) for record in records]
+
+    def forget(self, user_id: int) -> None:
+        with self.lock:  # type: ignore[union-attr]
+            self._records.pop(user_id, None)
@@ -0,0 +1,56 @@
+import bisect
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+@dataclass
+class HistogramSnapshot:
+    buckets: list[tuple[float, int]]
+    total: float
+    count: int
+
+
+class Histogram:
+    # Бакеты — для экспозиции в Prometheus, последние значения — для p50/p95 в /context
+    def __init__(
+        self, buckets: tuple[float, ...] = DEFAULT_BUCKETS, reservoir: int = 1024
+    ) -> None:
+        self._bounds = buckets
+        self._counts = [0] * len(buckets)
+        self._total = 0.0
+        self._count = 0
+        self._recent: deque[float] = deque(maxlen=reservoir)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            index = bisect.bisect_left(self._bounds, value)
+            if index < len(self._counts):
+                self._counts[index] += 1
+            self._total += value
+            self._count += 1
+            self._recent.append(value)
+
+    def snapshot(self) -> HistogramSnapshot:
+        with self._lock:
+            cumulative = 0
+            buckets: list[tuple[float, int]] = []
+            for bound, count in zip(self._bounds, self._counts, strict=True):
+                cumulative += count
+                buckets.append((bound, cumulative))
+            return HistogramSnapshot(
+                buckets=buckets, total=self._total, count=self._count
+            )
+
+    def recent(self) -> list[float]:
+        with self._lock:
+            return list(self._recent)
+
+
+def quantile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
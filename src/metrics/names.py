@@ -0,0 +1,7 @@
+QUEUE_WAIT = "agent_queue_wait_seconds"
+CONNECT = "agent_connect_seconds"
+FIRST_BLOCK = "agent_first_block_seconds"
+TOOL = "agent_tool_seconds"
+TURN = "agent_turn_seconds"
+COMPACTION = "agent_compaction_seconds"
+DELIVERY = "telegram_delivery_seconds"
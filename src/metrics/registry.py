@@ -0,0 +1,76 @@
+import threading
+from collections.abc import Mapping
+
+from src.metrics.histogram import Histogram, quantile
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._series: dict[str, dict[Labels, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+        histogram.observe(value)
+
+    def quantiles(
+        self, name: str, qs: tuple[float, ...], **match: str
+    ) -> list[float] | None:
+        # Значения всех серий метрики, подходящих под метки (например, все модели пользователя)
+        values: list[float] = []
+        for _labels, histogram in self._matching(name, match):
+            values.extend(histogram.recent())
+        if not values:
+            return None
+        return [quantile(values, q) for q in qs]
+
+    def render(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            names = sorted(self._series)
+        for name in names:
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in self._matching(name, {}):
+                snapshot = histogram.snapshot()
+                for bound, count in snapshot.buckets:
+                    le = _format_labels(labels, le=_format_float(bound))
+                    lines.append(f"{name}_bucket{le} {count}")
+                inf = _format_labels(labels, le="+Inf")
+                lines.append(f"{name}_bucket{inf} {snapshot.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {snapshot.total}")
+                lines.append(f"{name}_count{_format_labels(labels)} {snapshot.count}")
+        return "\n".join(lines) + "\n"
+
+    def _matching(
+        self, name: str, match: Mapping[str, str]
+    ) -> list[tuple[Labels, Histogram]]:
+        with self._lock:
+            series = list(self._series.get(name, {}).items())
+        return [
+            (labels, histogram)
+            for labels, histogram in series
+            if all(dict(labels).get(key) == value for key, value in match.items())
+        ]
+
+
+def _format_labels(labels: Labels, **extra: str) -> str:
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ""
+    body = ",".join(f'{key}="{_escape(value)}"' for key, value in pairs)
+    return f"{{{body}}}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value))
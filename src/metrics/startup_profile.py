@@ -0,0 +1,73 @@
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import wraps
+
+# Отметка импорта модуля: __main__ бота импортирует его первым, поэтому всё
+# от этой отметки до начала main() — импорт зависимостей
+IMPORTED_AT = time.perf_counter()
+
+
+@dataclass
+class StartupPhase:
+    name: str
+    # Секунды от начала запуска
+    offset: float
+    duration: float
+    thread: str
+
+
+class StartupProfile:
+    # Фазы запуска бота: смещение от старта и длительность каждой, с потоком,
+    # в котором она шла, — так видно, какие фазы перекрываются
+    def __init__(self, started: float = IMPORTED_AT) -> None:
+        self._started = started
+        self._phases: list[StartupPhase] = []
+        self._lock = threading.Lock()
+
+    @property
+    def phases(self) -> list[StartupPhase]:
+        with self._lock:
+            return sorted(self._phases, key=lambda phase: phase.offset)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def record(self, name: str, since: float) -> None:
+        now = time.perf_counter()
+        phase = StartupPhase(
+            name=name,
+            offset=since - self._started,
+            duration=now - since,
+            thread=threading.current_thread().name,
+        )
+        with self._lock:
+            self._phases.append(phase)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started)
+
+    def timed[**P, T](self, name: str, func: Callable[P, T]) -> Callable[P, T]:
+        # Обёртка для задач, которые запускаются в пуле потоков
+        @wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            with self.phase(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def report(self, title: str) -> str:
+        lines = [f"Startup profile: {title} in {self.elapsed() * 1000:.0f}ms"]
+        for phase in self.phases:
+            lines.append(
+                f"{phase.offset * 1000:>7.0f}ms +{phase.duration * 1000:>6.0f}ms"
+                f"  {phase.name} [{phase.thread}]"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,13 @@
+from src.metrics.registry import MetricsRegistry
+
+
+def format_latency_summary(
+    registry: MetricsRegistry, rows: list[tuple[str, str]], **match: str
+) -> str:
+    lines: list[str] = []
+    for title, name in rows:
+        values = registry.quantiles(name, (0.5, 0.95), **match)
+        if values is not None:
+            p50, p95 = values
+            lines.append(f"{title}: {p50:.2f}s / {p95:.2f}s")
+    return "\n".join(lines)
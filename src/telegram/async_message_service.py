@@ -0,0 +1,167 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from io import BytesIO
+from logging import getLogger
+
+from telebot import types
+from telebot.async_telebot import AsyncTeleBot
+from telebot.asyncio_helper import ApiTelegramException
+
+from bot_framework.entities.bot_message import BotMessage
+from src.telegram.outbound_scheduler import TOO_MANY_REQUESTS, RateLimits
+from src.telegram.token_bucket import TokenBucket
+
+logger = getLogger(__name__)
+
+PARSE_MODE = "HTML"
+
+
+class AsyncTelegramMessageService:
+    # Асинхронный аналог ScheduledMessageService поверх AsyncTeleBot: те же лимиты
+    # (глобальный и по-чатовый token bucket, повтор после 429) и порядок вызовов
+    # внутри чата, но ожидание — на loop, а не в пуле потоков планировщика
+    def __init__(
+        self,
+        bot: AsyncTeleBot,
+        limits: RateLimits | None = None,
+        max_retries: int = 5,
+    ) -> None:
+        self._bot = bot
+        self.limits = limits or RateLimits()
+        self._max_retries = max_retries
+        self._global = TokenBucket(
+            self.limits.global_rate, self.limits.global_rate, time.monotonic()
+        )
+        self._chats: dict[int, TokenBucket] = {}
+        self._chat_locks: dict[int, asyncio.Lock] = {}
+        self._blocked_until: dict[int, float] = {}
+        # Ждущие промежуточные правки: новая правка того же сообщения
+        # только подменяет текст, уходит последний
+        self._progress: dict[tuple[int, int], str] = {}
+
+    async def send(self, chat_id: int, text: str) -> BotMessage:
+        async with self._chat_lock(chat_id):
+            try:
+                msg = await self._call(
+                    chat_id,
+                    lambda: self._bot.send_message(
+                        chat_id, text, parse_mode=PARSE_MODE
+                    ),
+                )
+            except ApiTelegramException:
+                # Как TelegramMessageSender: невалидный HTML отправляем без разметки
+                logger.warning("Failed to send message as HTML", exc_info=True)
+                msg = await self._call(
+                    chat_id, lambda: self._bot.send_message(chat_id, text)
+                )
+        return _bot_message(chat_id, msg)
+
+    async def send_document(
+        self, chat_id: int, document: bytes, filename: str
+    ) -> BotMessage:
+        async with self._chat_lock(chat_id):
+            msg = await self._call(
+                chat_id,
+                lambda: self._bot.send_document(
+                    chat_id, types.InputFile(BytesIO(document), file_name=filename)
+                ),
+            )
+        return _bot_message(chat_id, msg)
+
+    async def replace(self, chat_id: int, message_id: int, text: str) -> BotMessage:
+        # Финальная правка делает ждущую промежуточную ненужной
+        self._progress.pop((chat_id, message_id), None)
+        async with self._chat_lock(chat_id):
+            return await self._edit(chat_id, message_id, text)
+
+    async def replace_progress(self, chat_id: int, message_id: int, text: str) -> None:
+        key = (chat_id, message_id)
+        waiting = key in self._progress
+        self._progress[key] = text
+        if waiting:
+            return
+        async with self._chat_lock(chat_id):
+            latest = self._progress.pop(key, None)
+            if latest is None:
+                return
+            await self._edit(chat_id, message_id, latest)
+
+    async def delete(self, chat_id: int, message_id: int) -> None:
+        async with self._chat_lock(chat_id):
+            try:
+                await self._call(
+                    chat_id, lambda: self._bot.delete_message(chat_id, message_id)
+                )
+            except Exception:
+                logger.warning("Failed to delete message", exc_info=True)
+
+    async def _edit(self, chat_id: int, message_id: int, text: str) -> BotMessage:
+        try:
+            await self._call(
+                chat_id,
+                lambda: self._bot.edit_message_text(
+                    text, chat_id=chat_id, message_id=message_id, parse_mode=PARSE_MODE
+                ),
+            )
+        except ApiTelegramException as e:
+            if "message is not modified" not in str(e):
+                raise
+            logger.debug("Message content unchanged, skipping edit")
+        return BotMessage(chat_id=chat_id, message_id=message_id)
+
+    def _chat_lock(self, chat_id: int) -> asyncio.Lock:
+        # Не больше одного вызова на чат одновременно: порядок сообщений сохраняется
+        lock = self._chat_locks.get(chat_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._chat_locks[chat_id] = lock
+        return lock
+
+    async def _call[T](self, chat_id: int, request: Callable[[], Awaitable[T]]) -> T:
+        attempts = 0
+        while True:
+            await self._take_token(chat_id)
+            try:
+                return await request()
+            except ApiTelegramException as e:
+                if e.error_code != TOO_MANY_REQUESTS or attempts >= self._max_retries:
+                    raise
+                attempts += 1
+                retry_after = _retry_after(e)
+                logger.warning(
+                    "Telegram flood limit for chat=%s, retrying in %.1fs",
+                    chat_id,
+                    retry_after,
+                )
+                self._blocked_until[chat_id] = time.monotonic() + retry_after
+
+    async def _take_token(self, chat_id: int) -> None:
+        # Все вызовы идут на одном loop, поэтому между проверкой и take гонок нет
+        while True:
+            now = time.monotonic()
+            chat = self._chats.get(chat_id)
+            if chat is None:
+                chat = TokenBucket(self.limits.chat_rate, self.limits.chat_burst, now)
+                self._chats[chat_id] = chat
+            delay = max(
+                self._blocked_until.get(chat_id, 0.0) - now,
+                chat.delay(now),
+                self._global.delay(now),
+            )
+            if delay <= 0:
+                self._global.take(now)
+                chat.take(now)
+                return
+            await asyncio.sleep(delay)
+
+
+def _bot_message(chat_id: int, msg: types.Message) -> BotMessage:
+    bot_message = BotMessage(chat_id=chat_id, message_id=msg.message_id)
+    bot_message.set_original(msg)
+    return bot_message
+
+
+def _retry_after(error: ApiTelegramException) -> float:
+    parameters = (error.result_json or {}).get("parameters") or {}
+    return float(parameters.get("retry_after", 1))
@@ -0,0 +1,76 @@
+import time
+from collections.abc import Iterator
+from logging import getLogger
+from pathlib import Path
+
+import requests
+import telebot
+from telebot import apihelper
+
+from src.telegram.file_store import ContentAddressedFileStore
+
+logger = getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_FILE_URL = "https://api.telegram.org/file/bot{0}/{1}"
+
+
+class TelegramFileDownloader:
+    # bot.download_file читает файл в память целиком; здесь файл идёт на диск
+    # кусками по CHUNK_SIZE, так что память не зависит от размера загрузки
+    def __init__(
+        self,
+        bot: telebot.TeleBot,
+        store: ContentAddressedFileStore,
+        chunk_size: int = CHUNK_SIZE,
+        read_timeout: float = 300.0,
+    ) -> None:
+        self._bot = bot
+        self._store = store
+        self._chunk_size = chunk_size
+        self._read_timeout = read_timeout
+
+    def download(self, file_id: str, unique_id: str, suffix: str = "") -> Path:
+        cached = self._store.find(unique_id)
+        if cached is not None:
+            logger.info("Upload %s already stored at %s", unique_id, cached)
+            return cached
+
+        started = time.monotonic()
+        file_path = self._bot.get_file(file_id).file_path
+        if not file_path:
+            raise ValueError(f"Telegram returned no file_path for {file_id}")
+        path = self._store.write(unique_id, self._open(file_path), suffix)
+        logger.info(
+            "Downloaded upload %s to %s (%dB) in %.0fms",
+            unique_id,
+            path,
+            path.stat().st_size,
+            (time.monotonic() - started) * 1000,
+        )
+        return path
+
+    def _open(self, file_path: str) -> Iterator[bytes]:
+        # Локальный Bot API сервер (--local) отдаёт абсолютный путь на своём диске
+        local = Path(file_path)
+        if local.is_absolute() and local.is_file():
+            return self._read_local(local)
+        return self._read_remote(file_path)
+
+    def _read_local(self, path: Path) -> Iterator[bytes]:
+        with path.open("rb") as file:
+            while chunk := file.read(self._chunk_size):
+                yield chunk
+
+    def _read_remote(self, file_path: str) -> Iterator[bytes]:
+        url = (apihelper.FILE_URL or DEFAULT_FILE_URL).format(
+            self._bot.token, file_path
+        )
+        with requests.get(
+            url,
+            stream=True,
+            timeout=(apihelper.CONNECT_TIMEOUT, self._read_timeout),
+            proxies=apihelper.proxy,
+        ) as response:
+            response.raise_for_status()
+            yield from response.iter_content(chunk_size=self._chunk_size)
@@ -0,0 +1,54 @@
+import hashlib
+import os
+import tempfile
+from collections.abc import Iterable
+from pathlib import Path
+
+
+class ContentAddressedFileStore:
+    # Файлы лежат по sha256 содержимого: objects/ab/abcdef....pdf.
+    # Индекс by-id/<file_unique_id> — символическая ссылка на объект, поэтому
+    # повторно присланный файл не скачивается, а одинаковое содержимое хранится один раз
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._objects = root / "objects"
+        self._index = root / "by-id"
+        self._tmp = root / "tmp"
+        for path in (self._objects, self._index, self._tmp):
+            path.mkdir(parents=True, exist_ok=True)
+
+    def find(self, unique_id: str) -> Path | None:
+        link = self._index / unique_id
+        # Объект могли удалить вручную — тогда ссылка битая и файл надо скачать заново
+        if link.is_symlink() and link.exists():
+            return link.resolve()
+        return None
+
+    def write(self, unique_id: str, chunks: Iterable[bytes], suffix: str = "") -> Path:
+        digest = hashlib.sha256()
+        fd, tmp_name = tempfile.mkstemp(dir=self._tmp)
+        tmp_path = Path(tmp_name)
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    tmp_file.write(chunk)
+            hexdigest = digest.hexdigest()
+            target = self._objects / hexdigest[:2] / f"{hexdigest}{suffix}"
+            target.parent.mkdir(exist_ok=True)
+            if target.exists():
+                tmp_path.unlink()
+            else:
+                os.replace(tmp_path, target)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        self._link(unique_id, target)
+        return target
+
+    def _link(self, unique_id: str, target: Path) -> None:
+        link = self._index / unique_id
+        tmp_link = self._tmp / f"{unique_id}.link"
+        tmp_link.unlink(missing_ok=True)
+        tmp_link.symlink_to(target)
+        os.replace(tmp_link, link)
@@ -0,0 +1,212 @@
+import itertools
+import threading
+import time
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import IntEnum
+from logging import getLogger
+from typing import Any
+
+from telebot.apihelper import ApiTelegramException
+
+from src.telegram.token_bucket import TokenBucket
+
+logger = getLogger(__name__)
+
+TOO_MANY_REQUESTS = 429
+
+
+class Priority(IntEnum):
+    FINAL = 0
+    PROGRESS = 1
+
+
+@dataclass
+class RateLimits:
+    global_rate: float = 30.0
+    chat_rate: float = 1.0
+    chat_burst: float = 3.0
+
+
+@dataclass
+class _Job:
+    chat_id: int
+    call: Callable[[], Any]
+    priority: Priority
+    merge_key: Hashable | None
+    seq: int
+    futures: list[Future[Any]] = field(default_factory=list)
+    attempts: int = 0
+
+
+class OutboundScheduler:
+    # Единая очередь исходящих вызовов Telegram: глобальный и по-чатовый token bucket,
+    # не больше одного вызова на чат одновременно (порядок сообщений в чате сохраняется)
+    def __init__(
+        self,
+        limits: RateLimits | None = None,
+        max_workers: int = 8,
+        max_retries: int = 5,
+    ) -> None:
+        self.limits = limits or RateLimits()
+        self._max_retries = max_retries
+        self._jobs: list[_Job] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._global = TokenBucket(
+            self.limits.global_rate, self.limits.global_rate, time.monotonic()
+        )
+        self._chats: dict[int, TokenBucket] = {}
+        self._busy_chats: set[int] = set()
+        self._blocked_until: dict[int, float] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="telegram-outbound"
+        )
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, name="telegram-outbound-dispatcher", daemon=True
+        )
+        self._dispatcher.start()
+
+    def submit[T](
+        self,
+        chat_id: int,
+        call: Callable[[], T],
+        priority: Priority = Priority.FINAL,
+        merge_key: Hashable | None = None,
+    ) -> Future[T]:
+        future: Future[T] = Future()
+        job = _Job(
+            chat_id=chat_id,
+            call=call,
+            priority=priority,
+            merge_key=merge_key,
+            seq=next(self._seq),
+            futures=[future],
+        )
+        with self._cond:
+            if merge_key is not None:
+                self._merge_queued(job)
+            self._jobs.append(job)
+            self._cond.notify()
+        return future
+
+    def acquire(
+        self, chat_id: int, priority: Priority = Priority.FINAL
+    ) -> Future[None]:
+        # Только разрешение на вызов: токены берутся в общей очереди, а сам вызов
+        # (долгая загрузка файла) делает вызывающий — в своём пуле, не занимая
+        # потоки планировщика
+        return self.submit(chat_id, _granted, priority)
+
+    def block(self, chat_id: int, retry_after: float) -> None:
+        # 429, полученный в обход submit: чат ждёт и для всех остальных вызовов
+        with self._cond:
+            until = time.monotonic() + retry_after
+            self._blocked_until[chat_id] = max(
+                self._blocked_until.get(chat_id, 0.0), until
+            )
+            self._cond.notify()
+
+    def _merge_queued(self, job: _Job) -> None:
+        # Поставленное в очередь редактирование того же сообщения устарело:
+        # отправляем только последнее, его результат получают все ожидающие
+        for queued in [
+            queued for queued in self._jobs if queued.merge_key == job.merge_key
+        ]:
+            self._jobs.remove(queued)
+            job.futures[:0] = queued.futures
+            job.priority = min(job.priority, queued.priority)
+            job.seq = min(job.seq, queued.seq)
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._cond:
+                job, wait = self._next_job(time.monotonic())
+                if job is None:
+                    self._cond.wait(timeout=wait)
+                    continue
+                self._jobs.remove(job)
+                self._busy_chats.add(job.chat_id)
+            self._executor.submit(self._run, job)
+
+    def _next_job(self, now: float) -> tuple[_Job | None, float | None]:
+        wait: float | None = None
+        ready = sorted(
+            (job for job in self._jobs if job.chat_id not in self._busy_chats),
+            key=lambda job: (job.priority, job.seq),
+        )
+        seen: set[int] = set()
+        for job in ready:
+            # Внутри чата строго по очереди: следующий кандидат чата ждёт первого
+            if job.chat_id in seen:
+                continue
+            seen.add(job.chat_id)
+            delay = max(
+                self._blocked_until.get(job.chat_id, 0.0) - now,
+                self._chat_bucket(job.chat_id, now).delay(now),
+            )
+            if delay > 0:
+                wait = delay if wait is None else min(wait, delay)
+                continue
+            global_delay = self._global.delay(now)
+            if global_delay > 0:
+                return None, global_delay
+            self._global.take(now)
+            self._chats[job.chat_id].take(now)
+            return job, None
+        return None, wait
+
+    def _chat_bucket(self, chat_id: int, now: float) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.limits.chat_rate, self.limits.chat_burst, now)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _run(self, job: _Job) -> None:
+        try:
+            result = job.call()
+        except ApiTelegramException as e:
+            if e.error_code == TOO_MANY_REQUESTS and job.attempts < self._max_retries:
+                self._retry_later(job, retry_after(e))
+                return
+            self._settle(job, error=e)
+        except Exception as e:
+            self._settle(job, error=e)
+        else:
+            self._settle(job, result=result)
+
+    def _retry_later(self, job: _Job, retry_after: float) -> None:
+        logger.warning(
+            "Telegram flood limit for chat=%s, retrying in %.1fs",
+            job.chat_id,
+            retry_after,
+        )
+        with self._cond:
+            job.attempts += 1
+            self._blocked_until[job.chat_id] = time.monotonic() + retry_after
+            self._jobs.append(job)
+            self._busy_chats.discard(job.chat_id)
+            self._cond.notify()
+
+    def _settle(
+        self, job: _Job, result: Any = None, error: BaseException | None = None
+    ) -> None:
+        with self._cond:
+            self._busy_chats.discard(job.chat_id)
+            self._cond.notify()
+        for future in job.futures:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+def _granted() -> None:
+    return None
+
+
+def retry_after(error: ApiTelegramException) -> float:
+    parameters = (error.result_json or {}).get("parameters") or {}
+    return float(parameters.get("retry_after", 1))
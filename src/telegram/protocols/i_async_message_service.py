@@ -0,0 +1,19 @@
+from typing import Protocol
+
+from bot_framework.entities.bot_message import BotMessage
+
+
+class IAsyncMessageService(Protocol):
+    async def send(self, chat_id: int, text: str) -> BotMessage: ...
+
+    async def send_document(
+        self, chat_id: int, document: bytes, filename: str
+    ) -> BotMessage: ...
+
+    async def replace(self, chat_id: int, message_id: int, text: str) -> BotMessage: ...
+
+    async def replace_progress(
+        self, chat_id: int, message_id: int, text: str
+    ) -> None: ...
+
+    async def delete(self, chat_id: int, message_id: int) -> None: ...
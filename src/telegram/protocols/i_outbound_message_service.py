@@ -0,0 +1,11 @@
+from concurrent.futures import Future
+from typing import Protocol
+
+from bot_framework.entities.bot_message import BotMessage
+from bot_framework.protocols.i_message_service import IMessageService
+
+
+class IOutboundMessageService(IMessageService, Protocol):
+    def replace_progress(
+        self, chat_id: int, message_id: int, text: str
+    ) -> Future[BotMessage]: ...
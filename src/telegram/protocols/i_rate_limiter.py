@@ -0,0 +1,9 @@
+from concurrent.futures import Future
+from typing import Protocol
+
+
+class IRateLimiter(Protocol):
+    # Разрешение на вызов Telegram для чата с учётом общих лимитов процесса
+    def acquire(self, chat_id: int) -> Future[None]: ...
+
+    def block(self, chat_id: int, retry_after: float) -> None: ...
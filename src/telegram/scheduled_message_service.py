@@ -0,0 +1,139 @@
+from concurrent.futures import Future
+from functools import partial
+
+from bot_framework.entities.bot_message import BotMessage
+from bot_framework.entities.keyboard import Keyboard
+from bot_framework.entities.parse_mode import ParseMode
+from bot_framework.protocols.i_message_service import IMessageService
+from src.telegram.outbound_scheduler import OutboundScheduler, Priority
+
+
+class ScheduledMessageService:
+    # IMessageService, все вызовы которого проходят через OutboundScheduler;
+    # синхронные методы ждут своей очереди и возвращают результат как раньше
+    def __init__(
+        self, message_service: IMessageService, scheduler: OutboundScheduler
+    ) -> None:
+        self._message_service = message_service
+        self._scheduler = scheduler
+
+    def send(
+        self,
+        chat_id: int,
+        text: str,
+        parse_mode: ParseMode = ParseMode.HTML,
+        keyboard: Keyboard | None = None,
+        flow_name: str | None = None,
+    ) -> BotMessage:
+        return self._scheduler.submit(
+            chat_id,
+            partial(
+                self._message_service.send,
+                chat_id=chat_id,
+                text=text,
+                parse_mode=parse_mode,
+                keyboard=keyboard,
+                flow_name=flow_name,
+            ),
+        ).result()
+
+    def send_markdown_as_html(
+        self,
+        chat_id: int,
+        text: str,
+        keyboard: Keyboard | None = None,
+        flow_name: str | None = None,
+    ) -> BotMessage:
+        return self._scheduler.submit(
+            chat_id,
+            partial(
+                self._message_service.send_markdown_as_html,
+                chat_id=chat_id,
+                text=text,
+                keyboard=keyboard,
+                flow_name=flow_name,
+            ),
+        ).result()
+
+    def send_document(self, chat_id: int, document: bytes, filename: str) -> BotMessage:
+        return self._scheduler.submit(
+            chat_id,
+            partial(
+                self._message_service.send_document,
+                chat_id=chat_id,
+                document=document,
+                filename=filename,
+            ),
+        ).result()
+
+    def replace(
+        self,
+        chat_id: int,
+        message_id: int,
+        text: str,
+        parse_mode: ParseMode = ParseMode.HTML,
+        keyboard: Keyboard | None = None,
+        flow_name: str | None = None,
+    ) -> BotMessage:
+        return self._scheduler.submit(
+            chat_id,
+            partial(
+                self._message_service.replace,
+                chat_id=chat_id,
+                message_id=message_id,
+                text=text,
+                parse_mode=parse_mode,
+                keyboard=keyboard,
+                flow_name=flow_name,
+            ),
+            merge_key=_edit_key(chat_id, message_id),
+        ).result()
+
+    def replace_progress(
+        self, chat_id: int, message_id: int, text: str
+    ) -> Future[BotMessage]:
+        return self._scheduler.submit(
+            chat_id,
+            partial(
+                self._message_service.replace,
+                chat_id=chat_id,
+                message_id=message_id,
+                text=text,
+            ),
+            priority=Priority.PROGRESS,
+            merge_key=_edit_key(chat_id, message_id),
+        )
+
+    def notify_replace(
+        self,
+        chat_id: int,
+        message_id: int,
+        text: str,
+        parse_mode: ParseMode = ParseMode.HTML,
+        keyboard: Keyboard | None = None,
+        flow_name: str | None = None,
+    ) -> BotMessage:
+        return self._scheduler.submit(
+            chat_id,
+            partial(
+                self._message_service.notify_replace,
+                chat_id=chat_id,
+                message_id=message_id,
+                text=text,
+                parse_mode=parse_mode,
+                keyboard=keyboard,
+                flow_name=flow_name,
+            ),
+        ).result()
+
+    def delete(self, chat_id: int, message_id: int) -> None:
+        self._scheduler.submit(
+            chat_id,
+            partial(
+                self._message_service.delete, chat_id=chat_id, message_id=message_id
+            ),
+        ).result()
+
+
+def _edit_key(chat_id: int, message_id: int) -> tuple[str, int, int]:
+    return ("message", chat_id, message_id)
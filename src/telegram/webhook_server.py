@@ -0,0 +1,259 @@
+import asyncio
+import hmac
+import json
+import threading
+from collections.abc import Callable
+from logging import getLogger
+
+from telebot import types
+
+logger = getLogger(__name__)
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"  # noqa: S105
+MAX_HEADER_SIZE = 16 * 1024
+MAX_BODY_SIZE = 1024 * 1024
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    503: "Service Unavailable",
+}
+
+UpdatesConsumer = Callable[[list[types.Update]], None]
+
+
+class _HttpError(Exception):
+    def __init__(self, status: int) -> None:
+        super().__init__(status)
+        self.status = status
+
+
+class WebhookServer:
+    # Приём обновлений Telegram по webhook вместо long polling: HTTP-сервер на
+    # своём asyncio-loop только проверяет секрет и кладёт обновление в очередь,
+    # а разбор очереди отдаёт обработчикам (bot.process_new_updates) в отдельном
+    # потоке — приём не ждёт ни обработчиков, ни ходов агента
+    def __init__(
+        self,
+        consumer: UpdatesConsumer,
+        secret_token: str,
+        path: str = "/",
+        host: str = "127.0.0.1",
+        port: int = 8443,
+        queue_size: int = 1000,
+        max_batch_size: int = 100,
+    ) -> None:
+        self._consumer = consumer
+        self._secret = secret_token.encode()
+        self._path = path or "/"
+        self._host = host
+        self._port = port
+        self._max_batch_size = max_batch_size
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[types.Update] = asyncio.Queue(maxsize=queue_size)
+        self._server: asyncio.Server | None = None
+        self._thread: threading.Thread | None = None
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+
+    @property
+    def port(self) -> int:
+        # Фактический порт: при port=0 его выбирает ОС (нужно тестам)
+        if self._server is None:
+            return self._port
+        return self._server.sockets[0].getsockname()[1]
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run_loop, name="telegram-webhook", daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+        if self._server is None:
+            raise RuntimeError("Webhook server failed to start")
+        logger.info(
+            "Webhook listening on http://%s:%d%s", self._host, self.port, self._path
+        )
+
+    def serve_forever(self) -> None:
+        if self._thread is None:
+            self.start()
+        self._stopped.wait()
+
+    async def serve(self) -> None:
+        # Асинхронный режим бота: сервер и разбор очереди работают на loop
+        # вызывающего, consumer вызывается прямо на нём и не должен блокировать
+        await self._start_server()
+        logger.info(
+            "Webhook listening on http://%s:%d%s", self._host, self.port, self._path
+        )
+        try:
+            await self._consume(inline=True)
+        finally:
+            if self._server is not None:
+                self._server.close()
+
+    def stop(self) -> None:
+        if self._loop is not None and not self._stopped.is_set():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run_loop(self) -> None:
+        loop = asyncio.new_event_loop()
+        self._loop = loop
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._start_server())
+        except Exception:
+            logger.exception("Failed to start webhook server")
+            self._ready.set()
+            self._stopped.set()
+            loop.close()
+            return
+        self._ready.set()
+        consumer_task = loop.create_task(self._consume())
+        try:
+            loop.run_forever()
+        finally:
+            consumer_task.cancel()
+            if self._server is not None:
+                self._server.close()
+            loop.run_until_complete(
+                asyncio.gather(consumer_task, return_exceptions=True)
+            )
+            loop.close()
+            self._stopped.set()
+
+    async def _start_server(self) -> None:
+        self._server = await asyncio.start_server(
+            self._handle_connection, self._host, self._port, limit=MAX_HEADER_SIZE
+        )
+
+    async def _consume(self, inline: bool = False) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self._max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                if inline:
+                    self._consumer(batch)
+                else:
+                    await asyncio.to_thread(self._consumer, batch)
+            except Exception:
+                logger.exception("Failed to process %d webhook updates", len(batch))
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        # Telegram держит соединения открытыми (max_connections), поэтому
+        # обслуживаем keep-alive до закрытия клиентом
+        try:
+            while True:
+                keep_alive = await self._handle_request(reader, writer)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception:
+            logger.exception("Webhook connection failed")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _handle_request(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> bool:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            await _respond(writer, 413, keep_alive=False)
+            return False
+        except asyncio.IncompleteReadError as error:
+            if error.partial:
+                raise
+            return False
+
+        try:
+            method, target, headers = _parse_head(head)
+            body = await _read_body(reader, headers)
+            self._accept(method, target, headers, body)
+        except _HttpError as error:
+            # После ошибки тело могло остаться непрочитанным — соединение закрываем
+            await _respond(writer, error.status, keep_alive=False)
+            return False
+        keep_alive = headers.get("connection", "").lower() != "close"
+        await _respond(writer, 200, keep_alive=keep_alive)
+        return keep_alive
+
+    def _accept(
+        self, method: str, target: str, headers: dict[str, str], body: bytes
+    ) -> None:
+        if target.split("?")[0] != self._path:
+            raise _HttpError(404)
+        if method != "POST":
+            raise _HttpError(405)
+        secret = headers.get(SECRET_HEADER, "").encode()
+        if not hmac.compare_digest(secret, self._secret):
+            logger.warning("Webhook request with invalid secret token rejected")
+            raise _HttpError(401)
+        try:
+            update = types.Update.de_json(json.loads(body))
+        except (ValueError, TypeError, KeyError, AttributeError):
+            logger.warning("Webhook request with malformed update rejected")
+            raise _HttpError(400) from None
+        if update is None:
+            raise _HttpError(400)
+        try:
+            self._queue.put_nowait(update)
+        except asyncio.QueueFull:
+            # Telegram повторит доставку сам — лучше, чем копить память
+            logger.warning(
+                "Webhook queue is full, update %d deferred", update.update_id
+            )
+            raise _HttpError(503) from None
+
+
+def _parse_head(head: bytes) -> tuple[str, str, dict[str, str]]:
+    lines = head.decode("latin-1").split("\r\n")
+    parts = lines[0].split(" ")
+    if len(parts) != 3:
+        raise _HttpError(400)
+    headers: dict[str, str] = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return parts[0], parts[1], headers
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: dict[str, str]) -> bytes:
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise _HttpError(400) from None
+    if length < 0:
+        raise _HttpError(400)
+    if length > MAX_BODY_SIZE:
+        raise _HttpError(413)
+    return await reader.readexactly(length)
+
+
+async def _respond(writer: asyncio.StreamWriter, status: int, keep_alive: bool) -> None:
+    writer.write(
+        (
+            f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+            "Content-Length: 0\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        ).encode()
+    )
+    await writer.drain()
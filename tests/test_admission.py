@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from src.agent.admission import AdmissionController
+
+
+def _run(coro: object) -> object:
+    return asyncio.new_event_loop().run_until_complete(coro)  # type:ignore[arg-type]
+
+
+class TestAdmissionController:
+    def test_unlimited_by_default(self) -> None:
+        controller = AdmissionController()
+
+        async def scenario() -> int:
+            async with controller.slot(1), controller.slot(2):
+                return controller.active
+
+        assert _run(scenario()) == 2
+
+    def test_queues_past_limit_and_reports_positions(self) -> None:
+        controller = AdmissionController(max_concurrent=1)
+        positions: dict[int, list[int]] = {2: [], 3: []}
+        order: list[int] = []
+
+        async def turn(user_id: int, release: asyncio.Event) -> None:
+            async with controller.slot(user_id, positions.get(user_id, []).append):
+                order.append(user_id)
+                await release.wait()
+
+        async def scenario() -> None:
+            first, second, third = asyncio.Event(), asyncio.Event(), asyncio.Event()
+            tasks = [asyncio.create_task(turn(1, first))]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.create_task(turn(2, second)))
+            tasks.append(asyncio.create_task(turn(3, third)))
+            await asyncio.sleep(0)
+            assert (controller.active, controller.queued) == (1, 2)
+            first.set()
+            await asyncio.sleep(0.01)
+            second.set()
+            await asyncio.sleep(0.01)
+            third.set()
+            await asyncio.gather(*tasks)
+
+        _run(scenario())
+
+        assert order == [1, 2, 3]
+        assert positions == {2: [1, 0], 3: [2, 1, 0]}
+        assert (controller.active, controller.queued) == (0, 0)
+
+    def test_cancelled_waiter_leaves_queue(self) -> None:
+        controller = AdmissionController(max_concurrent=1)
+        positions: list[int] = []
+
+        async def scenario() -> None:
+            release = asyncio.Event()
+
+            async def hold() -> None:
+                async with controller.slot(1):
+                    await release.wait()
+
+            async def wait_slot(user_id: int) -> None:
+                async with controller.slot(user_id, positions.append):
+                    pass
+
+            holder = asyncio.create_task(hold())
+            await asyncio.sleep(0)
+            cancelled = asyncio.create_task(wait_slot(2))
+            waiting = asyncio.create_task(wait_slot(3))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await cancelled
+            release.set()
+            await asyncio.gather(holder, waiting)
+
+        _run(scenario())
+
+        # Пользователь 3 поднялся со второй позиции на первую и получил слот
+        assert positions == [1, 2, 1, 0]
+        assert (controller.active, controller.queued) == (0, 0)
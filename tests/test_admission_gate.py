@@ -0,0 +1,39 @@
+from src.agent.sharding.admission_gate import AdmissionGate
+
+
+class TestAdmissionGate:
+    def test_unlimited_by_default(self) -> None:
+        gate = AdmissionGate()
+        sent: list[int] = []
+
+        gate.submit(1, lambda: sent.append(1))
+        gate.submit(2, lambda: sent.append(2))
+
+        assert sent == [1, 2]
+        assert gate.active == 2
+
+    def test_queues_users_past_limit_and_reports_positions(self) -> None:
+        gate = AdmissionGate(max_concurrent=1)
+        sent: list[str] = []
+        positions: dict[int, list[int]] = {2: [], 3: []}
+
+        gate.submit(1, lambda: sent.append("1a"))
+        gate.submit(2, lambda: sent.append("2a"), positions[2].append)
+        gate.submit(3, lambda: sent.append("3a"), positions[3].append)
+        gate.submit(2, lambda: sent.append("2b"), positions[2].append)
+        # Пока у пользователя есть слот, его сообщения уходят сразу
+        gate.submit(1, lambda: sent.append("1b"))
+        assert sent == ["1a", "1b"]
+        assert (gate.active, gate.queued) == (1, 2)
+
+        gate.release(1)
+        assert sent == ["1a", "1b"]
+        gate.release(1)
+        assert sent == ["1a", "1b", "2a", "2b"]
+        gate.release(2)
+        gate.release(2)
+        gate.release(3)
+
+        assert sent == ["1a", "1b", "2a", "2b", "3a"]
+        assert positions == {2: [1, 1, 0, 0], 3: [2, 1, 0]}
+        assert (gate.active, gate.queued) == (0, 0)
@@ -1,22 +1,58 @@
+import asyncio
+import logging
+import subprocess
+import sys
+import threading
+import time
 from collections.abc import AsyncIterator
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from claude_agent_sdk import AssistantMessage, ResultMessage, TextBlock
+from claude_agent_sdk import (
+    AssistantMessage,
+    ResultMessage,
+    SystemMessage,
+    TextBlock,
+    ToolResultBlock,
+    ToolUseBlock,
+    UserMessage,
+)
 
 from src.agent.client import AgentClient
+from src.agent.compaction_policy import CompactionPolicy
+from src.agent.events import (
+    AgentEvent,
+    AgentMergedEvent,
+    AgentQueuedEvent,
+    AgentTextEvent,
+    AgentToolEvent,
+)
+from src.agent.session_stats import SessionStats
 from src.agent.tools.registry import SessionRegistry
+from src.agent.usage import TurnUsage, UsageRollups, UsageTotals
+from src.agent.usage_recorder import UsageRecorder
+from src.logs.context import ContextFilter
+from src.logs.session_buffer import SessionLogBuffer
+from src.metrics import names
+from src.metrics.registry import MetricsRegistry
 
 
-def _create_agent() -> AgentClient:
+def _create_agent(**kwargs: Any) -> AgentClient:
     registry = SessionRegistry()
     bot = MagicMock()
-    return AgentClient(session_registry=registry, bot=bot)
+    kwargs.setdefault("coalesce_window", 0)
+    return AgentClient(session_registry=registry, bot=bot, **kwargs)
 
 
 def _make_result_message(
     *, is_error: bool = False, result: str | None = None
 ) -> MagicMock:
     msg = MagicMock(spec=ResultMessage)
+    msg.subtype = "success"
     msg.is_error = is_error
     msg.result = result
     msg.num_turns = 1
@@ -38,7 +74,7 @@ class TestAgentClientSendMessage:
         mock_client.query = AsyncMock()
         mock_client.receive_response = fake_receive
 
-        with patch("src.agent.client.ClaudeSDKClient", return_value=mock_client):
+        with patch("claude_agent_sdk.ClaudeSDKClient", return_value=mock_client):
             agent = _create_agent()
             result = agent.send_message(user_id=1, chat_id=100, text="Hi")
 
@@ -56,7 +92,7 @@ class TestAgentClientSendMessage:
         mock_client.query = AsyncMock()
         mock_client.receive_response = fake_receive
 
-        with patch("src.agent.client.ClaudeSDKClient", return_value=mock_client):
+        with patch("claude_agent_sdk.ClaudeSDKClient", return_value=mock_client):
             agent = _create_agent()
             result = agent.send_message(user_id=1, chat_id=100, text="Hi")
 
@@ -73,7 +109,7 @@ class TestAgentClientSendMessage:
         mock_client.query = AsyncMock()
         mock_client.receive_response = fake_receive
 
-        with patch("src.agent.client.ClaudeSDKClient", return_value=mock_client):
+        with patch("claude_agent_sdk.ClaudeSDKClient", return_value=mock_client):
             agent = _create_agent()
             result = agent.send_message(user_id=1, chat_id=100, text="Hi")
 
@@ -94,16 +130,14 @@ class TestAgentClientSendMessage:
         mock_client.query = AsyncMock()
         mock_client.receive_response = fake_receive
 
-        with patch("src.agent.client.ClaudeSDKClient", return_value=mock_client):
+        with patch("claude_agent_sdk.ClaudeSDKClient", return_value=mock_client):
             agent = _create_agent()
             result = agent.send_message(user_id=1, chat_id=100, text="Hi")
 
         assert result == "Hello!"
 
     def test_raises_on_sdk_error(self) -> None:
-        error_msg = _make_result_message(
-            is_error=True, result="Something went wrong"
-        )
+        error_msg = _make_result_message(is_error=True, result="Something went wrong")
 
         async def fake_receive() -> AsyncIterator[MagicMock]:
             yield error_msg
@@ -114,7 +148,7 @@ class TestAgentClientSendMessage:
         mock_client.receive_response = fake_receive
         mock_client.disconnect = AsyncMock()
 
-        with patch("src.agent.client.ClaudeSDKClient", return_value=mock_client):
+        with patch("claude_agent_sdk.ClaudeSDKClient", return_value=mock_client):
             agent = _create_agent()
             try:
                 agent.send_message(user_id=1, chat_id=100, text="Hi")
@@ -124,3 +158,714 @@ class TestAgentClientSendMessage:
                 assert "Something went wrong" in str(e)
 
         assert raised
+
+    def test_dumps_session_log_on_error(self, caplog: pytest.LogCaptureFixture) -> None:
+        error_msg = _make_result_message(is_error=True, result="Something went wrong")
+
+        async def fake_receive() -> AsyncIterator[MagicMock]:
+            yield error_msg
+
+        mock_client = AsyncMock()
+        mock_client._transport = None
+        mock_client.receive_response = fake_receive
+        buffer = SessionLogBuffer()
+        buffer.addFilter(ContextFilter())
+        root = logging.getLogger()
+        root.addHandler(buffer)
+        try:
+            with (
+                patch("claude_agent_sdk.ClaudeSDKClient", return_value=mock_client),
+                caplog.at_level("DEBUG"),
+            ):
+                agent = _create_agent(log_buffer=buffer)
+                with pytest.raises(RuntimeError):
+                    agent.send_message(user_id=1, chat_id=100, text="Hi")
+        finally:
+            root.removeHandler(buffer)
+
+        (dump,) = [
+            r for r in caplog.records if r.getMessage().startswith("Turn failed")
+        ]
+        assert dump.user_id == 1
+        assert "Connecting SDK client for user=1" in dump.getMessage()
+        # Выгрузка не попадает в буфер сама
+        assert not any("Turn failed" in line for line in buffer.dump(1))
+
+
+class TestAgentClientStreaming:
+    def test_emits_text_and_tool_events(self) -> None:
+        assistant_msg = MagicMock(spec=AssistantMessage)
+        tool_block = MagicMock(spec=ToolUseBlock)
+        tool_block.id = "toolu_1"
+        tool_block.name = "Bash"
+        tool_block.input = {"command": "ls"}
+        assistant_msg.content = [tool_block, MagicMock(spec=TextBlock, text="Hello!")]
+
+        async def fake_receive() -> AsyncIterator[MagicMock]:
+            yield assistant_msg
+
+        mock_client = AsyncMock()
+        mock_client._transport = MagicMock()
+        mock_client.query = AsyncMock()
+        mock_client.receive_response = fake_receive
+
+        events: list[AgentEvent] = []
+        with patch("claude_agent_sdk.ClaudeSDKClient", return_value=mock_client):
+            agent = _create_agent()
+            result = agent.send_message(
+                user_id=1, chat_id=100, text="Hi", on_event=events.append
+            )
+
+        assert result == "Hello!"
+        assert events == [AgentToolEvent(name="Bash"), AgentTextEvent(text="Hello!")]
+
+
+class _BlockingFirstTurn:
+    def __init__(self) -> None:
+        self.release = threading.Event()
+        self.queries: list[str] = []
+        self.client = AsyncMock()
+        self.client._transport = MagicMock()
+        self.client.query = self._query
+        self.client.receive_response = self._receive
+
+    async def _query(self, text: str) -> None:
+        self.queries.append(text)
+
+    async def _receive(self) -> AsyncIterator[MagicMock]:
+        if len(self.queries) == 1:
+            while not self.release.is_set():
+                await asyncio.sleep(0.01)
+        yield _make_result_message(result=self.queries[-1])
+
+    def wait_started(self) -> None:
+        for _ in range(500):
+            if self.queries:
+                return
+            time.sleep(0.01)
+        raise TimeoutError("first turn did not start")
+
+
+class TestAgentClientDispatch:
+    def test_keeps_per_user_order_and_does_not_block_context(self) -> None:
+        fake = _BlockingFirstTurn()
+
+        with patch("claude_agent_sdk.ClaudeSDKClient", return_value=fake.client):
+            agent = _create_agent()
+            first = agent.submit_message(user_id=1, chat_id=100, text="first")
+            fake.wait_started()
+            second = agent.submit_message(user_id=1, chat_id=100, text="second")
+
+            agent.get_context(1)
+            assert not first.done()
+            assert not second.done()
+
+            fake.release.set()
+
+            assert first.result(timeout=5) == "first"
+            assert second.result(timeout=5) == "second"
+
+        assert fake.queries == ["first", "second"]
+
+
+class TestAgentClientCoalescing:
+    def test_merges_messages_sent_during_turn(self) -> None:
+        fake = _BlockingFirstTurn()
+        events: list[AgentEvent] = []
+
+        with patch("claude_agent_sdk.ClaudeSDKClient", return_value=fake.client):
+            agent = _create_agent()
+            first = agent.submit_message(user_id=1, chat_id=100, text="first")
+            fake.wait_started()
+            second = agent.submit_message(
+                user_id=1, chat_id=100, text="second", on_event=events.append
+            )
+            third = agent.submit_message(user_id=1, chat_id=100, text="third")
+            time.sleep(0.05)
+            fake.release.set()
+
+            assert first.result(timeout=5) == "first"
+            assert second.result(timeout=5) == ""
+            assert third.result(timeout=5) == "second\n\nthird"
+
+        assert fake.queries == ["first", "second\n\nthird"]
+        assert events == [AgentMergedEvent()]
+
+    def test_respects_max_batch_size(self) -> None:
+        fake = _BlockingFirstTurn()
+
+        with patch("claude_agent_sdk.ClaudeSDKClient", return_value=fake.client):
+            agent = _create_agent(max_batch_size=2)
+            first = agent.submit_message(user_id=1, chat_id=100, text="first")
+            fake.wait_started()
+            futures = [
+                agent.submit_message(user_id=1, chat_id=100, text=text)
+                for text in ("a", "b", "c")
+            ]
+            time.sleep(0.05)
+            fake.release.set()
+
+            first.result(timeout=5)
+            for future in futures:
+                future.result(timeout=5)
+
+        assert fake.queries == ["first", "a\n\nb", "c"]
+
+
+class TestAgentClientPool:
+    def test_resumes_session_after_eviction(self) -> None:
+        init_msg = MagicMock(spec=SystemMessage)
+        init_msg.subtype = "init"
+        init_msg.data = {"model": "claude", "session_id": "session-1"}
+
+        async def fake_receive() -> AsyncIterator[MagicMock]:
+            yield init_msg
+            yield _make_result_message(result="ok")
+
+        created_options: list[Any] = []
+
+        def make_client(options: Any) -> AsyncMock:
+            created_options.append(options)
+            client = AsyncMock()
+            client._transport = MagicMock()
+            client.receive_response = fake_receive
+            return client
+
+        with patch("claude_agent_sdk.ClaudeSDKClient", side_effect=make_client):
+            agent = _create_agent(max_clients=1)
+            agent.send_message(user_id=1, chat_id=100, text="Hi")
+            agent.send_message(user_id=2, chat_id=200, text="Hi")
+            agent.send_message(user_id=1, chat_id=100, text="Again")
+
+            context = agent.get_context(1)
+
+        assert [options.resume for options in created_options] == [
+            None,
+            None,
+            "session-1",
+        ]
+        assert "Messages: 2" in context
+
+
+def _make_connectable_client(receive: Any) -> AsyncMock:
+    client = AsyncMock()
+    client._transport = None
+
+    async def fake_connect() -> None:
+        client._transport = MagicMock()
+
+    client.connect = AsyncMock(side_effect=fake_connect)
+    client.receive_response = receive
+    return client
+
+
+class TestAgentClientPrewarm:
+    def test_prewarmed_client_skips_connect_on_first_message(self) -> None:
+        async def fake_receive() -> AsyncIterator[MagicMock]:
+            yield _make_result_message(result="ok")
+
+        mock_client = _make_connectable_client(fake_receive)
+
+        with patch("claude_agent_sdk.ClaudeSDKClient", return_value=mock_client):
+            agent = _create_agent()
+            agent.prewarm([1])
+            for _ in range(500):
+                if mock_client._transport is not None:
+                    break
+                time.sleep(0.01)
+
+            mock_client.connect.assert_awaited_once()
+            agent.send_message(user_id=1, chat_id=100, text="Hi")
+
+        mock_client.connect.assert_awaited_once()
+
+    def test_warm_spare_reconnects_after_reset(self) -> None:
+        async def fake_receive() -> AsyncIterator[MagicMock]:
+            yield _make_result_message(result="ok")
+
+        clients: list[AsyncMock] = []
+
+        def make_client(options: Any) -> AsyncMock:
+            client = _make_connectable_client(fake_receive)
+            clients.append(client)
+            return client
+
+        with patch("claude_agent_sdk.ClaudeSDKClient", side_effect=make_client):
+            agent = _create_agent(warm_spare=True)
+            agent.send_message(user_id=1, chat_id=100, text="Hi")
+            agent.reset_client(1)
+            for _ in range(500):
+                if len(clients) == 2 and clients[1]._transport is not None:
+                    break
+                time.sleep(0.01)
+
+        assert len(clients) == 2
+        clients[0].disconnect.assert_awaited_once()
+        clients[1].connect.assert_awaited_once()
+
+
+class _InMemorySessionStore:
+    def __init__(self) -> None:
+        self.sessions: dict[int, SessionStats] = {}
+
+    async def load(self, user_id: int) -> SessionStats | None:
+        return self.sessions.get(user_id)
+
+    async def save(self, user_id: int, stats: SessionStats) -> None:
+        self.sessions[user_id] = SessionStats.from_dict(stats.to_dict())
+
+    async def delete(self, user_id: int) -> None:
+        self.sessions.pop(user_id, None)
+
+
+class TestAgentClientSessionPersistence:
+    def _fake_sdk(self, created_options: list[Any]) -> Any:
+        init_msg = MagicMock(spec=SystemMessage)
+        init_msg.subtype = "init"
+        init_msg.data = {"model": "claude", "session_id": "session-1"}
+
+        async def fake_receive() -> AsyncIterator[MagicMock]:
+            yield init_msg
+            yield _make_result_message(result="ok")
+
+        def make_client(options: Any) -> AsyncMock:
+            created_options.append(options)
+            client = AsyncMock()
+            client._transport = MagicMock()
+            client.receive_response = fake_receive
+            return client
+
+        return make_client
+
+    def test_resumes_stored_session_after_restart(self) -> None:
+        store = _InMemorySessionStore()
+        created_options: list[Any] = []
+
+        with patch(
+            "claude_agent_sdk.ClaudeSDKClient",
+            side_effect=self._fake_sdk(created_options),
+        ):
+            _create_agent(session_store=store).send_message(
+                user_id=1, chat_id=100, text="Hi"
+            )
+            restarted = _create_agent(session_store=store)
+            context = restarted.get_context(1)
+            restarted.send_message(user_id=1, chat_id=100, text="Again")
+
+        assert "Messages: 1" in context
+        assert [options.resume for options in created_options] == [None, "session-1"]
+        assert store.sessions[1].total_messages == 2
+
+    def test_clear_forgets_stored_session(self) -> None:
+        store = _InMemorySessionStore()
+        created_options: list[Any] = []
+
+        with patch(
+            "claude_agent_sdk.ClaudeSDKClient",
+            side_effect=self._fake_sdk(created_options),
+        ):
+            agent = _create_agent(session_store=store)
+            agent.send_message(user_id=1, chat_id=100, text="Hi")
+            agent.reset_client(1)
+            agent.send_message(user_id=1, chat_id=100, text="Again")
+
+        assert [options.resume for options in created_options] == [None, None]
+
+
+class TestAgentClientMetrics:
+    def test_records_turn_breakdown(self) -> None:
+        async def fake_receive() -> AsyncIterator[Any]:
+            yield AssistantMessage(
+                content=[ToolUseBlock(id="toolu_1", name="Bash", input={})],
+                model="claude",
+            )
+            await asyncio.sleep(0.05)
+            yield UserMessage(content=[ToolResultBlock(tool_use_id="toolu_1")])
+            yield AssistantMessage(content=[TextBlock(text="Done")], model="claude")
+            yield _make_result_message()
+
+        mock_client = AsyncMock()
+        mock_client._transport = MagicMock()
+        mock_client.query = AsyncMock()
+        mock_client.receive_response = fake_receive
+
+        metrics = MetricsRegistry()
+        with patch("claude_agent_sdk.ClaudeSDKClient", return_value=mock_client):
+            agent = _create_agent(metrics=metrics)
+            agent.send_message(user_id=1, chat_id=100, text="Hi")
+
+        tool = metrics.quantiles(names.TOOL, (0.5,), user="1", tool="Bash")
+        assert tool is not None
+        assert tool[0] >= 0.05
+        for name in (names.QUEUE_WAIT, names.FIRST_BLOCK, names.TURN):
+            assert metrics.quantiles(name, (0.5,), user="1") is not None
+        assert "Latency p50 / p95:" in agent.get_context(1)
+
+
+class TestAgentClientTrace:
+    def test_records_tool_timeline_and_warns_on_slow_tool(
+        self, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        async def fake_receive() -> AsyncIterator[Any]:
+            yield AssistantMessage(
+                content=[ToolUseBlock(id="toolu_1", name="Bash", input={"c": "x"})],
+                model="claude",
+            )
+            await asyncio.sleep(0.05)
+            yield UserMessage(
+                content=[ToolResultBlock(tool_use_id="toolu_1", content="output")]
+            )
+            yield AssistantMessage(content=[TextBlock(text="Done")], model="claude")
+
+        mock_client = AsyncMock()
+        mock_client._transport = MagicMock()
+        mock_client.query = AsyncMock()
+        mock_client.receive_response = fake_receive
+
+        with patch("claude_agent_sdk.ClaudeSDKClient", return_value=mock_client):
+            agent = _create_agent(slow_tool_threshold=0.01)
+            with caplog.at_level("WARNING"):
+                agent.send_message(user_id=1, chat_id=100, text="Hi")
+                agent.send_message(user_id=1, chat_id=100, text="Again")
+
+        trace = agent.get_trace(1, turns=1)
+        assert trace.count("Turn ") == 1
+        assert "Bash" in trace
+        assert "out=6B" in trace
+        assert "Slow tool Bash" in caplog.text
+        assert agent.get_trace(2) == "Нет записанных ходов"
+
+
+class TestAgentClientCompaction:
+    def _fake_sdk(
+        self, queries: list[str], input_tokens: int, compact_fails: bool = False
+    ) -> Any:
+        init_msg = MagicMock(spec=SystemMessage)
+        init_msg.subtype = "init"
+        init_msg.data = {"model": "claude", "session_id": "session-1"}
+
+        def make_client(options: Any) -> AsyncMock:
+            client = AsyncMock()
+            client._transport = MagicMock()
+
+            async def fake_query(text: str) -> None:
+                queries.append(text)
+
+            async def fake_receive() -> AsyncIterator[MagicMock]:
+                yield init_msg
+                compacting = queries[-1] == "/compact"
+                result = _make_result_message(
+                    is_error=compacting and compact_fails, result="ok"
+                )
+                result.usage = {
+                    "input_tokens": 0 if compacting else input_tokens,
+                    "cache_read_input_tokens": 0,
+                    "output_tokens": 10,
+                }
+                yield result
+
+            client.query = AsyncMock(side_effect=fake_query)
+            client.receive_response = fake_receive
+            return client
+
+        return make_client
+
+    def test_compacts_in_background_when_idle(self) -> None:
+        queries: list[str] = []
+        policy = CompactionPolicy(idle_threshold=1000, idle_delay=0.05)
+
+        with patch(
+            "claude_agent_sdk.ClaudeSDKClient",
+            side_effect=self._fake_sdk(queries, input_tokens=5000),
+        ):
+            agent = _create_agent(compaction=policy)
+            agent.send_message(user_id=1, chat_id=100, text="Hi")
+            for _ in range(200):
+                if queries[-1] == "/compact":
+                    break
+                time.sleep(0.01)
+            context = agent.get_context(1)
+
+        assert queries == ["Hi", "/compact"]
+        assert "Compactions: 1" in context
+        assert "Messages: 1" in context
+
+    def test_failed_idle_compaction_waits_for_next_turn(self) -> None:
+        queries: list[str] = []
+        policy = CompactionPolicy(idle_threshold=1000, idle_delay=0.02)
+
+        with patch(
+            "claude_agent_sdk.ClaudeSDKClient",
+            side_effect=self._fake_sdk(queries, input_tokens=5000, compact_fails=True),
+        ):
+            agent = _create_agent(compaction=policy)
+            agent.send_message(user_id=1, chat_id=100, text="Hi")
+            time.sleep(0.3)
+            after_first_turn = list(queries)
+            agent.send_message(user_id=1, chat_id=100, text="Again")
+            time.sleep(0.3)
+
+        assert after_first_turn == ["Hi", "/compact"]
+        assert queries == ["Hi", "/compact", "Again", "/compact"]
+
+    def test_new_message_cancels_idle_compaction(self) -> None:
+        queries: list[str] = []
+        policy = CompactionPolicy(idle_threshold=1000, idle_delay=0.2)
+
+        with patch(
+            "claude_agent_sdk.ClaudeSDKClient",
+            side_effect=self._fake_sdk(queries, input_tokens=5000),
+        ):
+            agent = _create_agent(compaction=policy)
+            agent.send_message(user_id=1, chat_id=100, text="Hi")
+            agent.send_message(user_id=1, chat_id=100, text="Again")
+            agent.reset_client(1)
+            time.sleep(0.3)
+
+        assert queries == ["Hi", "Again"]
+
+    def test_compacts_before_turn_past_hard_threshold(self) -> None:
+        queries: list[str] = []
+        policy = CompactionPolicy(hard_threshold=1000)
+
+        with patch(
+            "claude_agent_sdk.ClaudeSDKClient",
+            side_effect=self._fake_sdk(queries, input_tokens=5000),
+        ):
+            agent = _create_agent(compaction=policy)
+            agent.send_message(user_id=1, chat_id=100, text="Hi")
+            agent.send_message(user_id=1, chat_id=100, text="Again")
+
+        assert queries == ["Hi", "/compact", "Again"]
+
+    def test_small_context_is_not_compacted(self) -> None:
+        queries: list[str] = []
+        policy = CompactionPolicy(
+            idle_threshold=1000, hard_threshold=1000, idle_delay=0.01
+        )
+
+        with patch(
+            "claude_agent_sdk.ClaudeSDKClient",
+            side_effect=self._fake_sdk(queries, input_tokens=500),
+        ):
+            agent = _create_agent(compaction=policy)
+            agent.send_message(user_id=1, chat_id=100, text="Hi")
+            agent.send_message(user_id=1, chat_id=100, text="Again")
+            time.sleep(0.1)
+
+        assert queries == ["Hi", "Again"]
+
+
+class TestAgentClientOptions:
+    def test_options_template_is_shared_between_users(self) -> None:
+        async def fake_receive() -> AsyncIterator[MagicMock]:
+            yield _make_result_message(result="ok")
+
+        created_options: list[Any] = []
+
+        def make_client(options: Any) -> AsyncMock:
+            created_options.append(options)
+            client = AsyncMock()
+            client._transport = MagicMock()
+            client.receive_response = fake_receive
+            return client
+
+        with patch("claude_agent_sdk.ClaudeSDKClient", side_effect=make_client):
+            agent = _create_agent()
+            agent.send_message(user_id=1, chat_id=100, text="Hi")
+            agent.send_message(user_id=2, chat_id=200, text="Hi")
+
+        assert created_options[0] is created_options[1]
+        assert created_options[0].setting_sources == ["user", "project", "local"]
+
+    def test_mcp_server_is_built_with_first_client(self) -> None:
+        async def fake_receive() -> AsyncIterator[MagicMock]:
+            yield _make_result_message(result="ok")
+
+        mock_client = AsyncMock()
+        mock_client._transport = MagicMock()
+        mock_client.receive_response = fake_receive
+        mcp_server_factory = MagicMock(return_value={"type": "sdk"})
+
+        with patch(
+            "claude_agent_sdk.ClaudeSDKClient", return_value=mock_client
+        ) as client_class:
+            agent = _create_agent(mcp_server_factory=mcp_server_factory)
+            mcp_server_factory.assert_not_called()
+            agent.send_message(user_id=1, chat_id=100, text="Hi")
+            agent.send_message(user_id=2, chat_id=200, text="Hi")
+
+        mcp_server_factory.assert_called_once_with()
+        options = client_class.call_args.args[0]
+        assert options.mcp_servers == {"bot-tools": {"type": "sdk"}}
+
+    def test_bot_startup_does_not_import_sdk(self) -> None:
+        # В этом процессе SDK уже импортирован тестами — проверяем в чистом
+        code = (
+            "import sys, workers.bot.__main__; "
+            "sys.exit('claude_agent_sdk' in sys.modules)"
+        )
+        result = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", code],
+            cwd=Path(__file__).parent.parent,
+            check=False,
+        )
+
+        assert result.returncode == 0
+
+
+class _InMemoryUsageStore:
+    def __init__(self) -> None:
+        self.usages: list[TurnUsage] = []
+
+    async def record(self, usages: list[TurnUsage]) -> None:
+        self.usages.extend(usages)
+
+    async def load_rollups(self, user_id: int, today: date) -> UsageRollups:
+        totals = UsageTotals()
+        for usage in self.usages:
+            totals += UsageTotals(cost_usd=usage.cost_usd, messages=usage.messages)
+        return UsageRollups(
+            total=totals, today=totals, last_days=totals, days=7, models={}
+        )
+
+
+class TestAgentClientUsage:
+    def test_stats_survive_clear(self) -> None:
+        async def fake_receive() -> AsyncIterator[MagicMock]:
+            yield _make_result_message(result="ok")
+
+        mock_client = AsyncMock()
+        mock_client._transport = MagicMock()
+        mock_client.receive_response = fake_receive
+        store = _InMemoryUsageStore()
+
+        with patch("claude_agent_sdk.ClaudeSDKClient", return_value=mock_client):
+            agent = _create_agent(
+                usage_recorder=UsageRecorder(store, flush_interval=60)
+            )
+            agent.send_message(user_id=1, chat_id=100, text="Hi")
+            agent.reset_client(1)
+            agent.send_message(user_id=1, chat_id=100, text="Again")
+            stats = agent.get_stats(1)
+
+        assert [usage.messages for usage in store.usages] == [1, 1]
+        assert "Total: $0.0020, 2 messages" in stats
+
+
+def _make_interruptible_client(
+    ignore_interrupt: bool = False,
+) -> tuple[AsyncMock, threading.Event]:
+    client = AsyncMock()
+    client._transport = MagicMock()
+    started = threading.Event()
+    interrupted = asyncio.Event()
+
+    async def fake_interrupt() -> None:
+        if not ignore_interrupt:
+            interrupted.set()
+
+    async def fake_receive() -> AsyncIterator[Any]:
+        yield AssistantMessage(content=[TextBlock(text="Partial")], model="claude")
+        started.set()
+        await interrupted.wait()
+        result = _make_result_message(is_error=True, result="Interrupted")
+        result.subtype = "error_during_execution"
+        yield result
+
+    client.interrupt = AsyncMock(side_effect=fake_interrupt)
+    client.receive_response = fake_receive
+    return client, started
+
+
+class TestAgentClientStop:
+    def test_stop_delivers_partial_output_and_keeps_session(self) -> None:
+        mock_client, started = _make_interruptible_client()
+
+        with patch("claude_agent_sdk.ClaudeSDKClient", return_value=mock_client):
+            agent = _create_agent()
+            future = agent.submit_message(user_id=1, chat_id=100, text="Long task")
+            assert started.wait(timeout=2)
+
+            assert agent.interrupt(1) is True
+            result = future.result(timeout=2)
+            context = agent.get_context(1)
+
+        assert result == "Partial\n\n⏹ Остановлено: команда /stop"
+        assert "Messages: 1" in context
+        mock_client.disconnect.assert_not_awaited()
+
+    def test_returns_false_without_running_turn(self) -> None:
+        agent = _create_agent()
+
+        assert agent.interrupt(1) is False
+
+    def test_watchdog_interrupts_turn_past_timeout(self) -> None:
+        mock_client, _started = _make_interruptible_client()
+
+        with patch("claude_agent_sdk.ClaudeSDKClient", return_value=mock_client):
+            agent = _create_agent(turn_timeout=0.05)
+            result = agent.send_message(user_id=1, chat_id=100, text="Long task")
+
+        assert result == "Partial\n\n⏹ Остановлено: лимит времени 0 с"
+        mock_client.interrupt.assert_awaited_once()
+
+    def test_drops_client_that_ignores_interrupt(self) -> None:
+        mock_client, _started = _make_interruptible_client(ignore_interrupt=True)
+
+        with patch("claude_agent_sdk.ClaudeSDKClient", return_value=mock_client):
+            agent = _create_agent(turn_timeout=0.05, interrupt_grace=0.05)
+            result = agent.send_message(user_id=1, chat_id=100, text="Long task")
+
+        assert result.startswith("Partial\n\n⏹ Остановлено")
+        mock_client.disconnect.assert_awaited_once()
+
+    def test_max_turns_result_is_partial_not_error(self) -> None:
+        async def fake_receive() -> AsyncIterator[Any]:
+            yield AssistantMessage(content=[TextBlock(text="Step")], model="claude")
+            result = _make_result_message(is_error=True)
+            result.subtype = "error_max_turns"
+            yield result
+
+        created_options: list[Any] = []
+
+        def make_client(options: Any) -> AsyncMock:
+            created_options.append(options)
+            client = AsyncMock()
+            client._transport = MagicMock()
+            client.receive_response = fake_receive
+            return client
+
+        with patch("claude_agent_sdk.ClaudeSDKClient", side_effect=make_client):
+            agent = _create_agent(max_turn_steps=5)
+            result = agent.send_message(user_id=1, chat_id=100, text="Task")
+            context = agent.get_context(1)
+
+        assert created_options[0].max_turns == 5
+        assert result == "Step\n\n⏹ Остановлено: лимит шагов 5"
+        assert "Messages: 1" in context
+
+
+class TestAgentClientAdmission:
+    def test_queues_turns_past_global_limit(self) -> None:
+        first_turn = _BlockingFirstTurn()
+        events: list[AgentEvent] = []
+
+        with patch("claude_agent_sdk.ClaudeSDKClient", return_value=first_turn.client):
+            agent = _create_agent(max_concurrent_turns=1)
+            first = agent.submit_message(user_id=1, chat_id=100, text="Long")
+            first_turn.wait_started()
+            second = agent.submit_message(
+                user_id=2, chat_id=200, text="Hi", on_event=events.append
+            )
+            for _ in range(200):
+                if events:
+                    break
+                time.sleep(0.01)
+            queued = list(events)
+            first_turn.release.set()
+            first.result(timeout=2)
+            second.result(timeout=2)
+
+        assert queued == [AgentQueuedEvent(position=1)]
+        assert events[1] == AgentQueuedEvent(position=0)
@@ -0,0 +1,84 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+from bot_framework.entities.role import Role
+from src.chat.handlers.async_command_handlers import (
+    AsyncStopCommandHandler,
+    AsyncTraceCommandHandler,
+)
+from src.chat.services.async_role_guard import AsyncRoleGuard
+
+
+def _message(text: str, user_id: int = 1) -> Any:
+    return SimpleNamespace(
+        text=text,
+        chat=SimpleNamespace(id=100),
+        from_user=SimpleNamespace(id=user_id),
+    )
+
+
+def _role_repo(*roles: str) -> MagicMock:
+    role_repo = MagicMock()
+    role_repo.get_user_roles.return_value = [
+        Role(id=i, name=name) for i, name in enumerate(roles)
+    ]
+    return role_repo
+
+
+class TestAsyncCommandHandlers:
+    def test_stop_replies_with_interrupt_result(self) -> None:
+        agent_client = MagicMock()
+        agent_client.interrupt_async = AsyncMock(return_value=True)
+        message_service = MagicMock()
+        message_service.send = AsyncMock()
+        handler = AsyncStopCommandHandler(
+            agent_client, message_service, AsyncRoleGuard(_role_repo("admin"))
+        )
+
+        asyncio.run(handler.handle(_message("/stop")))
+
+        agent_client.interrupt_async.assert_awaited_once_with(1)
+        message_service.send.assert_awaited_once_with(
+            chat_id=100, text="Останавливаю..."
+        )
+
+    def test_trace_passes_requested_turns(self) -> None:
+        agent_client = MagicMock()
+        agent_client.get_trace_async = AsyncMock(return_value="trace")
+        message_service = MagicMock()
+        message_service.send = AsyncMock()
+        handler = AsyncTraceCommandHandler(
+            agent_client, message_service, AsyncRoleGuard(_role_repo("admin"))
+        )
+
+        asyncio.run(handler.handle(_message("/trace 3")))
+
+        agent_client.get_trace_async.assert_awaited_once_with(1, 3)
+
+    def test_ignores_users_without_role(self) -> None:
+        agent_client = MagicMock()
+        agent_client.interrupt_async = AsyncMock(return_value=True)
+        message_service = MagicMock()
+        message_service.send = AsyncMock()
+        handler = AsyncStopCommandHandler(
+            agent_client, message_service, AsyncRoleGuard(_role_repo("user"))
+        )
+
+        asyncio.run(handler.handle(_message("/stop")))
+
+        agent_client.interrupt_async.assert_not_awaited()
+        message_service.send.assert_not_awaited()
+
+
+class TestAsyncRoleGuard:
+    def test_caches_roles_between_messages(self) -> None:
+        role_repo = _role_repo("admin")
+        guard = AsyncRoleGuard(role_repo, ttl=60.0)
+
+        async def scenario() -> list[bool]:
+            return [await guard.allows(1, {"admin"}) for _ in range(3)]
+
+        assert asyncio.run(scenario()) == [True, True, True]
+        role_repo.get_user_roles.assert_called_once_with(user_id=1)
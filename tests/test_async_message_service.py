@@ -0,0 +1,136 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Any
+
+from telebot.asyncio_helper import ApiTelegramException
+
+from src.telegram.async_message_service import AsyncTelegramMessageService
+from src.telegram.outbound_scheduler import RateLimits
+
+UNLIMITED = RateLimits(global_rate=1e6, chat_rate=1e6, chat_burst=1e6)
+
+
+def _api_error(code: int, description: str, **parameters: Any) -> ApiTelegramException:
+    result_json = {"ok": False, "error_code": code, "description": description}
+    if parameters:
+        result_json["parameters"] = parameters
+    return ApiTelegramException("editMessageText", None, result_json)
+
+
+class FakeAsyncBot:
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls: list[tuple[str, Any]] = []
+        self.errors: list[ApiTelegramException] = []
+        self._next_id = 1000
+
+    async def _record(self, method: str, value: Any) -> SimpleNamespace:
+        await asyncio.sleep(self.latency)
+        if self.errors:
+            raise self.errors.pop(0)
+        self.calls.append((method, value))
+        self._next_id += 1
+        return SimpleNamespace(message_id=self._next_id)
+
+    async def send_message(self, chat_id: int, text: str, **kwargs: Any) -> Any:
+        return await self._record("send", text)
+
+    async def edit_message_text(self, text: str, **kwargs: Any) -> Any:
+        return await self._record("edit", text)
+
+    async def delete_message(self, chat_id: int, message_id: int) -> Any:
+        return await self._record("delete", message_id)
+
+
+def _service(bot: FakeAsyncBot, limits: RateLimits = UNLIMITED) -> Any:
+    return AsyncTelegramMessageService(bot, limits)  # type: ignore[arg-type]
+
+
+class TestAsyncTelegramMessageService:
+    def test_keeps_order_within_chat(self) -> None:
+        bot = FakeAsyncBot(latency=0.01)
+        service = _service(bot)
+
+        async def scenario() -> None:
+            await asyncio.gather(
+                service.send(1, "first"),
+                service.replace(1, 10, "second"),
+                service.delete(1, 10),
+            )
+
+        asyncio.run(scenario())
+
+        assert bot.calls == [("send", "first"), ("edit", "second"), ("delete", 10)]
+
+    def test_progress_edits_collapse_to_latest(self) -> None:
+        bot = FakeAsyncBot(latency=0.01)
+        service = _service(bot)
+
+        async def scenario() -> None:
+            # Пока чат занят отправкой, три промежуточные правки ждут и схлопываются
+            await asyncio.gather(
+                service.send(1, "placeholder"),
+                service.replace_progress(1, 10, "a"),
+                service.replace_progress(1, 10, "ab"),
+                service.replace_progress(1, 10, "abc"),
+            )
+
+        asyncio.run(scenario())
+
+        assert bot.calls == [("send", "placeholder"), ("edit", "abc")]
+
+    def test_final_edit_supersedes_waiting_progress(self) -> None:
+        bot = FakeAsyncBot(latency=0.01)
+        service = _service(bot)
+
+        async def scenario() -> None:
+            await asyncio.gather(
+                service.send(1, "placeholder"),
+                service.replace_progress(1, 10, "partial"),
+                service.replace(1, 10, "final"),
+            )
+
+        asyncio.run(scenario())
+
+        assert bot.calls == [("send", "placeholder"), ("edit", "final")]
+
+    def test_retries_after_flood_limit(self) -> None:
+        bot = FakeAsyncBot()
+        bot.errors.append(_api_error(429, "Too Many Requests", retry_after=0.05))
+        service = _service(bot)
+
+        started = time.monotonic()
+        asyncio.run(service.replace(1, 10, "text"))
+
+        assert bot.calls == [("edit", "text")]
+        assert time.monotonic() - started >= 0.05
+
+    def test_ignores_not_modified_edit(self) -> None:
+        bot = FakeAsyncBot()
+        bot.errors.append(
+            _api_error(400, "Bad Request: message is not modified: same content")
+        )
+        service = _service(bot)
+
+        message = asyncio.run(service.replace(1, 10, "text"))
+
+        assert message.message_id == 10
+        assert bot.calls == []
+
+    def test_respects_chat_rate(self) -> None:
+        bot = FakeAsyncBot()
+        service = _service(
+            bot, RateLimits(global_rate=1e6, chat_rate=20.0, chat_burst=1.0)
+        )
+
+        async def scenario() -> None:
+            for i in range(3):
+                await service.send(1, str(i))
+
+        started = time.monotonic()
+        asyncio.run(scenario())
+
+        # Первый вызов из запаса, следующие два — по 1/20 с
+        assert time.monotonic() - started >= 0.09
+        assert len(bot.calls) == 3
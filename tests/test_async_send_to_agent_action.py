@@ -0,0 +1,146 @@
+import asyncio
+import itertools
+from collections.abc import Callable
+
+from bot_framework.entities.bot_message import BotMessage
+from src.agent.events import AgentEvent, AgentMergedEvent, AgentTextEvent
+from src.chat.actions.async_send_to_agent_action import AsyncSendToAgentAction
+
+
+class FakeAsyncMessageService:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, int, str]] = []
+        self._ids = itertools.count(1000)
+
+    async def send(self, chat_id: int, text: str) -> BotMessage:
+        self.calls.append(("send", chat_id, text))
+        return BotMessage(chat_id=chat_id, message_id=next(self._ids))
+
+    async def send_document(
+        self, chat_id: int, document: bytes, filename: str
+    ) -> BotMessage:
+        self.calls.append(("send_document", chat_id, filename))
+        return BotMessage(chat_id=chat_id, message_id=next(self._ids))
+
+    async def replace(self, chat_id: int, message_id: int, text: str) -> BotMessage:
+        self.calls.append(("replace", message_id, text))
+        return BotMessage(chat_id=chat_id, message_id=message_id)
+
+    async def replace_progress(self, chat_id: int, message_id: int, text: str) -> None:
+        self.calls.append(("replace_progress", message_id, text))
+
+    async def delete(self, chat_id: int, message_id: int) -> None:
+        self.calls.append(("delete", message_id, ""))
+
+
+class FakeAsyncAgentClient:
+    def __init__(
+        self,
+        events: list[AgentEvent] | None = None,
+        response: str = "",
+        error: Exception | None = None,
+        think_time: float = 0.0,
+    ) -> None:
+        self.events = events or []
+        self.response = response
+        self.error = error
+        self.think_time = think_time
+        self.calls: list[tuple[int, int, str]] = []
+
+    async def send_message_async(
+        self,
+        user_id: int,
+        chat_id: int,
+        text: str,
+        on_event: Callable[[AgentEvent], None] | None = None,
+    ) -> str:
+        self.calls.append((user_id, chat_id, text))
+        for event in self.events:
+            if on_event:
+                on_event(event)
+        await asyncio.sleep(self.think_time)
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+def _execute(
+    agent_client: FakeAsyncAgentClient,
+    message_service: FakeAsyncMessageService,
+    **kwargs: float,
+) -> None:
+    action = AsyncSendToAgentAction(
+        agent_client=agent_client,  # type: ignore[arg-type]
+        message_service=message_service,
+        **kwargs,  # type: ignore[arg-type]
+    )
+    asyncio.run(
+        action.execute(chat_id=100, user_id=1, text="Hi", thinking_message_id=42)
+    )
+
+
+class TestAsyncSendToAgentAction:
+    def test_replaces_placeholder_with_response(self) -> None:
+        agent_client = FakeAsyncAgentClient(response="Hello!")
+        message_service = FakeAsyncMessageService()
+
+        _execute(agent_client, message_service)
+
+        assert agent_client.calls == [(1, 100, "Hi")]
+        assert message_service.calls == [("replace", 42, "Hello!")]
+
+    def test_replaces_empty_response_with_fallback(self) -> None:
+        message_service = FakeAsyncMessageService()
+
+        _execute(FakeAsyncAgentClient(response="  "), message_service)
+
+        assert message_service.calls == [("replace", 42, "Пустой ответ от агента")]
+
+    def test_streams_events_before_final_text(self) -> None:
+        agent_client = FakeAsyncAgentClient(
+            events=[AgentTextEvent(text="Partial")],
+            response="Partial and final",
+            think_time=0.05,
+        )
+        message_service = FakeAsyncMessageService()
+
+        _execute(agent_client, message_service, edit_interval=0.0)
+
+        assert message_service.calls == [
+            ("replace_progress", 42, "Partial"),
+            ("replace", 42, "Partial and final"),
+        ]
+
+    def test_merged_message_gets_notice(self) -> None:
+        message_service = FakeAsyncMessageService()
+
+        _execute(FakeAsyncAgentClient(events=[AgentMergedEvent()]), message_service)
+
+        assert message_service.calls == [
+            ("replace", 42, "Объединено со следующим сообщением")
+        ]
+
+    def test_agent_error_is_shown_in_placeholder(self) -> None:
+        agent_client = FakeAsyncAgentClient(
+            events=[AgentTextEvent(text="Partial")], error=RuntimeError("boom")
+        )
+        message_service = FakeAsyncMessageService()
+
+        _execute(agent_client, message_service, edit_interval=0.0)
+
+        # Правка по таймеру отменена ошибкой хода
+        assert message_service.calls == [("replace", 42, "Ошибка: boom")]
+
+    def test_long_response_is_sent_as_document(self) -> None:
+        message_service = FakeAsyncMessageService()
+
+        _execute(
+            FakeAsyncAgentClient(response="x" * 50),
+            message_service,
+            document_threshold=10,
+        )
+
+        assert message_service.calls == [
+            ("replace", 42, "Ответ длинный (50 символов), отправлен файлом"),
+            ("send_document", 100, "reply.md"),
+        ]
@@ -0,0 +1,45 @@
+from benchmarks.bench_agent_load import LoadResult, find_regressions, run_load
+from benchmarks.fakes import Scenario
+
+
+def _result(throughput: float, p95: float) -> LoadResult:
+    return LoadResult(
+        users=10,
+        messages=30,
+        wall_time=1.0,
+        throughput=throughput,
+        p50=p95 / 2,
+        p95=p95,
+        p99=p95,
+        peak_rss_mb=100.0,
+        telegram_calls=120,
+        peak_threads=20,
+    )
+
+
+class TestAgentLoadBenchmark:
+    def test_runs_offline_and_delivers_every_message(self) -> None:
+        scenario = Scenario(connect_time=0, think_time=0, tool_time=0)
+
+        result = run_load(users=5, rounds=2, scenario=scenario, telegram_latency=0)
+
+        assert result.messages == 10
+        assert result.p50 <= result.p95 <= result.p99
+        # Плейсхолдер и финальный ответ на каждое сообщение
+        assert result.telegram_calls >= 20
+
+    def test_async_mode_delivers_every_message(self) -> None:
+        scenario = Scenario(connect_time=0, think_time=0, tool_time=0)
+
+        result = run_load(
+            users=5, rounds=2, scenario=scenario, telegram_latency=0, mode="async"
+        )
+
+        assert result.messages == 10
+        assert result.telegram_calls >= 20
+
+    def test_flags_regressions_past_tolerance(self) -> None:
+        baseline = {"10": {"throughput": 100.0, "p95": 1.0}}
+
+        assert find_regressions([_result(80.0, 1.2)], baseline, tolerance=0.3) == []
+        assert len(find_regressions([_result(60.0, 1.5)], baseline, 0.3)) == 2
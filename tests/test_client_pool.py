@@ -0,0 +1,74 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from src.agent.client_pool import ClientPool
+
+
+def _run(coro: object) -> object:
+    return asyncio.new_event_loop().run_until_complete(coro)  # type:ignore[arg-type]
+
+
+def _make_pool(
+    max_clients: int = 2, idle_ttl: float = 60.0
+) -> tuple[ClientPool, dict[int, MagicMock]]:
+    created: dict[int, MagicMock] = {}
+
+    def factory(user_id: int) -> MagicMock:
+        client = MagicMock()
+        client.disconnect = AsyncMock()
+        created[user_id] = client
+        return client
+
+    return ClientPool(
+        factory=factory, max_clients=max_clients, idle_ttl=idle_ttl
+    ), created
+
+
+class TestClientPoolLru:
+    def test_evicts_least_recently_used_client(self) -> None:
+        pool, created = _make_pool(max_clients=2)
+
+        async def scenario() -> None:
+            for user_id in (1, 2):
+                await pool.acquire(user_id)
+                pool.release(user_id)
+            await pool.acquire(1)
+            pool.release(1)
+            await pool.acquire(3)
+
+        _run(scenario())
+
+        assert 2 not in pool
+        assert 1 in pool
+        assert 3 in pool
+        created[2].disconnect.assert_awaited_once()
+
+    def test_does_not_evict_busy_client(self) -> None:
+        pool, created = _make_pool(max_clients=1)
+
+        async def scenario() -> None:
+            await pool.acquire(1)
+            await pool.acquire(2)
+
+        _run(scenario())
+
+        assert 1 in pool
+        assert 2 in pool
+        created[1].disconnect.assert_not_awaited()
+
+
+class TestClientPoolIdleTtl:
+    def test_evicts_clients_idle_past_ttl(self) -> None:
+        pool, created = _make_pool(idle_ttl=0)
+
+        async def scenario() -> None:
+            await pool.acquire(1)
+            pool.release(1)
+            await pool.acquire(2)
+            await pool.evict_idle()
+
+        _run(scenario())
+
+        assert 1 not in pool
+        assert 2 in pool
+        created[1].disconnect.assert_awaited_once()
@@ -0,0 +1,125 @@
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from bot_framework.entities.bot_message import BotMessage, BotMessageUser
+from bot_framework.entities.role import Role
+from bot_framework.role_management.repos import RoleRepo
+
+from src.chat.actions.send_to_agent_action import SendToAgentAction
+from src.chat.handlers.file_message_handler import (
+    FileMessageHandler,
+    extract_attachments,
+)
+from src.telegram.file_downloader import TelegramFileDownloader
+
+ADMIN_ROLE = Role(id=1, name="admin")
+
+
+def _make_message(original: object) -> BotMessage:
+    message = BotMessage(
+        chat_id=100,
+        message_id=1,
+        user_id=1,
+        from_user=BotMessageUser(id=1),
+    )
+    message.set_original(original)
+    return message
+
+
+def _document(name: str = "Report.PDF") -> SimpleNamespace:
+    return SimpleNamespace(
+        file_id="file-1",
+        file_unique_id="uid-1",
+        file_name=name,
+        mime_type="application/pdf",
+    )
+
+
+def _make_handler(
+    downloader: MagicMock,
+) -> tuple[FileMessageHandler, MagicMock, MagicMock]:
+    role_repo = MagicMock(spec=RoleRepo)
+    role_repo.get_user_roles.return_value = [ADMIN_ROLE]
+    message_service = MagicMock()
+    message_service.send.return_value = BotMessage(chat_id=100, message_id=42)
+    action = MagicMock(spec=SendToAgentAction)
+    handler = FileMessageHandler(
+        send_to_agent_action=action,
+        message_service=message_service,
+        role_repo=role_repo,
+        downloader=downloader,
+    )
+    return handler, action, message_service
+
+
+def _wait_for(mock: MagicMock) -> None:
+    for _ in range(200):
+        if mock.called:
+            return
+        time.sleep(0.01)
+
+
+class TestExtractAttachments:
+    def test_takes_largest_photo_and_voice(self) -> None:
+        original = SimpleNamespace(
+            document=None,
+            photo=[
+                SimpleNamespace(file_id="small", file_unique_id="s"),
+                SimpleNamespace(file_id="large", file_unique_id="l"),
+            ],
+            voice=SimpleNamespace(
+                file_id="voice", file_unique_id="v", mime_type="audio/ogg"
+            ),
+        )
+
+        attachments = extract_attachments(original)
+
+        assert [(a.kind, a.file_id, a.suffix) for a in attachments] == [
+            ("photo", "large", ".jpg"),
+            ("voice", "voice", ".oga"),
+        ]
+
+    def test_keeps_document_extension(self) -> None:
+        original = SimpleNamespace(document=_document(), photo=None, voice=None)
+
+        assert extract_attachments(original)[0].suffix == ".pdf"
+
+
+class TestFileMessageHandler:
+    def test_passes_downloaded_paths_to_agent(self, tmp_path: Path) -> None:
+        stored = tmp_path / "abc.pdf"
+        stored.write_bytes(b"x" * 2048)
+        downloader = MagicMock(spec=TelegramFileDownloader)
+        downloader.download.return_value = stored
+        handler, action, message_service = _make_handler(downloader)
+        original = SimpleNamespace(
+            document=_document(), photo=None, voice=None, caption="Сделай выжимку"
+        )
+
+        handler.handle(_make_message(original))
+        _wait_for(action.execute)
+
+        downloader.download.assert_called_once_with("file-1", "uid-1", ".pdf")
+        kwargs = action.execute.call_args.kwargs
+        assert kwargs["thinking_message_id"] == 42
+        assert kwargs["text"].startswith("Сделай выжимку\n\n")
+        assert (
+            f"- {stored} (document, Report.PDF, application/pdf, 2.0 KB)"
+            in (kwargs["text"])
+        )
+
+    def test_reports_download_error(self) -> None:
+        downloader = MagicMock(spec=TelegramFileDownloader)
+        downloader.download.side_effect = RuntimeError("file is too big")
+        handler, action, message_service = _make_handler(downloader)
+        original = SimpleNamespace(document=_document(), photo=None, voice=None)
+
+        handler.handle(_make_message(original))
+        _wait_for(message_service.replace)
+
+        message_service.replace.assert_called_once_with(
+            chat_id=100, message_id=42, text="Ошибка: file is too big"
+        )
+        action.execute.assert_not_called()
@@ -0,0 +1,95 @@
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.telegram.file_downloader import TelegramFileDownloader
+from src.telegram.file_store import ContentAddressedFileStore
+
+
+class TestContentAddressedFileStore:
+    def test_stores_by_content_hash_and_indexes_unique_id(self, tmp_path: Path) -> None:
+        store = ContentAddressedFileStore(tmp_path)
+
+        path = store.write("uid-1", [b"hello ", b"world"], ".txt")
+
+        assert path.read_bytes() == b"hello world"
+        assert path.parent.parent == tmp_path / "objects"
+        assert store.find("uid-1") == path
+        assert list((tmp_path / "tmp").iterdir()) == []
+
+    def test_same_content_is_stored_once(self, tmp_path: Path) -> None:
+        store = ContentAddressedFileStore(tmp_path)
+
+        first = store.write("uid-1", [b"data"], ".pdf")
+        second = store.write("uid-2", [b"data"], ".pdf")
+
+        assert first == second
+        assert store.find("uid-2") == first
+
+    def test_broken_link_is_not_found(self, tmp_path: Path) -> None:
+        store = ContentAddressedFileStore(tmp_path)
+        store.write("uid-1", [b"data"]).unlink()
+
+        assert store.find("uid-1") is None
+
+    def test_failed_stream_leaves_no_files(self, tmp_path: Path) -> None:
+        store = ContentAddressedFileStore(tmp_path)
+
+        def chunks() -> Iterator[bytes]:
+            yield b"partial"
+            raise ConnectionError("reset")
+
+        with pytest.raises(ConnectionError):
+            store.write("uid-1", chunks())
+
+        assert list((tmp_path / "tmp").iterdir()) == []
+        assert store.find("uid-1") is None
+
+
+class TestTelegramFileDownloader:
+    def test_streams_remote_file_in_chunks(self, tmp_path: Path) -> None:
+        bot = MagicMock()
+        bot.token = "token"  # noqa: S105
+        bot.get_file.return_value.file_path = "documents/file_1.pdf"
+        response = MagicMock()
+        response.__enter__.return_value = response
+        response.iter_content.return_value = iter([b"a" * 4, b"b" * 4])
+        downloader = TelegramFileDownloader(
+            bot, ContentAddressedFileStore(tmp_path / "store"), chunk_size=4
+        )
+
+        with patch(
+            "src.telegram.file_downloader.requests.get", return_value=response
+        ) as get:
+            path = downloader.download("file-id", "uid-1", ".pdf")
+
+        assert path.read_bytes() == b"aaaabbbb"
+        assert get.call_args.args[0].endswith("/bottoken/documents/file_1.pdf")
+        assert get.call_args.kwargs["stream"] is True
+        response.iter_content.assert_called_once_with(chunk_size=4)
+
+    def test_copies_from_local_bot_api_server(self, tmp_path: Path) -> None:
+        source = tmp_path / "server" / "voice.oga"
+        source.parent.mkdir()
+        source.write_bytes(b"x" * 10)
+        bot = MagicMock()
+        bot.get_file.return_value.file_path = str(source)
+        downloader = TelegramFileDownloader(
+            bot, ContentAddressedFileStore(tmp_path / "store"), chunk_size=3
+        )
+
+        path = downloader.download("file-id", "uid-1", ".oga")
+
+        assert path.read_bytes() == b"x" * 10
+
+    def test_skips_download_of_known_file(self, tmp_path: Path) -> None:
+        store = ContentAddressedFileStore(tmp_path)
+        stored = store.write("uid-1", [b"data"])
+        bot = MagicMock()
+
+        path = TelegramFileDownloader(bot, store).download("file-id", "uid-1")
+
+        assert path == stored
+        bot.get_file.assert_not_called()
@@ -0,0 +1,30 @@
+from collections import Counter
+
+from src.agent.sharding.hash_ring import HashRing
+
+
+class TestHashRing:
+    def test_routes_user_to_the_same_shard(self) -> None:
+        ring = HashRing(4)
+
+        assert {ring.shard_for(42) for _ in range(10)} == {ring.shard_for(42)}
+        assert HashRing(4).shard_for(42) == ring.shard_for(42)
+
+    def test_spreads_users_across_shards(self) -> None:
+        ring = HashRing(4)
+
+        counts = Counter(ring.shard_for(user_id) for user_id in range(4000))
+
+        assert set(counts) == {0, 1, 2, 3}
+        assert min(counts.values()) > 600
+
+    def test_adding_shard_moves_only_a_fraction_of_users(self) -> None:
+        before = HashRing(4)
+        after = HashRing(5)
+
+        moved = sum(
+            before.shard_for(user_id) != after.shard_for(user_id)
+            for user_id in range(4000)
+        )
+
+        assert moved < 4000 * 0.35
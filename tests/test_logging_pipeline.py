@@ -0,0 +1,94 @@
+import asyncio
+import io
+import json
+import logging
+import time
+
+from src.logs.context import ContextFilter, bind_user, turn_scope
+from src.logs.pipeline import LoggingConfig, LoggingPipeline
+from src.logs.sampling import SamplingFilter
+from src.logs.session_buffer import SessionLogBuffer
+
+
+def _record(name: str, msg: str = "line", user_id: int | None = 1) -> logging.LogRecord:
+    record = logging.LogRecord(name, logging.DEBUG, __file__, 1, msg, None, None)
+    record.user_id = user_id
+    return record
+
+
+class TestLoggingPipeline:
+    def test_writes_json_tagged_with_user_and_turn(self) -> None:
+        stream = io.StringIO()
+        pipeline = LoggingPipeline(LoggingConfig(level="DEBUG"), stream=stream)
+        pipeline.start()
+        logger = logging.getLogger("tests.pipeline")
+
+        async def turn() -> None:
+            bind_user(7)
+            with turn_scope("abc123"):
+                logger.info("Tool call: %s", "Bash")
+            logger.info("After turn")
+
+        try:
+            asyncio.run(turn())
+        finally:
+            pipeline.stop()
+
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        records = [r for r in lines if r["logger"] == "tests.pipeline"]
+        assert records[0]["message"] == "Tool call: Bash"
+        assert (records[0]["user_id"], records[0]["turn_id"]) == (7, "abc123")
+        assert records[1]["user_id"] == 7
+        assert "turn_id" not in records[1]
+
+    def test_stop_restores_root_handlers(self) -> None:
+        root = logging.getLogger()
+        previous = logging.NullHandler()
+        root.addHandler(previous)
+        pipeline = LoggingPipeline(LoggingConfig(), stream=io.StringIO())
+        try:
+            pipeline.start()
+            assert previous not in root.handlers
+            pipeline.stop()
+            assert previous in root.handlers
+            assert pipeline.session_buffer not in root.handlers
+        finally:
+            root.removeHandler(previous)
+
+
+class TestSamplingFilter:
+    def test_limits_each_user_and_reports_suppressed(self) -> None:
+        sampling = SamplingFilter({"cli.stderr": 10.0}, burst=2)
+
+        passed = [sampling.filter(_record("cli.stderr")) for _ in range(5)]
+        other_user = sampling.filter(_record("cli.stderr", user_id=2))
+        time.sleep(0.15)
+        record = _record("cli.stderr")
+        next_passed = sampling.filter(record)
+
+        assert passed == [True, True, False, False, False]
+        assert other_user
+        assert next_passed
+        assert record.suppressed == 3
+
+    def test_passes_other_loggers_and_warnings(self) -> None:
+        sampling = SamplingFilter({"cli.stderr": 1.0}, burst=1)
+        sampling.filter(_record("cli.stderr"))
+        warning = _record("cli.stderr")
+        warning.levelno = logging.WARNING
+
+        assert sampling.filter(warning)
+        assert sampling.filter(_record("other"))
+
+
+class TestSessionLogBuffer:
+    def test_keeps_last_records_per_user(self) -> None:
+        buffer = SessionLogBuffer(capacity=2)
+        buffer.addFilter(ContextFilter())
+        for i in range(3):
+            buffer.handle(_record("agent", f"step {i}"))
+        buffer.handle(_record("agent", "other user", user_id=2))
+        buffer.handle(_record("agent", "no user", user_id=None))
+
+        assert buffer.dump(1) == ["step 1", "step 2"]
+        assert buffer.dump(2) == ["other user"]
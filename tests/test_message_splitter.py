@@ -0,0 +1,58 @@
+from src.chat.services.message_splitter import (
+    TELEGRAM_MESSAGE_LIMIT,
+    iter_chunks,
+    split_message,
+)
+
+
+class TestSplitMessagePlainText:
+    def test_returns_short_text_as_is(self) -> None:
+        assert split_message("Hello") == ["Hello"]
+
+    def test_splits_on_newlines_within_limit(self) -> None:
+        lines = [f"line {i} " + "x" * 50 for i in range(500)]
+        text = "\n".join(lines)
+
+        chunks = split_message(text)
+
+        assert all(len(chunk) <= TELEGRAM_MESSAGE_LIMIT for chunk in chunks)
+        assert "\n".join(chunks).split("\n") == lines
+
+    def test_hard_cuts_text_without_newlines(self) -> None:
+        text = "a" * (TELEGRAM_MESSAGE_LIMIT * 2 + 10)
+
+        chunks = split_message(text)
+
+        assert [len(chunk) for chunk in chunks] == [
+            TELEGRAM_MESSAGE_LIMIT,
+            TELEGRAM_MESSAGE_LIMIT,
+            10,
+        ]
+
+    def test_is_lazy(self) -> None:
+        chunks = iter_chunks("a" * TELEGRAM_MESSAGE_LIMIT * 1000)
+
+        assert next(chunks) == "a" * TELEGRAM_MESSAGE_LIMIT
+
+
+class TestSplitMessageCodeFences:
+    def test_keeps_code_blocks_balanced_across_chunks(self) -> None:
+        code = "\n".join(f"print({i})" for i in range(1500))
+        text = f"Intro\n```python\n{code}\n```\nOutro"
+
+        chunks = split_message(text)
+
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert len(chunk) <= TELEGRAM_MESSAGE_LIMIT
+            assert chunk.count("```") % 2 == 0
+        assert chunks[1].startswith("```python\n")
+        assert chunks[0].endswith("\n```")
+
+    def test_does_not_touch_chunks_outside_fences(self) -> None:
+        text = "```\ncode\n```\n" + "\n".join("y" * 100 for _ in range(100))
+
+        chunks = split_message(text)
+
+        assert chunks[0].startswith("```\ncode\n```")
+        assert not chunks[1].startswith("```")
@@ -0,0 +1,65 @@
+import urllib.request
+
+from src.metrics.registry import MetricsRegistry
+from src.metrics.server import start_metrics_server
+from src.metrics.summary import format_latency_summary
+
+
+class TestMetricsRegistry:
+    def test_renders_prometheus_histogram(self) -> None:
+        metrics = MetricsRegistry()
+        metrics.observe("agent_turn_seconds", 0.3, user="1", model="opus")
+        metrics.observe("agent_turn_seconds", 7.0, user="1", model="opus")
+
+        text = metrics.render()
+
+        assert "# TYPE agent_turn_seconds histogram" in text
+        assert 'agent_turn_seconds_bucket{model="opus",user="1",le="0.25"} 0' in text
+        assert 'agent_turn_seconds_bucket{model="opus",user="1",le="0.5"} 1' in text
+        assert 'agent_turn_seconds_bucket{model="opus",user="1",le="+Inf"} 2' in text
+        assert 'agent_turn_seconds_sum{model="opus",user="1"} 7.3' in text
+        assert 'agent_turn_seconds_count{model="opus",user="1"} 2' in text
+
+    def test_quantiles_merge_series_matching_labels(self) -> None:
+        metrics = MetricsRegistry()
+        for value in range(1, 101):
+            model = "opus" if value % 2 else "sonnet"
+            metrics.observe("agent_turn_seconds", float(value), user="1", model=model)
+        metrics.observe("agent_turn_seconds", 1000.0, user="2", model="opus")
+
+        assert metrics.quantiles("agent_turn_seconds", (0.5, 0.95), user="1") == [
+            51.0,
+            95.0,
+        ]
+        assert metrics.quantiles("agent_turn_seconds", (0.5,), user="3") is None
+
+    def test_formats_summary_only_for_recorded_metrics(self) -> None:
+        metrics = MetricsRegistry()
+        metrics.observe("agent_turn_seconds", 2.0, user="1")
+
+        summary = format_latency_summary(
+            metrics,
+            [("Turn", "agent_turn_seconds"), ("Connect", "agent_connect_seconds")],
+            user="1",
+        )
+
+        assert summary == "Turn: 2.00s / 2.00s"
+
+
+class TestMetricsServer:
+    def test_serves_metrics_in_text_format(self) -> None:
+        metrics = MetricsRegistry()
+        metrics.observe("telegram_delivery_seconds", 0.1, user="1")
+        server = start_metrics_server(metrics, port=0)
+        try:
+            port = server.server_address[1]
+            with urllib.request.urlopen(  # noqa: S310
+                f"http://127.0.0.1:{port}/metrics", timeout=5
+            ) as response:
+                body = response.read().decode()
+                content_type = response.headers["Content-Type"]
+        finally:
+            server.shutdown()
+
+        assert content_type.startswith("text/plain; version=0.0.4")
+        assert 'telegram_delivery_seconds_count{user="1"} 1' in body
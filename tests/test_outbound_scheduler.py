@@ -0,0 +1,154 @@
+import threading
+import time
+from functools import partial
+from unittest.mock import MagicMock
+
+from telebot.apihelper import ApiTelegramException
+
+from src.telegram.outbound_scheduler import OutboundScheduler, Priority, RateLimits
+from src.telegram.scheduled_message_service import ScheduledMessageService
+
+
+def _make_scheduler(
+    chat_rate: float = 1000, chat_burst: float = 1000
+) -> OutboundScheduler:
+    return OutboundScheduler(
+        RateLimits(global_rate=1000, chat_rate=chat_rate, chat_burst=chat_burst)
+    )
+
+
+def _block_chat(scheduler: OutboundScheduler, chat_id: int) -> threading.Event:
+    started = threading.Event()
+    gate = threading.Event()
+
+    def blocker() -> None:
+        started.set()
+        gate.wait(timeout=5)
+
+    scheduler.submit(chat_id, blocker)
+    assert started.wait(timeout=5)
+    return gate
+
+
+def _flood_error(retry_after: int) -> ApiTelegramException:
+    return ApiTelegramException(
+        "sendMessage",
+        None,
+        {
+            "error_code": 429,
+            "description": "Too Many Requests",
+            "parameters": {"retry_after": retry_after},
+        },
+    )
+
+
+class TestOutboundSchedulerOrdering:
+    def test_final_messages_go_before_progress_edits(self) -> None:
+        scheduler = _make_scheduler()
+        sent: list[str] = []
+        gate = _block_chat(scheduler, 100)
+
+        progress = scheduler.submit(
+            100, lambda: sent.append("progress"), priority=Priority.PROGRESS
+        )
+        final = scheduler.submit(100, lambda: sent.append("final"))
+        gate.set()
+        progress.result(timeout=5)
+        final.result(timeout=5)
+
+        assert sent == ["final", "progress"]
+
+    def test_keeps_order_within_chat(self) -> None:
+        scheduler = _make_scheduler()
+        sent: list[int] = []
+
+        futures = [scheduler.submit(100, partial(sent.append, i)) for i in range(10)]
+        for future in futures:
+            future.result(timeout=5)
+
+        assert sent == list(range(10))
+
+    def test_busy_chat_does_not_block_other_chats(self) -> None:
+        scheduler = _make_scheduler()
+        gate = _block_chat(scheduler, 100)
+
+        other = scheduler.submit(200, lambda: "done")
+
+        assert other.result(timeout=1) == "done"
+        gate.set()
+
+
+class TestOutboundSchedulerMerging:
+    def test_merges_queued_edits_of_same_message(self) -> None:
+        scheduler = _make_scheduler()
+        sent: list[str] = []
+        gate = _block_chat(scheduler, 100)
+
+        def send(text: str) -> str:
+            sent.append(text)
+            return text
+
+        futures = [
+            scheduler.submit(
+                100,
+                partial(send, text),
+                priority=Priority.PROGRESS,
+                merge_key=("message", 100, 42),
+            )
+            for text in ("One", "Two", "Three")
+        ]
+        gate.set()
+
+        assert [future.result(timeout=5) for future in futures] == ["Three"] * 3
+        assert sent == ["Three"]
+
+    def test_final_replace_supersedes_queued_progress(self) -> None:
+        scheduler = _make_scheduler()
+        message_service = MagicMock()
+        service = ScheduledMessageService(message_service, scheduler)
+        gate = _block_chat(scheduler, 100)
+
+        service.replace_progress(chat_id=100, message_id=42, text="Partial")
+        threading.Timer(0.05, gate.set).start()
+        service.replace(chat_id=100, message_id=42, text="Done")
+
+        message_service.replace.assert_called_once()
+        assert message_service.replace.call_args.kwargs["text"] == "Done"
+
+
+class TestOutboundSchedulerRateLimits:
+    def test_throttles_chat_to_its_rate(self) -> None:
+        scheduler = _make_scheduler(chat_rate=20, chat_burst=1)
+
+        started = time.monotonic()
+        futures = [scheduler.submit(100, lambda: None) for _ in range(5)]
+        for future in futures:
+            future.result(timeout=5)
+
+        assert time.monotonic() - started >= 0.18
+
+    def test_retries_after_flood_limit(self) -> None:
+        scheduler = _make_scheduler()
+        attempts: list[float] = []
+
+        def flaky() -> str:
+            attempts.append(time.monotonic())
+            if len(attempts) == 1:
+                raise _flood_error(retry_after=1)
+            return "sent"
+
+        assert scheduler.submit(100, flaky).result(timeout=5) == "sent"
+        assert attempts[1] - attempts[0] >= 0.9
+
+    def test_gives_up_after_max_retries(self) -> None:
+        scheduler = OutboundScheduler(
+            RateLimits(global_rate=1000, chat_rate=1000, chat_burst=1000),
+            max_retries=0,
+        )
+
+        def flood() -> None:
+            raise _flood_error(retry_after=1)
+
+        future = scheduler.submit(100, flood)
+
+        assert isinstance(future.exception(timeout=5), ApiTelegramException)
@@ -0,0 +1,45 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+from src.agent.repos.redis_session_store import RedisSessionStore
+from src.agent.session_stats import SessionStats
+
+
+def _run(coro: object) -> object:
+    return asyncio.new_event_loop().run_until_complete(coro)  # type:ignore[arg-type]
+
+
+def _make_store() -> tuple[RedisSessionStore, AsyncMock]:
+    redis_client = AsyncMock()
+    with patch(
+        "src.agent.repos.redis_session_store.redis.from_url",
+        return_value=redis_client,
+    ):
+        store = RedisSessionStore(redis_url="redis://localhost:6379/4")
+    return store, redis_client
+
+
+class TestRedisSessionStore:
+    def test_saves_stats_as_json(self) -> None:
+        store, redis_client = _make_store()
+        stats = SessionStats(model="claude", session_id="session-1", total_messages=3)
+
+        _run(store.save(1, stats))
+
+        key, payload = redis_client.set.await_args.args
+        assert key == "agent_sessions:1"
+        assert json.loads(payload)["session_id"] == "session-1"
+
+    def test_loads_saved_stats(self) -> None:
+        store, redis_client = _make_store()
+        stats = SessionStats(model="claude", session_id="session-1", input_tokens=10)
+        redis_client.get.return_value = json.dumps(stats.to_dict()).encode()
+
+        assert _run(store.load(1)) == stats
+
+    def test_returns_none_for_unknown_user(self) -> None:
+        store, redis_client = _make_store()
+        redis_client.get.return_value = None
+
+        assert _run(store.load(1)) is None
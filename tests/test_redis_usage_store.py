@@ -0,0 +1,76 @@
+import asyncio
+from datetime import UTC, date, datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.agent.repos.redis_usage_store import LAST_DAYS, RedisUsageStore
+from src.agent.usage import TurnUsage
+
+
+def _run(coro: object) -> object:
+    return asyncio.new_event_loop().run_until_complete(coro)  # type:ignore[arg-type]
+
+
+def _make_store() -> tuple[RedisUsageStore, MagicMock]:
+    redis_client = MagicMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    redis_client.pipeline.return_value = pipe
+    with patch(
+        "src.agent.repos.redis_usage_store.redis.from_url",
+        return_value=redis_client,
+    ):
+        store = RedisUsageStore(redis_url="redis://localhost:6379/4")
+    return store, pipe
+
+
+def _totals(cost: str, messages: int) -> dict[bytes, bytes]:
+    return {b"cost_usd": cost.encode(), b"messages": str(messages).encode()}
+
+
+class TestRedisUsageStore:
+    def test_adds_turn_to_total_day_and_model_rollups(self) -> None:
+        store, pipe = _make_store()
+        usage = TurnUsage(
+            user_id=1,
+            model="claude",
+            cost_usd=0.5,
+            input_tokens=100,
+            messages=1,
+            recorded_at=datetime(2026, 10, 18, 12, tzinfo=UTC),
+        )
+
+        _run(store.record([usage]))
+
+        cost_keys = [
+            call.args[0]
+            for call in pipe.hincrbyfloat.call_args_list
+            if call.args[1] == "cost_usd"
+        ]
+        assert cost_keys == [
+            "agent_usage:1:total",
+            "agent_usage:1:day:2026-10-18",
+            "agent_usage:1:model:claude",
+        ]
+        pipe.sadd.assert_called_once_with("agent_usage:1:models", "claude")
+        assert pipe.xadd.call_args.args[0] == "agent_usage:1:turns"
+        pipe.execute.assert_awaited_once()
+
+    def test_loads_rollups_from_aggregates(self) -> None:
+        store, pipe = _make_store()
+        days = [_totals("0.1", 1)] + [{}] * (LAST_DAYS - 2) + [_totals("0.2", 2)]
+        pipe.execute.side_effect = [
+            [_totals("1.5", 10), *days, {b"claude"}],
+            [_totals("1.5", 10)],
+        ]
+
+        rollups = _run(store.load_rollups(1, date(2026, 10, 18)))
+
+        assert rollups.total.messages == 10  # type:ignore[attr-defined]
+        assert rollups.today.messages == 1  # type:ignore[attr-defined]
+        assert rollups.last_days.messages == 3  # type:ignore[attr-defined]
+        assert rollups.models["claude"].cost_usd == 1.5  # type:ignore[attr-defined]
+        day_keys = [call.args[0] for call in pipe.hgetall.call_args_list][1:3]
+        assert day_keys == [
+            "agent_usage:1:day:2026-10-18",
+            "agent_usage:1:day:2026-10-17",
+        ]
@@ -1,11 +1,18 @@
 import asyncio
+import threading
+import time
+from concurrent.futures import Future
 from pathlib import Path
 from typing import Any
 from unittest.mock import MagicMock
 
+import pytest
+from telebot.apihelper import ApiTelegramException
+
 import src.agent.tools.send_file as send_file_module
 from src.agent.tools.registry import SessionRegistry
-from src.agent.tools.send_file import init_send_file, send_file
+from src.agent.tools.send_file import init_send_file, send_file, send_files
+from src.telegram.outbound_scheduler import OutboundScheduler, RateLimits
 
 _handler = send_file.handler
 
@@ -63,3 +70,241 @@ class TestSendFileNotInitialized:
             assert "not initialized" in str(e)
 
         assert raised
+
+
+class _InMemoryFileIdCache:
+    def __init__(self) -> None:
+        self.file_ids: dict[str, str] = {}
+
+    async def get(self, key: str) -> str | None:
+        return self.file_ids.get(key)
+
+    async def set(self, key: str, file_id: str) -> None:
+        self.file_ids[key] = file_id
+
+
+def _make_document_message(file_id: str) -> MagicMock:
+    msg = MagicMock()
+    msg.document.file_id = file_id
+    return msg
+
+
+class TestSendFileIdCache:
+    def test_reuses_file_id_for_same_content(self, tmp_path: Path) -> None:
+        registry, bot = _setup_registry(tmp_path)
+        init_send_file(registry, file_id_cache=_InMemoryFileIdCache())
+        bot.send_document.return_value = _make_document_message("file-1")
+        test_file = tmp_path / "report.pdf"
+        test_file.write_bytes(b"%PDF report")
+
+        _run(_handler({"file_path": str(test_file)}))
+        _run(_handler({"file_path": str(test_file)}))
+
+        first, second = bot.send_document.call_args_list
+        assert first[0][1] is not None and not isinstance(first[0][1], str)
+        assert second[0] == (100, "file-1")
+
+    def test_reuploads_when_content_changes(self, tmp_path: Path) -> None:
+        registry, bot = _setup_registry(tmp_path)
+        init_send_file(registry, file_id_cache=_InMemoryFileIdCache())
+        bot.send_document.return_value = _make_document_message("file-1")
+        test_file = tmp_path / "report.pdf"
+        test_file.write_bytes(b"v1")
+
+        _run(_handler({"file_path": str(test_file)}))
+        test_file.write_bytes(b"version 2")
+        _run(_handler({"file_path": str(test_file)}))
+
+        for args in bot.send_document.call_args_list:
+            assert not isinstance(args[0][1], str)
+
+    def test_reuploads_same_content_under_new_name(self, tmp_path: Path) -> None:
+        registry, bot = _setup_registry(tmp_path)
+        init_send_file(registry, file_id_cache=_InMemoryFileIdCache())
+        bot.send_document.return_value = _make_document_message("file-1")
+        first = tmp_path / "report.pdf"
+        second = tmp_path / "invoice.pdf"
+        first.write_bytes(b"%PDF same")
+        second.write_bytes(b"%PDF same")
+
+        _run(_handler({"file_path": str(first)}))
+        _run(_handler({"file_path": str(second)}))
+
+        for args in bot.send_document.call_args_list:
+            assert not isinstance(args[0][1], str)
+
+
+class TestSendFilesMediaGroup:
+    def test_sends_documents_as_media_groups(self, tmp_path: Path) -> None:
+        registry, bot = _setup_registry(tmp_path)
+        init_send_file(registry, file_id_cache=_InMemoryFileIdCache())
+        bot.send_media_group.side_effect = lambda chat_id, media: [
+            _make_document_message(f"file-{i}") for i in range(len(media))
+        ]
+        paths = []
+        for i in range(11):
+            path = tmp_path / f"part-{i}.txt"
+            path.write_text(f"part {i}")
+            paths.append(str(path))
+
+        result = _run(send_files.handler({"file_paths": paths}))
+
+        assert "isError" not in result
+        bot.send_media_group.assert_called_once()
+        chat_id, media = bot.send_media_group.call_args[0]
+        assert chat_id == 100
+        assert len(media) == 10
+        bot.send_document.assert_called_once()
+
+    def test_resends_cached_group_without_upload(self, tmp_path: Path) -> None:
+        registry, bot = _setup_registry(tmp_path)
+        init_send_file(registry, file_id_cache=_InMemoryFileIdCache())
+        bot.send_media_group.side_effect = lambda chat_id, media: [
+            _make_document_message(f"file-{i}") for i in range(len(media))
+        ]
+        paths = []
+        for i in range(3):
+            path = tmp_path / f"part-{i}.txt"
+            path.write_text(f"part {i}")
+            paths.append(str(path))
+
+        _run(send_files.handler({"file_paths": paths}))
+        _run(send_files.handler({"file_paths": paths}))
+
+        _chat_id, media = bot.send_media_group.call_args_list[1][0]
+        assert [item.media for item in media] == ["file-0", "file-1", "file-2"]
+
+    def test_returns_error_for_missing_files(self, tmp_path: Path) -> None:
+        _setup_registry(tmp_path)
+
+        result = _run(
+            send_files.handler({"file_paths": [str(tmp_path / "missing.txt")]})
+        )
+
+        assert result["isError"] is True
+        assert "Files not found" in result["content"][0]["text"]
+
+
+class TestSendFileOffLoop:
+    def test_other_sessions_keep_running_during_upload(self, tmp_path: Path) -> None:
+        registry, bot = _setup_registry(tmp_path)
+
+        def slow_upload(chat_id: int, f: object) -> MagicMock:
+            time.sleep(0.3)
+            return MagicMock()
+
+        bot.send_document.side_effect = slow_upload
+        test_file = tmp_path / "large.bin"
+        test_file.write_bytes(b"0" * 1024)
+        ticks = 0
+
+        async def other_session_stream() -> None:
+            nonlocal ticks
+            for _ in range(20):
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        async def scenario() -> None:
+            await asyncio.gather(
+                _handler({"file_path": str(test_file)}), other_session_stream()
+            )
+
+        started = time.monotonic()
+        asyncio.new_event_loop().run_until_complete(scenario())
+
+        assert ticks == 20
+        assert time.monotonic() - started < 0.5
+
+    @pytest.mark.parametrize("with_rate_limiter", [False, True])
+    def test_limits_concurrent_uploads(
+        self, tmp_path: Path, with_rate_limiter: bool
+    ) -> None:
+        registry, bot = _setup_registry(tmp_path)
+        scheduler = OutboundScheduler(RateLimits(global_rate=100, chat_rate=100))
+        init_send_file(
+            registry,
+            max_concurrent_uploads=2,
+            rate_limiter=scheduler if with_rate_limiter else None,
+        )
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def slow_upload(chat_id: int, f: object) -> MagicMock:
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+            return MagicMock()
+
+        bot.send_document.side_effect = slow_upload
+        paths = []
+        for i in range(6):
+            path = tmp_path / f"file-{i}.txt"
+            path.write_text(str(i))
+            paths.append(path)
+
+        async def scenario() -> None:
+            await asyncio.gather(
+                *(_handler({"file_path": str(path)}) for path in paths)
+            )
+
+        asyncio.new_event_loop().run_until_complete(scenario())
+
+        assert bot.send_document.call_count == 6
+        assert peak == 2
+
+
+class _TrackingRateLimiter:
+    def __init__(self) -> None:
+        self.acquired: list[int] = []
+        self.blocked: list[tuple[int, float]] = []
+
+    def acquire(self, chat_id: int) -> Future[None]:
+        self.acquired.append(chat_id)
+        future: Future[None] = Future()
+        future.set_result(None)
+        return future
+
+    def block(self, chat_id: int, retry_after: float) -> None:
+        self.blocked.append((chat_id, retry_after))
+
+
+class TestSendFileRateLimiter:
+    def test_uploads_take_token_from_rate_limiter(self, tmp_path: Path) -> None:
+        registry, bot = _setup_registry(tmp_path)
+        rate_limiter = _TrackingRateLimiter()
+        init_send_file(registry, rate_limiter=rate_limiter)
+        test_file = tmp_path / "report.md"
+        test_file.write_text("# Report content")
+
+        _run(_handler({"file_path": str(test_file)}))
+
+        assert rate_limiter.acquired == [100]
+        bot.send_document.assert_called_once()
+
+    def test_retries_upload_after_flood_limit(self, tmp_path: Path) -> None:
+        registry, bot = _setup_registry(tmp_path)
+        rate_limiter = _TrackingRateLimiter()
+        init_send_file(registry, rate_limiter=rate_limiter)
+        flood = ApiTelegramException(
+            "sendDocument",
+            None,
+            {
+                "error_code": 429,
+                "description": "Too Many Requests: retry after 3",
+                "parameters": {"retry_after": 3},
+            },
+        )
+        bot.send_document.side_effect = [flood, MagicMock()]
+        test_file = tmp_path / "report.md"
+        test_file.write_text("# Report content")
+
+        _run(_handler({"file_path": str(test_file)}))
+
+        assert rate_limiter.acquired == [100, 100]
+        assert rate_limiter.blocked == [(100, 3.0)]
+        assert bot.send_document.call_count == 2
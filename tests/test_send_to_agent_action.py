@@ -1,12 +1,22 @@
-from unittest.mock import MagicMock
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from unittest.mock import ANY, MagicMock
 
+from src.agent.events import AgentEvent, AgentMergedEvent, AgentTextEvent
 from src.chat.actions.send_to_agent_action import SendToAgentAction
 
 
+def _resolved(value: str) -> Future[str]:
+    future: Future[str] = Future()
+    future.set_result(value)
+    return future
+
+
 class TestSendToAgentActionEmptyResponse:
     def test_replaces_empty_response_with_fallback(self) -> None:
         agent_client = MagicMock()
-        agent_client.send_message.return_value = ""
+        agent_client.submit_message.return_value = _resolved("")
 
         message_service = MagicMock()
 
@@ -15,9 +25,11 @@ class TestSendToAgentActionEmptyResponse:
             message_service=message_service,
         )
 
-        action.execute(chat_id=100, user_id=1, text="Hi", thinking_message_id=42)
+        action.execute(
+            chat_id=100, user_id=1, text="Hi", thinking_message_id=42
+        ).result(timeout=5)
 
-        agent_client.send_message.assert_called_once_with(1, 100, "Hi")
+        agent_client.submit_message.assert_called_once_with(1, 100, "Hi", on_event=ANY)
 
         message_service.replace.assert_called_once_with(
             chat_id=100,
@@ -27,7 +39,7 @@ class TestSendToAgentActionEmptyResponse:
 
     def test_sends_normal_response(self) -> None:
         agent_client = MagicMock()
-        agent_client.send_message.return_value = "Hello!"
+        agent_client.submit_message.return_value = _resolved("Hello!")
 
         message_service = MagicMock()
 
@@ -36,12 +48,162 @@ class TestSendToAgentActionEmptyResponse:
             message_service=message_service,
         )
 
-        action.execute(chat_id=100, user_id=1, text="Hi", thinking_message_id=42)
+        action.execute(
+            chat_id=100, user_id=1, text="Hi", thinking_message_id=42
+        ).result(timeout=5)
 
-        agent_client.send_message.assert_called_once_with(1, 100, "Hi")
+        agent_client.submit_message.assert_called_once_with(1, 100, "Hi", on_event=ANY)
 
         message_service.replace.assert_called_once_with(
             chat_id=100,
             message_id=42,
             text="Hello!",
         )
+
+
+class TestSendToAgentActionStreaming:
+    def test_streams_events_into_placeholder(self) -> None:
+        response: Future[str] = Future()
+
+        def fake_submit(
+            user_id: int,
+            chat_id: int,
+            text: str,
+            on_event: Callable[[AgentEvent], None],
+        ) -> Future[str]:
+            on_event(AgentTextEvent(text="Partial"))
+            return response
+
+        agent_client = MagicMock()
+        agent_client.submit_message.side_effect = fake_submit
+
+        message_service = MagicMock()
+
+        action = SendToAgentAction(
+            agent_client=agent_client,
+            message_service=message_service,
+            edit_interval=0,
+        )
+
+        delivered = action.execute(
+            chat_id=100, user_id=1, text="Hi", thinking_message_id=42
+        )
+        time.sleep(0.05)
+        response.set_result("Partial\nDone")
+        delivered.result(timeout=5)
+
+        message_service.replace_progress.assert_called_once_with(
+            chat_id=100, message_id=42, text="Partial"
+        )
+        message_service.replace.assert_called_once_with(
+            chat_id=100, message_id=42, text="Partial\nDone"
+        )
+
+
+class TestSendToAgentActionNonBlocking:
+    def test_returns_before_agent_completes(self) -> None:
+        response: Future[str] = Future()
+        agent_client = MagicMock()
+        agent_client.submit_message.return_value = response
+
+        message_service = MagicMock()
+
+        action = SendToAgentAction(
+            agent_client=agent_client,
+            message_service=message_service,
+        )
+
+        delivered = action.execute(
+            chat_id=100, user_id=1, text="Hi", thinking_message_id=42
+        )
+
+        assert not delivered.done()
+        message_service.replace.assert_not_called()
+
+        response.set_result("Hello!")
+        delivered.result(timeout=5)
+
+        message_service.replace.assert_called_once_with(
+            chat_id=100, message_id=42, text="Hello!"
+        )
+
+    def test_reports_agent_error_in_placeholder(self) -> None:
+        response: Future[str] = Future()
+        response.set_exception(RuntimeError("CLI crashed"))
+        agent_client = MagicMock()
+        agent_client.submit_message.return_value = response
+
+        message_service = MagicMock()
+
+        action = SendToAgentAction(
+            agent_client=agent_client,
+            message_service=message_service,
+        )
+
+        action.execute(
+            chat_id=100, user_id=1, text="Hi", thinking_message_id=42
+        ).result(timeout=5)
+
+        message_service.replace.assert_called_once_with(
+            chat_id=100, message_id=42, text="Ошибка: CLI crashed"
+        )
+
+
+class TestSendToAgentActionMerged:
+    def test_marks_merged_placeholder(self) -> None:
+        def fake_submit(
+            user_id: int,
+            chat_id: int,
+            text: str,
+            on_event: Callable[[AgentEvent], None],
+        ) -> Future[str]:
+            on_event(AgentMergedEvent())
+            return _resolved("")
+
+        agent_client = MagicMock()
+        agent_client.submit_message.side_effect = fake_submit
+
+        message_service = MagicMock()
+
+        action = SendToAgentAction(
+            agent_client=agent_client,
+            message_service=message_service,
+        )
+
+        action.execute(
+            chat_id=100, user_id=1, text="Hi", thinking_message_id=42
+        ).result(timeout=5)
+
+        message_service.replace.assert_called_once_with(
+            chat_id=100,
+            message_id=42,
+            text="Объединено со следующим сообщением",
+        )
+
+
+class TestSendToAgentActionDocumentFallback:
+    def test_sends_long_reply_as_document(self) -> None:
+        agent_client = MagicMock()
+        agent_client.submit_message.return_value = _resolved("x" * 100)
+
+        message_service = MagicMock()
+
+        action = SendToAgentAction(
+            agent_client=agent_client,
+            message_service=message_service,
+            document_threshold=50,
+        )
+
+        action.execute(
+            chat_id=100, user_id=1, text="Hi", thinking_message_id=42
+        ).result(timeout=5)
+
+        message_service.send_document.assert_called_once_with(
+            chat_id=100, document=b"x" * 100, filename="reply.md"
+        )
+        message_service.replace.assert_called_once_with(
+            chat_id=100,
+            message_id=42,
+            text="Ответ длинный (100 символов), отправлен файлом",
+        )
+        message_service.send.assert_not_called()
@@ -0,0 +1,96 @@
+import asyncio
+import random
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+from claude_agent_sdk import ResultMessage
+
+from src.agent.client import AgentClient
+from src.agent.tools.registry import SessionRegistry
+from src.agent.tools.send_file import init_send_file, send_file
+
+USERS = 20
+ROUNDS = 3
+
+
+class _FakeSdkClient:
+    # Как настоящий SDK: tools вызываются из reader-задачи, запущенной в connect()
+    def __init__(self, options: Any) -> None:
+        self._transport: object | None = None
+        self._requests: asyncio.Queue[str] = asyncio.Queue()
+        self._results: asyncio.Queue[str] = asyncio.Queue()
+        self._reader: asyncio.Task[None] | None = None
+
+    async def connect(self) -> None:
+        self._transport = object()
+        self._reader = asyncio.get_running_loop().create_task(self._read())
+
+    async def _read(self) -> None:
+        while True:
+            file_path = await self._requests.get()
+            await asyncio.sleep(random.uniform(0, 0.02))  # noqa: S311
+            result = await send_file.handler({"file_path": file_path})
+            self._results.put_nowait(result["content"][0]["text"])
+
+    async def query(self, text: str) -> None:
+        self._requests.put_nowait(text)
+
+    async def receive_response(self) -> AsyncIterator[MagicMock]:
+        text = await self._results.get()
+        msg = MagicMock(spec=ResultMessage)
+        msg.subtype = "success"
+        msg.is_error = False
+        msg.result = text
+        msg.num_turns = 1
+        msg.total_cost_usd = 0.0
+        msg.duration_ms = 1
+        msg.usage = None
+        yield msg
+
+    async def disconnect(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+
+
+class TestConcurrentSessionIsolation:
+    def test_tool_calls_reach_their_own_chat(self, tmp_path: Path) -> None:
+        sent: list[tuple[int, str]] = []
+
+        def fake_send_document(chat_id: int, f: Any) -> MagicMock:
+            sent.append((chat_id, Path(f.name).name))
+            return MagicMock()
+
+        bot = MagicMock()
+        bot.send_document.side_effect = fake_send_document
+
+        registry = SessionRegistry()
+        init_send_file(registry)
+        files = {}
+        for user_id in range(1, USERS + 1):
+            files[user_id] = tmp_path / f"user-{user_id}.txt"
+            files[user_id].write_text(str(user_id))
+
+        with patch("claude_agent_sdk.ClaudeSDKClient", _FakeSdkClient):
+            agent = AgentClient(
+                session_registry=registry,
+                bot=bot,
+                coalesce_window=0,
+                max_clients=USERS,
+            )
+            for _ in range(ROUNDS):
+                futures = [
+                    agent.submit_message(
+                        user_id=user_id,
+                        chat_id=user_id * 100,
+                        text=str(files[user_id]),
+                    )
+                    for user_id in random.sample(range(1, USERS + 1), USERS)
+                ]
+                for future in futures:
+                    future.result(timeout=10)
+
+        assert len(sent) == USERS * ROUNDS
+        for chat_id, file_name in sent:
+            assert file_name == f"user-{chat_id // 100}.txt"
@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import Future
+from functools import partial
+from multiprocessing.queues import Queue
+
+import pytest
+
+from src.agent.events import AgentEvent, AgentQueuedEvent, AgentTextEvent
+from src.agent.factory import AgentConfig
+from src.agent.sharding.messages import (
+    ContextRequest,
+    EventResponse,
+    ResultResponse,
+    SubmitRequest,
+    TokenGrant,
+    WorkerRequest,
+    WorkerResponse,
+)
+from src.agent.sharding.remote_rate_limiter import RemoteRateLimiter
+from src.agent.sharding.sharded_client import ShardedAgentClient
+from src.agent.sharding.worker import AgentWorkerConfig
+
+
+def _echo_worker(
+    shard: int,
+    config: AgentWorkerConfig,
+    requests: "Queue[WorkerRequest | None]",
+    responses: "Queue[WorkerResponse]",
+) -> None:
+    while (request := requests.get()) is not None:
+        if isinstance(request, SubmitRequest):
+            if request.text == "crash":
+                os._exit(1)
+            responses.put(
+                EventResponse(
+                    request_id=request.request_id,
+                    event=AgentTextEvent(text=f"pid={os.getpid()}"),
+                )
+            )
+            responses.put(
+                ResultResponse(
+                    request_id=request.request_id,
+                    result=f"{shard}:{request.user_id}:{request.text}",
+                )
+            )
+        elif isinstance(request, ContextRequest):
+            responses.put(
+                ResultResponse(request_id=request.request_id, result=f"shard {shard}")
+            )
+
+
+def _slow_worker(
+    shard: int,
+    config: AgentWorkerConfig,
+    requests: "Queue[WorkerRequest | None]",
+    responses: "Queue[WorkerResponse]",
+) -> None:
+    while (request := requests.get()) is not None:
+        if isinstance(request, SubmitRequest):
+            time.sleep(0.2)
+            responses.put(
+                ResultResponse(request_id=request.request_id, result=request.text)
+            )
+
+
+def _upload_worker(
+    shard: int,
+    config: AgentWorkerConfig,
+    requests: "Queue[WorkerRequest | None]",
+    responses: "Queue[WorkerResponse]",
+) -> None:
+    # Как инструмент загрузки: сообщает о 429 и ждёт разрешения от родителя
+    rate_limiter = RemoteRateLimiter(shard, responses)
+    while (request := requests.get()) is not None:
+        if isinstance(request, TokenGrant):
+            rate_limiter.grant(request.token_id)
+        elif isinstance(request, SubmitRequest):
+            rate_limiter.block(request.chat_id, 2.0)
+            rate_limiter.acquire(request.chat_id).add_done_callback(
+                partial(_reply_granted, responses, request.request_id)
+            )
+
+
+def _reply_granted(
+    responses: "Queue[WorkerResponse]", request_id: int, _: Future[None]
+) -> None:
+    responses.put(ResultResponse(request_id=request_id, result="granted"))
+
+
+class _TrackingRateLimiter:
+    def __init__(self) -> None:
+        self.acquired: list[int] = []
+        self.blocked: list[tuple[int, float]] = []
+
+    def acquire(self, chat_id: int) -> Future[None]:
+        self.acquired.append(chat_id)
+        future: Future[None] = Future()
+        future.set_result(None)
+        return future
+
+    def block(self, chat_id: int, retry_after: float) -> None:
+        self.blocked.append((chat_id, retry_after))
+
+
+@pytest.fixture(scope="module")
+def sharded_client() -> Iterator[ShardedAgentClient]:
+    config = AgentWorkerConfig(bot_token="", agent=AgentConfig(redis_url=""))
+    client = ShardedAgentClient(config, workers=3, worker_target=_echo_worker)
+    yield client
+    client.close()
+
+
+class TestShardedAgentClient:
+    def test_routes_each_user_to_its_shard(
+        self, sharded_client: ShardedAgentClient
+    ) -> None:
+        futures = {
+            user_id: sharded_client.submit_message(user_id, user_id, "hi")
+            for user_id in range(20)
+        }
+
+        for user_id, future in futures.items():
+            shard = sharded_client.shard_for(user_id)
+            assert future.result(timeout=30) == f"{shard}:{user_id}:hi"
+        assert sharded_client.get_context(5) == f"shard {sharded_client.shard_for(5)}"
+
+    def test_forwards_events_from_worker_process(
+        self, sharded_client: ShardedAgentClient
+    ) -> None:
+        events: list[AgentEvent] = []
+        done = threading.Event()
+
+        def on_event(event: AgentEvent) -> None:
+            events.append(event)
+            done.set()
+
+        sharded_client.send_message(1, 1, "hi", on_event=on_event)
+
+        assert done.wait(timeout=5)
+        assert isinstance(events[0], AgentTextEvent)
+        assert events[0].text != f"pid={os.getpid()}"
+
+    def test_crashed_worker_fails_its_requests_and_restarts(
+        self, sharded_client: ShardedAgentClient
+    ) -> None:
+        crashed = sharded_client.submit_message(1, 1, "crash")
+
+        with pytest.raises(RuntimeError, match="crashed"):
+            crashed.result(timeout=30)
+
+        shard = sharded_client.shard_for(1)
+        assert sharded_client.send_message(1, 1, "again") == f"{shard}:1:again"
+
+
+class TestShardedRateLimiter:
+    def test_workers_take_tokens_from_parent_limiter(self) -> None:
+        config = AgentWorkerConfig(bot_token="", agent=AgentConfig(redis_url=""))
+        rate_limiter = _TrackingRateLimiter()
+        client = ShardedAgentClient(
+            config,
+            workers=2,
+            worker_target=_upload_worker,
+            rate_limiter=rate_limiter,
+        )
+        try:
+            result = client.submit_message(1, 100, "upload").result(timeout=30)
+        finally:
+            client.close()
+
+        assert result == "granted"
+        assert rate_limiter.acquired == [100]
+        assert rate_limiter.blocked == [(100, 2.0)]
+
+
+class TestShardedAdmission:
+    def test_turn_limit_is_shared_by_all_workers(self) -> None:
+        config = AgentWorkerConfig(bot_token="", agent=AgentConfig(redis_url=""))
+        client = ShardedAgentClient(
+            config, workers=2, worker_target=_slow_worker, max_concurrent_turns=1
+        )
+        # Пользователи на разных шардах: без общего лимита ходы шли бы параллельно
+        first = 0
+        second = next(
+            user_id
+            for user_id in range(1, 100)
+            if client.shard_for(user_id) != client.shard_for(first)
+        )
+        events: list[AgentEvent] = []
+        try:
+            first_future = client.submit_message(first, 1, "first")
+            second_future = client.submit_message(
+                second, 2, "second", on_event=events.append
+            )
+            assert not second_future.done()
+            assert first_future.result(timeout=30) == "first"
+            assert second_future.result(timeout=30) == "second"
+        finally:
+            client.close()
+
+        assert events == [AgentQueuedEvent(position=1), AgentQueuedEvent(position=0)]
@@ -0,0 +1,52 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.metrics.startup_profile import StartupProfile
+
+
+class TestStartupProfile:
+    def test_records_phases_in_start_order(self) -> None:
+        profile = StartupProfile(started=time.perf_counter())
+
+        with profile.phase("first"):
+            time.sleep(0.01)
+        with profile.phase("second"):
+            pass
+
+        first, second = profile.phases
+        assert (first.name, second.name) == ("first", "second")
+        assert first.duration >= 0.01
+        assert second.offset >= first.offset + first.duration
+        assert first.thread == threading.current_thread().name
+
+    def test_timed_records_phase_in_worker_thread(self) -> None:
+        profile = StartupProfile(started=time.perf_counter())
+
+        with ThreadPoolExecutor(thread_name_prefix="startup") as pool:
+            future = pool.submit(profile.timed("load", lambda x: x * 2), 21)
+
+        assert future.result() == 42
+        (phase,) = profile.phases
+        assert phase.name == "load"
+        assert phase.thread.startswith("startup")
+
+    def test_records_phase_when_it_fails(self) -> None:
+        profile = StartupProfile(started=time.perf_counter())
+
+        try:
+            with profile.phase("broken"):
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+
+        assert [phase.name for phase in profile.phases] == ["broken"]
+
+    def test_report_lists_phases(self) -> None:
+        profile = StartupProfile(started=time.perf_counter())
+        profile.record("imports", since=time.perf_counter())
+
+        report = profile.report("starting polling")
+
+        assert report.startswith("Startup profile: starting polling in ")
+        assert "imports [MainThread]" in report
@@ -0,0 +1,100 @@
+import time
+from unittest.mock import MagicMock
+
+from bot_framework.entities.bot_message import BotMessage
+
+from src.agent.events import AgentQueuedEvent, AgentTextEvent, AgentToolEvent
+from src.chat.services.message_splitter import TELEGRAM_MESSAGE_LIMIT
+from src.chat.services.throttled_message_editor import ThrottledMessageEditor
+
+
+def _make_editor(interval: float) -> tuple[ThrottledMessageEditor, MagicMock]:
+    message_service = MagicMock()
+    message_service.send.return_value = BotMessage(chat_id=100, message_id=43)
+    editor = ThrottledMessageEditor(
+        message_service=message_service,
+        chat_id=100,
+        message_id=42,
+        interval=interval,
+    )
+    return editor, message_service
+
+
+class TestThrottledMessageEditorStreaming:
+    def test_shows_tool_progress(self) -> None:
+        editor, message_service = _make_editor(interval=0)
+
+        editor.feed(AgentToolEvent(name="Bash"))
+        time.sleep(0.05)
+
+        message_service.replace_progress.assert_called_once_with(
+            chat_id=100, message_id=42, text="🔧 Bash..."
+        )
+
+    def test_throttles_edits_within_interval(self) -> None:
+        editor, message_service = _make_editor(interval=60)
+
+        editor.feed(AgentTextEvent(text="One"))
+        time.sleep(0.05)
+        editor.feed(AgentTextEvent(text="Two"))
+        editor.feed(AgentTextEvent(text="Three"))
+        time.sleep(0.05)
+
+        message_service.replace_progress.assert_called_once_with(
+            chat_id=100, message_id=42, text="One"
+        )
+
+    def test_finish_flushes_pending_text(self) -> None:
+        editor, message_service = _make_editor(interval=60)
+
+        editor.feed(AgentTextEvent(text="One"))
+        time.sleep(0.05)
+        editor.feed(AgentTextEvent(text="Two"))
+        editor.finish("One\nTwo")
+
+        message_service.replace_progress.assert_called_once_with(
+            chat_id=100, message_id=42, text="One"
+        )
+        message_service.replace.assert_called_once_with(
+            chat_id=100, message_id=42, text="One\nTwo"
+        )
+
+
+class TestThrottledMessageEditorOverflow:
+    def test_opens_new_message_past_limit(self) -> None:
+        editor, message_service = _make_editor(interval=0)
+        first = "a" * TELEGRAM_MESSAGE_LIMIT
+        second = "b" * 10
+
+        editor.finish(f"{first}\n{second}")
+
+        message_service.replace.assert_called_once_with(
+            chat_id=100, message_id=42, text=first
+        )
+        message_service.send.assert_called_once_with(chat_id=100, text=second)
+
+    def test_skips_unchanged_chunks(self) -> None:
+        editor, message_service = _make_editor(interval=0)
+        first = "a" * TELEGRAM_MESSAGE_LIMIT
+
+        editor.feed(AgentTextEvent(text=first))
+        time.sleep(0.05)
+        editor.finish(f"{first}\nb")
+
+        message_service.replace_progress.assert_called_once_with(
+            chat_id=100, message_id=42, text=first
+        )
+        message_service.replace.assert_not_called()
+        message_service.send.assert_called_once_with(chat_id=100, text="b")
+
+
+class TestThrottledMessageEditorQueue:
+    def test_shows_queue_position(self) -> None:
+        editor, message_service = _make_editor(interval=0)
+
+        editor.feed(AgentQueuedEvent(position=2))
+        time.sleep(0.05)
+
+        message_service.replace_progress.assert_called_once_with(
+            chat_id=100, message_id=42, text="⏳ В очереди: 2"
+        )
@@ -0,0 +1,43 @@
+import time
+
+from src.agent.turn_trace import TurnTrace, payload_size
+
+
+class TestTurnTrace:
+    def test_pairs_tool_result_with_call_by_id(self) -> None:
+        trace = TurnTrace()
+        trace.start_tool("toolu_1", "Bash", {"command": "sleep 1"})
+        trace.start_tool("toolu_2", "Read", {"file_path": "notes.md"})
+        time.sleep(0.02)
+
+        read = trace.finish_tool("toolu_2", "content", is_error=False)
+        bash = trace.finish_tool("toolu_1", [{"type": "text", "text": "x"}], True)
+
+        assert read is not None
+        assert read.name == "Read"
+        assert read.output_size == len("content")
+        assert bash is not None
+        assert bash.is_error
+        assert bash.duration is not None
+        assert bash.duration >= 0.02
+        assert trace.finish_tool("toolu_3", "", is_error=False) is None
+
+    def test_formats_timeline(self) -> None:
+        trace = TurnTrace()
+        trace.start_tool("toolu_1", "Bash", {"command": "ls"})
+        trace.finish_tool("toolu_1", "a" * 2048, is_error=True)
+        trace.start_tool("toolu_2", "Read", {})
+        trace.finish()
+
+        lines = trace.format().split("\n")
+
+        assert lines[0].startswith("Turn ")
+        assert "2 tools" in lines[0]
+        assert "Bash" in lines[1]
+        assert "out=2.0KB ERROR" in lines[1]
+        assert "Read — running" in lines[2]
+
+    def test_measures_payload_size_in_bytes(self) -> None:
+        assert payload_size(None) == 0
+        assert payload_size("привет") == 12
+        assert payload_size({"a": 1}) == len('{"a": 1}')
@@ -0,0 +1,85 @@
+import asyncio
+from datetime import date
+
+from src.agent.usage import TurnUsage, UsageRollups
+from src.agent.usage_recorder import UsageRecorder
+
+
+def _run(coro: object) -> object:
+    return asyncio.new_event_loop().run_until_complete(coro)  # type:ignore[arg-type]
+
+
+class _RecordingStore:
+    def __init__(self, failures: int = 0) -> None:
+        self.batches: list[list[TurnUsage]] = []
+        self._failures = failures
+
+    async def record(self, usages: list[TurnUsage]) -> None:
+        if self._failures:
+            self._failures -= 1
+            raise ConnectionError("redis is down")
+        self.batches.append(list(usages))
+
+    async def load_rollups(self, user_id: int, today: date) -> UsageRollups:
+        raise NotImplementedError
+
+
+def _usage(user_id: int = 1) -> TurnUsage:
+    return TurnUsage(user_id=user_id, model="claude", cost_usd=0.01, messages=1)
+
+
+class TestUsageRecorder:
+    def test_record_only_buffers(self) -> None:
+        store = _RecordingStore()
+        recorder = UsageRecorder(store)
+
+        recorder.record(_usage())
+
+        assert store.batches == []
+
+    def test_flush_writes_in_batches(self) -> None:
+        store = _RecordingStore()
+        recorder = UsageRecorder(store, batch_size=2)
+        for user_id in range(5):
+            recorder.record(_usage(user_id))
+
+        _run(recorder.flush())
+
+        assert [len(batch) for batch in store.batches] == [2, 2, 1]
+
+    def test_keeps_batch_when_store_fails(self) -> None:
+        store = _RecordingStore(failures=1)
+        recorder = UsageRecorder(store)
+        recorder.record(_usage(1))
+
+        _run(recorder.flush())
+        recorder.record(_usage(2))
+        _run(recorder.flush())
+
+        assert [[usage.user_id for usage in batch] for batch in store.batches] == [
+            [1, 2]
+        ]
+
+    def test_drops_oldest_when_buffer_is_full(self) -> None:
+        store = _RecordingStore()
+        recorder = UsageRecorder(store, max_buffer=2)
+        for user_id in range(3):
+            recorder.record(_usage(user_id))
+
+        _run(recorder.flush())
+
+        assert [usage.user_id for usage in store.batches[0]] == [1, 2]
+
+    def test_background_flush_runs_on_interval(self) -> None:
+        store = _RecordingStore()
+        recorder = UsageRecorder(store, flush_interval=0.01)
+
+        async def scenario() -> None:
+            task = asyncio.create_task(recorder.run())
+            recorder.record(_usage())
+            await asyncio.sleep(0.05)
+            task.cancel()
+
+        _run(scenario())
+
+        assert len(store.batches) == 1
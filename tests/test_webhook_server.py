@@ -0,0 +1,187 @@
+import http.client
+import json
+import threading
+from collections.abc import Iterator
+
+import pytest
+from telebot import types
+
+from src.telegram.webhook_server import SECRET_HEADER, WebhookServer
+
+SECRET = "test-secret_42"  # noqa: S105
+PATH = "/telegram/webhook"
+
+# Обновления в том виде, в каком их присылает Telegram
+TEXT_UPDATE = {
+    "update_id": 900000001,
+    "message": {
+        "message_id": 101,
+        "from": {
+            "id": 42,
+            "is_bot": False,
+            "first_name": "Vladimir",
+            "language_code": "ru",
+        },
+        "chat": {"id": 42, "first_name": "Vladimir", "type": "private"},
+        "date": 1760779200,
+        "text": "Привет",
+    },
+}
+COMMAND_UPDATE = {
+    "update_id": 900000002,
+    "message": {
+        "message_id": 102,
+        "from": {"id": 42, "is_bot": False, "first_name": "Vladimir"},
+        "chat": {"id": 42, "first_name": "Vladimir", "type": "private"},
+        "date": 1760779205,
+        "text": "/stop",
+        "entities": [{"offset": 0, "length": 5, "type": "bot_command"}],
+    },
+}
+
+
+class _Collector:
+    def __init__(self, expected: int) -> None:
+        self.updates: list[types.Update] = []
+        self.batches = 0
+        self._expected = expected
+        self.done = threading.Event()
+
+    def __call__(self, updates: list[types.Update]) -> None:
+        self.batches += 1
+        self.updates.extend(updates)
+        if len(self.updates) >= self._expected:
+            self.done.set()
+
+
+@pytest.fixture
+def collector() -> _Collector:
+    return _Collector(expected=2)
+
+
+@pytest.fixture
+def server(collector: _Collector) -> Iterator[WebhookServer]:
+    webhook = WebhookServer(collector, secret_token=SECRET, path=PATH, port=0)
+    webhook.start()
+    yield webhook
+    webhook.stop()
+
+
+def _post(
+    connection: http.client.HTTPConnection,
+    body: bytes,
+    path: str = PATH,
+    secret: str | None = SECRET,
+) -> int:
+    headers = {"Content-Type": "application/json"}
+    if secret is not None:
+        headers[SECRET_HEADER] = secret
+    connection.request("POST", path, body=body, headers=headers)
+    response = connection.getresponse()
+    response.read()
+    return response.status
+
+
+class TestWebhookServer:
+    def test_queues_recorded_updates_for_handlers(
+        self, server: WebhookServer, collector: _Collector
+    ) -> None:
+        connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+        try:
+            # Оба запроса идут по одному keep-alive соединению, как у Telegram
+            assert _post(connection, json.dumps(TEXT_UPDATE).encode()) == 200
+            assert _post(connection, json.dumps(COMMAND_UPDATE).encode()) == 200
+        finally:
+            connection.close()
+
+        assert collector.done.wait(timeout=5)
+        assert [update.update_id for update in collector.updates] == [
+            900000001,
+            900000002,
+        ]
+        message = collector.updates[0].message
+        assert message.text == "Привет"
+        assert message.from_user.id == 42
+        assert collector.updates[1].message.text == "/stop"
+
+    @pytest.mark.parametrize("secret", [None, "wrong-secret"])
+    def test_rejects_requests_without_valid_secret(
+        self, server: WebhookServer, collector: _Collector, secret: str | None
+    ) -> None:
+        connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+        try:
+            status = _post(connection, json.dumps(TEXT_UPDATE).encode(), secret=secret)
+        finally:
+            connection.close()
+
+        assert status == 401
+        assert collector.updates == []
+
+    def test_rejects_unknown_path_and_malformed_body(
+        self, server: WebhookServer, collector: _Collector
+    ) -> None:
+        body = json.dumps(TEXT_UPDATE).encode()
+        statuses = []
+        for path, payload in ((PATH + "/other", body), (PATH, b"{not json")):
+            connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+            try:
+                statuses.append(_post(connection, payload, path=path))
+            finally:
+                connection.close()
+
+        assert statuses == [404, 400]
+        assert collector.updates == []
+
+    def test_answers_before_handlers_finish(self) -> None:
+        release = threading.Event()
+        received: list[types.Update] = []
+
+        def slow_consumer(updates: list[types.Update]) -> None:
+            release.wait(timeout=5)
+            received.extend(updates)
+
+        webhook = WebhookServer(slow_consumer, secret_token=SECRET, path=PATH, port=0)
+        webhook.start()
+        connection = http.client.HTTPConnection("127.0.0.1", webhook.port, timeout=2)
+        try:
+            # Обработчик ещё занят, а приём не ждёт его
+            assert _post(connection, json.dumps(TEXT_UPDATE).encode()) == 200
+            assert _post(connection, json.dumps(COMMAND_UPDATE).encode()) == 200
+        finally:
+            connection.close()
+            release.set()
+            webhook.stop()
+
+    def test_full_queue_asks_telegram_to_retry(self) -> None:
+        release = threading.Event()
+
+        def blocked_consumer(updates: list[types.Update]) -> None:
+            release.wait(timeout=5)
+
+        webhook = WebhookServer(
+            blocked_consumer,
+            secret_token=SECRET,
+            path=PATH,
+            port=0,
+            queue_size=1,
+            max_batch_size=1,
+        )
+        webhook.start()
+        statuses = []
+        try:
+            for update_id in range(1, 5):
+                update = {**TEXT_UPDATE, "update_id": update_id}
+                connection = http.client.HTTPConnection(
+                    "127.0.0.1", webhook.port, timeout=5
+                )
+                try:
+                    statuses.append(_post(connection, json.dumps(update).encode()))
+                finally:
+                    connection.close()
+        finally:
+            release.set()
+            webhook.stop()
+
+        # Первое обновление ушло обработчику, второе ждёт в очереди, остальные — 503
+        assert statuses[-1] == 503
+        assert statuses.count(200) <= 2
@@ -1,28 +1,63 @@
-from logging import basicConfig, getLogger
+# Первым: отметка начала импортов для профиля запуска
+from src.metrics.startup_profile import IMPORTED_AT, StartupProfile
+
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
 from os import getenv
 from pathlib import Path
+from urllib.parse import urlparse
 
 from dotenv import load_dotenv
+from telebot import apihelper
 
 from bot_framework.app import BotApplication
-from claude_agent_sdk import create_sdk_mcp_server
-from src.agent.client import AgentClient
-from src.agent.tools.registry import SessionRegistry
-from src.agent.tools.send_file import init_send_file, send_file
+from src.agent.client import STDERR_LOGGER, THINKING_LOGGER, AgentClient
+from src.agent.factory import AgentConfig, create_agent_client
+from src.agent.protocols.i_agent_client import IAgentClient
+from src.agent.sharding.sharded_client import ShardedAgentClient
+from src.agent.sharding.worker import AgentWorkerConfig
 from src.chat.actions.send_to_agent_action import SendToAgentAction
 from src.chat.handlers.clear_command_handler import ClearCommandHandler
 from src.chat.handlers.context_command_handler import ContextCommandHandler
+from src.chat.handlers.file_message_handler import FileMessageHandler
+from src.chat.handlers.stats_command_handler import StatsCommandHandler
+from src.chat.handlers.stop_command_handler import StopCommandHandler
 from src.chat.handlers.text_message_handler import TextMessageHandler
+from src.chat.handlers.trace_command_handler import TraceCommandHandler
+from src.logs.pipeline import LoggingConfig, setup_logging
+from src.metrics.registry import MetricsRegistry
+from src.metrics.server import start_metrics_server
+from src.telegram.file_downloader import TelegramFileDownloader
+from src.telegram.file_store import ContentAddressedFileStore
+from src.telegram.outbound_scheduler import OutboundScheduler, RateLimits
+from src.telegram.scheduled_message_service import ScheduledMessageService
+from src.telegram.webhook_server import WebhookServer
 
 logger = getLogger(__name__)
 
 
 def main() -> None:
-    basicConfig(level="DEBUG")
+    profile = StartupProfile()
+    profile.record("imports", since=IMPORTED_AT)
 
     project_root = Path(__file__).parent.parent.parent
     load_dotenv(dotenv_path=project_root / ".env")
 
+    logging_config = LoggingConfig(
+        level=getenv("LOG_LEVEL", "DEBUG"),
+        format=getenv("LOG_FORMAT", "json"),
+        queue_size=int(getenv("LOG_QUEUE_SIZE", "10000")),
+        session_buffer=int(getenv("LOG_SESSION_BUFFER", "200")),
+        sampling={
+            STDERR_LOGGER: float(getenv("LOG_STDERR_RATE", "5")),
+            THINKING_LOGGER: float(getenv("LOG_THINKING_RATE", "1")),
+        },
+    )
+    logging_pipeline = setup_logging(logging_config)
+    # Дописать очередь перед выходом процесса
+    atexit.register(logging_pipeline.stop)
+
     bot_token = getenv("BOT_TOKEN")
     if not bot_token:
         raise ValueError("BOT_TOKEN environment variable is required")
@@ -35,9 +70,52 @@ def main() -> None:
     if not redis_url:
         raise ValueError("REDIS_URL environment variable is required")
 
+    stream_edit_interval = float(getenv("STREAM_EDIT_INTERVAL", "1.0"))
+    reply_document_threshold = int(getenv("REPLY_DOCUMENT_THRESHOLD", "16384"))
+    coalesce_window = float(getenv("AGENT_COALESCE_WINDOW", "0.5"))
+    max_batch_size = int(getenv("AGENT_MAX_BATCH_SIZE", "10"))
+    max_clients = int(getenv("AGENT_MAX_CLIENTS", "8"))
+    client_idle_ttl = float(getenv("AGENT_CLIENT_IDLE_TTL", "1800"))
+    warm_spare = getenv("AGENT_WARM_SPARE", "false").lower() == "true"
+    max_concurrent_uploads = int(getenv("TELEGRAM_MAX_CONCURRENT_UPLOADS", "4"))
+    agent_workers = int(getenv("AGENT_WORKERS", "0"))
+    async_mode = getenv("TELEGRAM_ASYNC", "false").lower() == "true"
+    if async_mode and agent_workers > 0:
+        raise ValueError("TELEGRAM_ASYNC requires AGENT_WORKERS=0")
+    metrics_port = int(getenv("METRICS_PORT", "0"))
+    slow_tool_threshold = float(getenv("AGENT_SLOW_TOOL_THRESHOLD", "30"))
+    compact_idle_tokens = int(getenv("AGENT_COMPACT_IDLE_TOKENS", "100000"))
+    compact_hard_tokens = int(getenv("AGENT_COMPACT_HARD_TOKENS", "150000"))
+    compact_idle_delay = float(getenv("AGENT_COMPACT_IDLE_DELAY", "300"))
+    usage_flush_interval = float(getenv("AGENT_USAGE_FLUSH_INTERVAL", "1.0"))
+    turn_timeout = float(getenv("AGENT_TURN_TIMEOUT", "1800"))
+    max_turn_steps = int(getenv("AGENT_MAX_TURN_STEPS", "100"))
+    max_concurrent_turns = int(getenv("AGENT_MAX_CONCURRENT_TURNS", "4"))
+    uploads_dir = Path(getenv("TELEGRAM_UPLOADS_DIR") or Path.home() / "uploads")
+    max_concurrent_downloads = int(getenv("TELEGRAM_MAX_CONCURRENT_DOWNLOADS", "2"))
+    webhook_url = getenv("TELEGRAM_WEBHOOK_URL", "")
+    webhook_secret = getenv("TELEGRAM_WEBHOOK_SECRET", "")
+    if webhook_url and not webhook_secret:
+        raise ValueError(
+            "TELEGRAM_WEBHOOK_SECRET is required with TELEGRAM_WEBHOOK_URL"
+        )
+    webhook_host = getenv("TELEGRAM_WEBHOOK_HOST", "127.0.0.1")
+    webhook_port = int(getenv("TELEGRAM_WEBHOOK_PORT", "8443"))
+    startup_profile = getenv("STARTUP_PROFILE", "false").lower() == "true"
+    rate_limits = RateLimits(
+        global_rate=float(getenv("TELEGRAM_GLOBAL_RATE", "30")),
+        chat_rate=float(getenv("TELEGRAM_CHAT_RATE", "1")),
+        chat_burst=float(getenv("TELEGRAM_CHAT_BURST", "3")),
+    )
+
     data_dir = project_root / "data"
 
-    app = BotApplication(
+    # Независимые ресурсы поднимаются параллельно: BotApplication ждёт Postgres
+    # и Redis (миграции, роли, фразы), снятие webhook — Telegram, а воркеры
+    # агента и сервер метрик стартуют в основном потоке
+    startup = ThreadPoolExecutor(max_workers=3, thread_name_prefix="startup")
+    app_future = startup.submit(
+        profile.timed("bot application", BotApplication),
         bot_token=bot_token,
         database_url=db_url,
         redis_url=redis_url,
@@ -46,22 +124,109 @@ def main() -> None:
         roles_json_path=data_dir / "roles.json",
         use_class_middlewares=True,
     )
+    webhook_future = None
+    if not webhook_url and not async_mode:
+        # При возврате с webhook на polling Telegram отвечает 409, пока webhook задан
+        webhook_future = startup.submit(
+            profile.timed("delete webhook", apihelper.delete_webhook), bot_token
+        )
+
+    # Все исходящие вызовы Telegram процесса идут через один планировщик
+    outbound_scheduler = OutboundScheduler(rate_limits)
+
+    metrics = MetricsRegistry()
+    if metrics_port:
+        start_metrics_server(metrics, metrics_port)
 
-    session_registry = SessionRegistry()
-    init_send_file(session_registry)
-    mcp_server = create_sdk_mcp_server(
-        name="bot-tools", version="1.0.0", tools=[send_file]
+    agent_config = AgentConfig(
+        redis_url=redis_url,
+        coalesce_window=coalesce_window,
+        max_batch_size=max_batch_size,
+        max_clients=max_clients,
+        idle_ttl=client_idle_ttl,
+        warm_spare=warm_spare,
+        max_concurrent_uploads=max_concurrent_uploads,
+        metrics_port=metrics_port,
+        slow_tool_threshold=slow_tool_threshold,
+        compact_idle_tokens=compact_idle_tokens,
+        compact_hard_tokens=compact_hard_tokens,
+        compact_idle_delay=compact_idle_delay,
+        usage_flush_interval=usage_flush_interval,
+        turn_timeout=turn_timeout,
+        max_turn_steps=max_turn_steps,
+        max_concurrent_turns=max_concurrent_turns,
     )
-    agent_client = AgentClient(
-        session_registry=session_registry,
-        bot=app.core.bot,
-        mcp_server=mcp_server,
+    agent_client: IAgentClient
+    # Асинхронному режиму нужен сам AgentClient: он работает на его loop
+    local_client: AgentClient | None = None
+    if agent_workers > 0:
+        # Процесс бота занимается только Telegram I/O, сессии живут в воркерах
+        logger.info("Starting %d agent worker processes...", agent_workers)
+        with profile.phase("agent workers"):
+            agent_client = ShardedAgentClient(
+                AgentWorkerConfig(
+                    bot_token=bot_token,
+                    agent=agent_config,
+                    logging=logging_config,
+                ),
+                workers=agent_workers,
+                rate_limiter=outbound_scheduler,
+                max_concurrent_turns=max_concurrent_turns,
+            )
+        app = app_future.result()
+    else:
+        app = app_future.result()
+        # SDK импортируется при первом ходе, так что клиент создаётся быстро
+        with profile.phase("agent client"):
+            agent_client = local_client = create_agent_client(
+                agent_config,
+                bot=app.core.bot,
+                rate_limiter=outbound_scheduler,
+                metrics=metrics,
+                log_buffer=logging_pipeline.session_buffer,
+            )
+    message_service = ScheduledMessageService(app.message_service, outbound_scheduler)
+    if warm_spare:
+        # Запрос админов и прогрев не задерживают начало приёма обновлений
+        startup.submit(profile.timed("warm-up", _warm_up), app, agent_client)
+    startup.shutdown(wait=False)
+
+    downloader = TelegramFileDownloader(
+        app.core.bot, ContentAddressedFileStore(uploads_dir)
     )
-    message_service = app.message_service
+
+    if async_mode and local_client is not None:
+        # aiohttp нужен только асинхронному режиму (extra "async")
+        with profile.phase("async bot imports"):
+            from workers.bot.async_bot import AsyncBotConfig, run_async_bot
+
+        if startup_profile:
+            logger.info(profile.report("starting async bot"))
+        run_async_bot(
+            AsyncBotConfig(
+                bot_token=bot_token,
+                rate_limits=rate_limits,
+                edit_interval=stream_edit_interval,
+                document_threshold=reply_document_threshold,
+                download_workers=max_concurrent_downloads,
+                webhook_url=webhook_url,
+                webhook_secret=webhook_secret,
+                webhook_host=webhook_host,
+                webhook_port=webhook_port,
+            ),
+            agent_client=local_client,
+            role_repo=app.role_repo,
+            downloader=downloader,
+            metrics=metrics,
+        )
+        return
 
     send_to_agent_action = SendToAgentAction(
         agent_client=agent_client,
         message_service=message_service,
+        edit_interval=stream_edit_interval,
+        document_threshold=reply_document_threshold,
+        metrics=metrics,
     )
 
     clear_handler = ClearCommandHandler(
@@ -74,6 +239,25 @@ def main() -> None:
         agent_client=agent_client,
         message_service=message_service,
         role_repo=app.role_repo,
+        metrics=metrics,
+    )
+
+    trace_handler = TraceCommandHandler(
+        agent_client=agent_client,
+        message_service=message_service,
+        role_repo=app.role_repo,
+    )
+
+    stop_handler = StopCommandHandler(
+        agent_client=agent_client,
+        message_service=message_service,
+        role_repo=app.role_repo,
+    )
+
+    stats_handler = StatsCommandHandler(
+        agent_client=agent_client,
+        message_service=message_service,
+        role_repo=app.role_repo,
     )
 
     text_handler = TextMessageHandler(
@@ -82,6 +266,14 @@ def main() -> None:
         role_repo=app.role_repo,
     )
 
+    file_handler = FileMessageHandler(
+        send_to_agent_action=send_to_agent_action,
+        message_service=message_service,
+        role_repo=app.role_repo,
+        downloader=downloader,
+        download_workers=max_concurrent_downloads,
+    )
+
     app.core.message_handler_registry.register(
         handler=clear_handler,
         commands=["clear"],
@@ -94,15 +286,67 @@ def main() -> None:
         content_types=["text"],
     )
 
+    app.core.message_handler_registry.register(
+        handler=trace_handler,
+        commands=["trace"],
+        content_types=["text"],
+    )
+
+    app.core.message_handler_registry.register(
+        handler=stop_handler,
+        commands=["stop"],
+        content_types=["text"],
+    )
+
+    app.core.message_handler_registry.register(
+        handler=stats_handler,
+        commands=["stats"],
+        content_types=["text"],
+    )
+
     app.core.message_handler_registry.register(
         handler=text_handler,
         content_types=["text"],
     )
 
+    app.core.message_handler_registry.register(
+        handler=file_handler,
+        content_types=["document", "photo", "voice"],
+    )
+
+    if webhook_url:
+        # Приём обновлений отвязан от потоков обработчиков: сервер только
+        # кладёт их в очередь, а TLS завершает обратный прокси
+        webhook_server = WebhookServer(
+            consumer=app.core.bot.process_new_updates,
+            secret_token=webhook_secret,
+            path=urlparse(webhook_url).path,
+            host=webhook_host,
+            port=webhook_port,
+        )
+        webhook_server.start()
+        with profile.phase("set webhook"):
+            app.core.bot.set_webhook(url=webhook_url, secret_token=webhook_secret)
+        logger.info("Receiving updates via webhook %s", webhook_url)
+        if startup_profile:
+            logger.info(profile.report("receiving updates"))
+        webhook_server.serve_forever()
+        return
+
+    if webhook_future is not None:
+        webhook_future.result()
     logger.info("Starting polling...")
+    if startup_profile:
+        logger.info(profile.report("starting polling"))
     app.run()
 
 
+def _warm_up(app: BotApplication, agent_client: IAgentClient) -> None:
+    admin_ids = [user.id for user in app.user_repo.get_by_role_name("admin")]
+    logger.info("Warming up SDK clients for %d admins...", len(admin_ids))
+    agent_client.prewarm(admin_ids)
+
+
 if __name__ == "__main__":
     try:
         main()
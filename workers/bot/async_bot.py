@@ -0,0 +1,139 @@
+import asyncio
+from dataclasses import dataclass
+from logging import getLogger
+from urllib.parse import urlparse
+
+from telebot import types
+from telebot.async_telebot import AsyncTeleBot
+
+from bot_framework.role_management.repos import RoleRepo
+from src.agent.client import AgentClient
+from src.chat.actions.async_send_to_agent_action import AsyncSendToAgentAction
+from src.chat.handlers.async_command_handlers import (
+    AsyncClearCommandHandler,
+    AsyncContextCommandHandler,
+    AsyncStatsCommandHandler,
+    AsyncStopCommandHandler,
+    AsyncTraceCommandHandler,
+)
+from src.chat.handlers.async_file_message_handler import AsyncFileMessageHandler
+from src.chat.handlers.async_text_message_handler import AsyncTextMessageHandler
+from src.chat.services.async_role_guard import AsyncRoleGuard
+from src.metrics.registry import MetricsRegistry
+from src.telegram.async_message_service import AsyncTelegramMessageService
+from src.telegram.file_downloader import TelegramFileDownloader
+from src.telegram.outbound_scheduler import RateLimits
+from src.telegram.webhook_server import WebhookServer
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class AsyncBotConfig:
+    bot_token: str
+    rate_limits: RateLimits
+    edit_interval: float = 1.0
+    document_threshold: int = 16384
+    download_workers: int = 2
+    webhook_url: str = ""
+    webhook_secret: str = ""
+    webhook_host: str = "127.0.0.1"
+    webhook_port: int = 8443
+
+
+def run_async_bot(
+    config: AsyncBotConfig,
+    agent_client: AgentClient,
+    role_repo: RoleRepo,
+    downloader: TelegramFileDownloader,
+    metrics: MetricsRegistry,
+) -> None:
+    # Приём обновлений, обработчики, ходы агента и вызовы Telegram — на одном
+    # loop AgentClient: поток обработчика не блокируется на Future хода
+    asyncio.run_coroutine_threadsafe(
+        _run(config, agent_client, role_repo, downloader, metrics), agent_client.loop
+    ).result()
+
+
+async def _run(
+    config: AsyncBotConfig,
+    agent_client: AgentClient,
+    role_repo: RoleRepo,
+    downloader: TelegramFileDownloader,
+    metrics: MetricsRegistry,
+) -> None:
+    bot = AsyncTeleBot(config.bot_token)
+    message_service = AsyncTelegramMessageService(bot, config.rate_limits)
+    role_guard = AsyncRoleGuard(role_repo)
+    send_to_agent_action = AsyncSendToAgentAction(
+        agent_client=agent_client,
+        message_service=message_service,
+        edit_interval=config.edit_interval,
+        document_threshold=config.document_threshold,
+        metrics=metrics,
+    )
+
+    commands = {
+        "clear": AsyncClearCommandHandler(agent_client, message_service, role_guard),
+        "context": AsyncContextCommandHandler(
+            agent_client, message_service, role_guard, metrics=metrics
+        ),
+        "trace": AsyncTraceCommandHandler(agent_client, message_service, role_guard),
+        "stop": AsyncStopCommandHandler(agent_client, message_service, role_guard),
+        "stats": AsyncStatsCommandHandler(agent_client, message_service, role_guard),
+    }
+    for command, handler in commands.items():
+        bot.register_message_handler(
+            handler.handle, commands=[command], content_types=["text"]
+        )
+
+    text_handler = AsyncTextMessageHandler(
+        send_to_agent_action=send_to_agent_action,
+        message_service=message_service,
+        role_guard=role_guard,
+    )
+    bot.register_message_handler(text_handler.handle, content_types=["text"])
+
+    file_handler = AsyncFileMessageHandler(
+        send_to_agent_action=send_to_agent_action,
+        message_service=message_service,
+        role_guard=role_guard,
+        downloader=downloader,
+        download_workers=config.download_workers,
+    )
+    bot.register_message_handler(
+        file_handler.handle, content_types=["document", "photo", "voice"]
+    )
+
+    try:
+        if config.webhook_url:
+            await _serve_webhook(config, bot)
+        else:
+            await bot.delete_webhook()
+            logger.info("Starting async polling...")
+            await bot.infinity_polling()
+    finally:
+        await bot.close_session()
+
+
+async def _serve_webhook(config: AsyncBotConfig, bot: AsyncTeleBot) -> None:
+    loop = asyncio.get_running_loop()
+    processing: set[asyncio.Task[None]] = set()
+
+    def dispatch(updates: list[types.Update]) -> None:
+        # Обработчики идут задачами, очередь webhook не ждёт ходов агента
+        task = loop.create_task(bot.process_new_updates(updates))
+        processing.add(task)
+        task.add_done_callback(processing.discard)
+
+    server = WebhookServer(
+        consumer=dispatch,
+        secret_token=config.webhook_secret,
+        path=urlparse(config.webhook_url).path,
+        host=config.webhook_host,
+        port=config.webhook_port,
+    )
+    serving = loop.create_task(server.serve())
+    await bot.set_webhook(url=config.webhook_url, secret_token=config.webhook_secret)
+    logger.info("Receiving updates via webhook %s", config.webhook_url)
+    await serving